@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Large File I/O Benchmark for ConvertKeylogApp
+So sánh tốc độ đọc xlsx: FastXlsxReader (raw XML) vs openpyxl read-only
+tốc độ ghi kết quả: splice XML vs rebuild workbook
+và writer xlsx: StreamingXlsxWriter vs openpyxl write-only vs xlsxwriter
+Usage: python benchmark_large_file_io.py [rows]
+"""
+
+import os
+import sys
+import time
+import openpyxl
+from services.excel.xlsx_fast_reader import benchmark_against_openpyxl
+from services.excel.large_file_processor import LargeFileProcessor
+from services.excel.results_store import ResultsStore
+from services.excel.xlsx_stream_writer import StreamingXlsxWriter
+
+def create_benchmark_file(rows: int, filename: str) -> str:
+    """Tạo file benchmark bằng openpyxl write-only (shared strings như Excel thật)"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(['data_A', 'data_B', 'P1_a', 'P1_b', 'P1_c', 'P1_d', 'keylog'])
+    for j in range(rows):
+        ws.append([f'{j % 10},{(j+1) % 10}', f'{(j+2) % 10},{(j+3) % 10}',
+                   j % 7, (j + 1) % 5, 1.5, -j % 3, ''])
+    wb.save(filename)
+    return filename
+
+def run_reader_benchmark(rows: int = 50000):
+    print(f"\n=== READER BENCHMARK: {rows:,} rows ===")
+    test_file = create_benchmark_file(rows, f"bench_reader_{rows}.xlsx")
+    try:
+        for label, columns in (("all columns", None), ("projected data_A,data_B", [0, 1])):
+            stats = benchmark_against_openpyxl(test_file, columns)
+            print(f"📊 {label} ({stats['file_size_mb']:.1f}MB):")
+            print(f"   openpyxl : {stats['openpyxl_rows_per_sec']:,.0f} rows/sec ({stats['openpyxl_seconds']:.2f}s)")
+            print(f"   fast XML : {stats['fast_xml_rows_per_sec']:,.0f} rows/sec ({stats['fast_xml_seconds']:.2f}s)")
+            print(f"   🔥 Speedup: {stats['speedup']:.1f}x")
+    finally:
+        os.remove(test_file)
+
+def run_finalize_benchmark(rows: int = 50000):
+    print(f"\n=== FINALIZE BENCHMARK: {rows:,} rows ===")
+    test_file = create_benchmark_file(rows, f"bench_finalize_{rows}.xlsx")
+    processor = LargeFileProcessor()
+    temp_results = f"{test_file}.temp_results"
+    processor._write_results_buffer_fast(temp_results, [f"wj112={j % 10}={j % 7}=" for j in range(rows)])
+    has_keylog, name, index = processor._detect_keylog_column_strict(test_file)
+    try:
+        for label, method in (("rebuild", processor._create_excel_with_smart_keylog),
+                              ("splice", processor._create_excel_spliced)):
+            output = f"bench_out_{label}.xlsx"
+            start = time.time()
+            method(test_file, temp_results, output, has_keylog, name, index)
+            elapsed = time.time() - start
+            print(f"   {label:8}: {rows / elapsed:,.0f} rows/sec ({elapsed:.2f}s)")
+            os.remove(output)
+    finally:
+        ResultsStore(temp_results).remove()
+        os.remove(test_file)
+
+def _result_rows(rows: int):
+    for j in range(rows):
+        yield [f'{j % 10},{(j+1) % 10}', f'{(j+2) % 10},{(j+3) % 10}', str(j % 7), str((j + 1) % 5),
+               '1.5', str(-j % 3), f"wj112={j % 10}={j % 7}="]
+
+def _write_stream(filename: str, header, rows: int):
+    with StreamingXlsxWriter(filename) as writer:
+        sheet = writer.create_sheet('Results', styled_columns=[6])
+        sheet.append(header)
+        for values in _result_rows(rows):
+            sheet.append(values)
+
+def _write_openpyxl(filename: str, header, rows: int):
+    from openpyxl.cell import WriteOnlyCell
+    from services.excel.output_styles import ensure_keylog_style
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Results')
+    style = ensure_keylog_style(wb)
+    ws.append(header)
+    for values in _result_rows(rows):
+        cell = WriteOnlyCell(ws, value=values[6])
+        cell.style = style
+        ws.append(values[:6] + [cell])
+    wb.save(filename)
+    wb.close()
+
+def _write_xlsxwriter(filename: str, header, rows: int):
+    import xlsxwriter
+    wb = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    ws = wb.add_worksheet('Results')
+    keylog_format = wb.add_format({'font_name': 'Flexio Fx799VN', 'font_size': 11, 'bold': True})
+    ws.write_row(0, 0, header)
+    for r, values in enumerate(_result_rows(rows), start=1):
+        ws.write_row(r, 0, values[:6])
+        ws.write_string(r, 6, values[6], keylog_format)
+    wb.close()
+
+def run_writer_benchmark(rows: int = 50000):
+    print(f"\n=== WRITER BENCHMARK: {rows:,} rows ===")
+    header = ['data_A', 'data_B', 'P1_a', 'P1_b', 'P1_c', 'P1_d', 'keylog']
+    writers = [("stream", _write_stream), ("openpyxl", _write_openpyxl)]
+    try:
+        import xlsxwriter  # noqa: F401
+        writers.append(("xlsxwriter", _write_xlsxwriter))
+    except ImportError:
+        print("   (xlsxwriter chưa cài - bỏ qua)")
+    for label, write in writers:
+        output = f"bench_writer_{label}.xlsx"
+        start = time.time()
+        write(output, header, rows)
+        elapsed = time.time() - start
+        size_mb = os.path.getsize(output) / (1024 * 1024)
+        print(f"   {label:10}: {rows / elapsed:,.0f} rows/sec ({elapsed:.2f}s, {size_mb:.1f}MB)")
+        os.remove(output)
+
+if __name__ == "__main__":
+    bench_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    run_reader_benchmark(bench_rows)
+    run_finalize_benchmark(bench_rows)
+    run_writer_benchmark(bench_rows)
@@ -8,16 +8,33 @@ import gc
 import warnings
 
 from services.equation.equation_service import EquationService
+from services.excel.csv_io import (read_table, iter_table_chunks, is_delimited_path,
+                                   write_dataframe_delimited, DelimitedWriter)
+from services.excel.row_result_cache import RowResultCache
+from services.excel.compact_frames import compact_string_columns, row_group_codes
+from services.excel.fingerprint_index import config_fingerprint
+from services.excel.persistent_keylog_cache import PersistentKeylogCache, mapping_files_fingerprint
+from services.excel.xlsx_stream_writer import StreamingXlsxWriter
+from services.excel.file_preview import preview_file, PREVIEW_ROWS
+from services.excel.row_config import fanout_versions, version_keylog_columns
 
 PH_COL_BASE = "Phương trình "
 
 class EquationBatchProcessor:
-    def __init__(self):
+    def __init__(self, keylog_cache_path: str = None):
         self.service = EquationService()
         # Tuning params
         self.chunk_size = 1000  # rows per chunk when large file
         self.large_file_mb = 100  # threshold to switch to chunked mode
         self.memory_warn_mb = 1000  # show warning if memory exceeds (MB)
+        self.last_dedup_stats: Dict = {}
+        # Optional sqlite cache of solved rows shared across runs (see PersistentKeylogCache)
+        self.keylog_cache_path = keylog_cache_path
+        self.keylog_cache = None
+        self._cache_config_hash = ""
+        self.last_cache_stats: Dict = {}
+        # Version fan-out of the current run: one keylog_<version> column each instead of 'keylog'
+        self.versions: List[str] = []
 
     # ================== Helpers ==================
     def _normalize_equation_cell(self, cell: str, needed_len: int) -> str:
@@ -48,98 +65,167 @@ class EquationBatchProcessor:
         except Exception:
             return 0.0
 
-    # ================== Core small/medium file ==================
-    def process_dataframe(self, df: pd.DataFrame, variables: int, version: str) -> pd.DataFrame:
-        out_rows: List[Dict] = []
+    def _solve_inputs(self, equation_inputs: List[str]) -> Dict:
+        ok, status, solutions, keylog = self.service.process_complete_workflow(equation_inputs)
+        return {
+            "solutions": solutions,
+            **self._keylog_cells(keylog if ok else "", ok),
+            "status": "Thành công" if ok else "Lỗi",
+            "error_message": "" if ok else status
+        }
+
+    def _keylog_cells(self, keylog: str, ok: bool = False) -> Dict:
+        """'keylog', or one keylog_<version> cell per fan-out version (coefficients encoded once)"""
+        if not self.versions:
+            return {"keylog": keylog}
+        keylogs = self.service.final_keylogs_for_versions(self.versions) if ok else [""] * len(self.versions)
+        return dict(zip(version_keylog_columns(self.versions), keylogs))
+
+    def _start_run(self, variables: int, version: str, versions: List[str] = None):
         self.service.set_variables_count(variables)
         self.service.set_version(version)
+        self.versions = fanout_versions(versions) if versions else []
+        self._open_keylog_cache(variables, version)
+
+    def _solve_inputs_cached(self, equation_inputs: List[str]) -> Dict:
+        if self.keylog_cache is None:
+            return self._solve_inputs(equation_inputs)
+        return self.keylog_cache.get_or_compute('equation', self._cache_config_hash, equation_inputs,
+                                                lambda: self._solve_inputs(equation_inputs))
+
+    def _open_keylog_cache(self, variables: int, version: str):
+        self.keylog_cache = None
+        if self.keylog_cache_path:
+            self._cache_config_hash = config_fingerprint(
+                variables, version, mapping_files_fingerprint('equation_mode'), *self.versions).hex()
+            self.keylog_cache = PersistentKeylogCache(self.keylog_cache_path)
+
+    def _close_keylog_cache(self):
+        if self.keylog_cache is not None:
+            self.keylog_cache.close()
+            self.last_cache_stats = self.keylog_cache.stats()
+            print(self.keylog_cache.summary_line())
+            self.keylog_cache = None
+
+    def _equation_columns(self, variables: int) -> List[str]:
+        return [f"{PH_COL_BASE}{i}" for i in range(1, variables + 1)]
+
+    def preview_file(self, input_path: str, rows: int = PREVIEW_ROWS) -> Dict:
+        """First rows + row estimate + number of consecutive 'Phương trình i' columns (bounded time)"""
+        preview = preview_file(input_path, rows)
+        columns = set(preview['columns'])
+        variables = 0
+        while f"{PH_COL_BASE}{variables + 1}" in columns:
+            variables += 1
+        preview['detected_mapping'] = {'variables': variables, 'columns': self._equation_columns(variables)}
+        return preview
+
+    def _process_row(self, row: pd.Series, variables: int, row_cache: RowResultCache, key=None) -> Dict:
+        """
+        Input cells + result columns; identical inputs are solved once per run.
+        `key` is the row's group code when the caller has one, else the normalized inputs are hashed.
+        """
+        try:
+            equation_inputs = self._build_inputs_from_row(row, variables)
+            result = row_cache.get_or_compute(tuple(equation_inputs) if key is None else key,
+                                              lambda: self._solve_inputs_cached(equation_inputs))
+            return {**row.to_dict(), **result}
+        except Exception as e:
+            return {
+                **row.to_dict(),
+                "solutions": "",
+                **self._keylog_cells(""),
+                "status": "Lỗi",
+                "error_message": str(e)
+            }
 
-        for _, row in df.iterrows():
-            try:
-                equation_inputs = self._build_inputs_from_row(row, variables)
-                ok, status, solutions, keylog = self.service.process_complete_workflow(equation_inputs)
-                out_rows.append({
-                    **row.to_dict(),
-                    "solutions": solutions,
-                    "keylog": keylog if ok else "",
-                    "status": "Thành công" if ok else "Lỗi",
-                    "error_message": "" if ok else status
-                })
-            except Exception as e:
-                out_rows.append({
-                    **row.to_dict(),
-                    "solutions": "",
-                    "keylog": "",
-                    "status": "Lỗi",
-                    "error_message": str(e)
-                })
+    # ================== Core small/medium file ==================
+    def process_dataframe(self, df: pd.DataFrame, variables: int, version: str,
+                          versions: List[str] = None) -> pd.DataFrame:
+        """`versions` (fx799, fx880, ...) replaces 'keylog' with one keylog_<version> column each"""
+        self._start_run(variables, version, versions)
+        row_cache = RowResultCache()
+        # Grouped on the normalized cell text the solver sees (1 / 1.0 / True print differently)
+        needed_len = variables + 1
+        row_codes = row_group_codes(df, self._equation_columns(variables),
+                                    key=lambda cell: self._normalize_equation_cell(cell, needed_len))
+        try:
+            out_rows: List[Dict] = [self._process_row(row, variables, row_cache, int(code))
+                                    for (_, row), code in zip(df.iterrows(), row_codes)]
+        finally:
+            self._close_keylog_cache()
+        self.last_dedup_stats = row_cache.stats()
+        if row_cache.hits:
+            print(row_cache.summary_line())
         return pd.DataFrame(out_rows)
 
-    def process_file(self, input_path: str, variables: int, version: str, output_path: str = "") -> str:
-        df = pd.read_excel(input_path)
-        result_df = self.process_dataframe(df, variables, version)
+    def _default_output_path(self, input_path: str, suffix: str) -> str:
+        """CSV/TSV inputs default to the same delimited format, workbooks to .xlsx"""
+        base, ext = os.path.splitext(input_path)
+        return base + suffix + (ext.lower() if is_delimited_path(input_path) else ".xlsx")
+
+    def process_file(self, input_path: str, variables: int, version: str, output_path: str = "",
+                     versions: List[str] = None) -> str:
+        df = read_table(input_path)
+        compact_string_columns(df, self._equation_columns(variables))
+        result_df = self.process_dataframe(df, variables, version, versions)
         if not output_path:
-            base, ext = os.path.splitext(input_path)
-            output_path = base + "_output.xlsx"
+            output_path = self._default_output_path(input_path, "_output")
+        if is_delimited_path(output_path):
+            return write_dataframe_delimited(result_df, output_path)
         result_df.to_excel(output_path, index=False)
         return output_path
 
     # ================== Large file path ==================
-    def process_file_smart(self, input_path: str, variables: int, version: str, output_path: str = "") -> str:
+    def process_file_smart(self, input_path: str, variables: int, version: str, output_path: str = "",
+                           versions: List[str] = None) -> str:
         """Smart processing: choose standard or chunked based on file size."""
         try:
             size_mb = os.path.getsize(input_path) / (1024 * 1024)
         except Exception:
             size_mb = 0
         if size_mb < self.large_file_mb:
-            return self.process_file(input_path, variables, version, output_path)
-        return self.process_file_chunked(input_path, variables, version, output_path)
+            return self.process_file(input_path, variables, version, output_path, versions)
+        return self.process_file_chunked(input_path, variables, version, output_path, versions)
 
-    def process_file_chunked(self, input_path: str, variables: int, version: str, output_path: str = "") -> str:
+    def process_file_chunked(self, input_path: str, variables: int, version: str, output_path: str = "",
+                             versions: List[str] = None) -> str:
         """Process large Excel by chunks to reduce memory footprint."""
         if not output_path:
-            base, ext = os.path.splitext(input_path)
-            output_path = base + "_large_output.xlsx"
+            output_path = self._default_output_path(input_path, "_large_output")
 
-        # Setup service
-        self.service.set_variables_count(variables)
-        self.service.set_version(version)
+        # Setup service (and the version fan-out, if any)
+        self._start_run(variables, version, versions)
 
-        # Prepare writer (xlsxwriter is generally memory-efficient for writes)
-        writer = pd.ExcelWriter(output_path, engine='xlsxwriter', options={'strings_to_numbers': True})
+        # CSV/TSV output streams row by row; xlsx streams sheet XML straight into the zip
+        delimited_output = is_delimited_path(output_path)
+        writer = None if delimited_output else StreamingXlsxWriter(output_path, strings_to_numbers=True)
+        sheet = None
+        csv_writer = None
         processed = 0
-        first_chunk = True
+        row_cache = RowResultCache()
 
         try:
-            # Use dtype=str to avoid heavy type inference, engine explicit
-            chunk_iter = pd.read_excel(input_path, chunksize=self.chunk_size, engine='openpyxl', dtype=str)
+            # String-valued chunks, streamed from xlsx or csv/tsv
+            chunk_iter = iter_table_chunks(input_path, self.chunk_size)
             for chunk in chunk_iter:
-                out_rows: List[Dict] = []
-                for _, row in chunk.iterrows():
-                    try:
-                        eq_inputs = self._build_inputs_from_row(row, variables)
-                        ok, status, solutions, keylog = self.service.process_complete_workflow(eq_inputs)
-                        out_rows.append({
-                            **row.to_dict(),
-                            "solutions": solutions,
-                            "keylog": keylog if ok else "",
-                            "status": "Thành công" if ok else "Lỗi",
-                            "error_message": "" if ok else status
-                        })
-                    except Exception as e:
-                        out_rows.append({
-                            **row.to_dict(),
-                            "solutions": "",
-                            "keylog": "",
-                            "status": "Lỗi",
-                            "error_message": str(e)
-                        })
+                out_rows: List[Dict] = [self._process_row(row, variables, row_cache) for _, row in chunk.iterrows()]
 
                 result_chunk = pd.DataFrame(out_rows)
-                # Write out incrementally
-                result_chunk.to_excel(writer, sheet_name='Results', startrow=processed if not first_chunk else 0, header=first_chunk, index=False)
+                # Write out incrementally (row 0 is the header, data starts at row 1)
+                if delimited_output:
+                    if csv_writer is None:
+                        csv_writer = DelimitedWriter(output_path, list(result_chunk.columns))
+                    csv_writer.append_many(result_chunk.itertuples(index=False, name=None))
+                else:
+                    if sheet is None:
+                        header = list(result_chunk.columns)
+                        styled = [i for i, name in enumerate(header) if name == 'keylog' or name.startswith('keylog_')]
+                        sheet = writer.create_sheet('Results', styled_columns=styled)
+                        sheet.append(header)
+                    for values in result_chunk.itertuples(index=False, name=None):
+                        sheet.append(values)
                 processed += len(result_chunk)
-                first_chunk = False
 
                 # Cleanup memory between chunks
                 del chunk, out_rows, result_chunk
@@ -150,6 +236,14 @@ class EquationBatchProcessor:
                 if mem_mb > self.memory_warn_mb:
                     warnings.warn(f"High memory usage: {mem_mb:.0f}MB while processing chunks")
         finally:
-            writer.close()
-
+            if writer is not None:
+                writer.save()
+                writer.close()
+            if csv_writer is not None:
+                csv_writer.close()
+            self.last_dedup_stats = row_cache.stats()
+            self._close_keylog_cache()
+
+        if row_cache.hits:
+            print(row_cache.summary_line())
         return output_path
@@ -242,6 +242,20 @@ class EquationService:
             print(f"Lỗi generate final result: {e}")
             return "Lỗi sinh kết quả"
     
+    def final_keylogs_for_versions(self, versions: List[str]) -> List[str]:
+        """Keylog tổng cho từng phiên bản từ hệ số đã mã hóa (chỉ khác prefix, không mã hóa lại)"""
+        if not self.encoded_coefficients or not self.tl_encoding_available:
+            return ["" for _ in versions]
+        keylogs = []
+        try:
+            for version in versions:
+                self.encoding_service.set_version(version)
+                keylogs.append(self.encoding_service.get_final_keylog(self.encoded_coefficients,
+                                                                      self.current_variables))
+        finally:
+            self.encoding_service.set_version(self.current_version)
+        return keylogs
+    
     # -------------------- TEXT UTILS --------------------
     def get_solutions_text(self) -> str:
         """Trả về text nghiệm đã phân loại hoặc fallback"""
@@ -4,5 +4,6 @@
 
 from .excel_processor import ExcelProcessor
 from .large_file_processor import LargeFileProcessor
+from .xlsx_fast_reader import FastXlsxReader
 
-__all__ = ['ExcelProcessor', 'LargeFileProcessor']
\ No newline at end of file
+__all__ = ['ExcelProcessor', 'LargeFileProcessor', 'FastXlsxReader']
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""Adaptive chunk sizing for the large-file pipeline.
+
+Starts with a small chunk, measures rows/sec and RSS growth of every chunk,
+doubles the size while throughput keeps improving and the projected memory
+stays under the budget, then settles on the best size seen. If RSS gets close
+to ``max_memory_mb`` the size is halved immediately. Every decision is kept in
+``history`` (and printed) so defaults can be tuned from real runs.
+"""
+from typing import Any, Dict, List
+
+CHUNK_STEP = 100  # sizes stay multiples of 100 so progress callbacks keep firing
+
+
+class AdaptiveChunkSizer:
+    def __init__(self, max_memory_mb: float, initial_size: int = 500, min_size: int = 100,
+                 max_size: int = 50000, improvement: float = 1.05, memory_headroom: float = 0.5):
+        self.max_memory_mb = max_memory_mb
+        self.min_size = min_size
+        self.max_size = max_size
+        self.improvement = improvement
+        self.memory_headroom = memory_headroom
+        self.size = self._clamp(initial_size)
+        self.best_size = self.size
+        self.best_rate = 0.0
+        self.per_row_mb = 0.0
+        self.phase = 'grow'
+        self.history: List[Dict[str, Any]] = []
+
+    def _clamp(self, size: float) -> int:
+        size = int(size) // CHUNK_STEP * CHUNK_STEP
+        return max(self.min_size, min(self.max_size, size))
+
+    def next_size(self) -> int:
+        return self.size
+
+    def _memory_cap(self, rss_mb: float) -> int:
+        if self.per_row_mb <= 0:
+            return self.max_size
+        available = max(0.0, (self.max_memory_mb - rss_mb) * self.memory_headroom)
+        return self._clamp(available / self.per_row_mb)
+
+    def record(self, rows: int, seconds: float, rss_before_mb: float, rss_after_mb: float) -> int:
+        """Feed one chunk's measurements; returns the size to use for the next chunk"""
+        if rows <= 0:
+            return self.size
+        rate = rows / seconds if seconds > 0 else float('inf')
+        growth_per_row = max(0.0, rss_after_mb - rss_before_mb) / rows
+        self.per_row_mb = max(self.per_row_mb * 0.8, growth_per_row)
+        previous = self.size
+
+        if rss_after_mb > self.max_memory_mb * 0.9:
+            self.size = self._clamp(self.size // 2)
+            self.best_size = min(self.best_size, self.size)
+            self.phase = 'settled'
+            reason = 'memory'
+        elif self.phase == 'grow':
+            if rate > self.best_rate * self.improvement:
+                self.best_rate = rate
+                self.best_size = self.size
+                self.size = min(self._clamp(self.size * 2), self._memory_cap(rss_after_mb))
+                reason = 'faster'
+                if self.size == previous:
+                    self.phase = 'settled'
+                    reason = 'limit'
+            else:
+                self.size = self.best_size
+                self.phase = 'settled'
+                reason = 'converged'
+        else:
+            self.size = min(self.size, self._memory_cap(rss_after_mb))
+            reason = 'steady'
+
+        self.history.append({
+            'chunk': len(self.history) + 1,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_sec': rate,
+            'rss_mb': rss_after_mb,
+            'rss_delta_mb': rss_after_mb - rss_before_mb,
+            'next_size': self.size,
+            'reason': reason,
+        })
+        if self.size != previous or reason == 'converged':
+            print(f"📐 Chunk size {previous:,} → {self.size:,} ({reason}: {rate:,.0f} rows/sec, "
+                  f"RSS {rss_after_mb:.0f}MB, {rss_after_mb - rss_before_mb:+.1f}MB)")
+        return self.size
+
+    def summary(self) -> Dict[str, Any]:
+        sizes = [entry['rows'] for entry in self.history]
+        return {
+            'phase': self.phase,
+            'current_size': self.size,
+            'best_size': self.best_size,
+            'best_rows_per_sec': self.best_rate,
+            'chunks': len(self.history),
+            'sizes_used': sorted(set(sizes)),
+            'history': list(self.history),
+        }
@@ -0,0 +1,170 @@
+"""Arrow IPC sidecar cache of parsed xlsx inputs.
+
+The first run streams the sheet once (FastXlsxReader / DelimitedReader) and tees every chunk
+into ``<file>.<sheet-key>.<content-hash>.arrow`` next to the workbook. Later runs with the
+same file content memory-map the sidecar and read only the requested columns,
+skipping the xlsx parse entirely. All values are stored as strings, exactly as
+the streaming readers return them. A rebuild replaces only the older sidecars
+of the same sheet; other sheets of the workbook keep theirs.
+
+pyarrow is optional: without it the cache reports itself unavailable and the
+pipeline keeps parsing the workbook.
+"""
+import os
+import glob
+import hashlib
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .csv_io import open_tabular_reader
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+    pa_ipc = None
+
+HASH_CHUNK_BYTES = 4 << 20
+SIDECAR_SUFFIX = ".arrow"
+
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_hash_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    return pa is not None
+
+
+def content_hash(file_path: str) -> str:
+    """blake2b of the file bytes; memoized per (path, size, mtime) within the process"""
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    key = (abs_path, stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        if key in _hash_memo:
+            return _hash_memo[key]
+    digest = hashlib.blake2b(digest_size=16)
+    with open(abs_path, 'rb') as handle:
+        for block in iter(lambda: handle.read(HASH_CHUNK_BYTES), b""):
+            digest.update(block)
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_memo[key] = value
+    return value
+
+
+def _unique_header(header) -> List[str]:
+    names = []
+    for i, cell in enumerate(header):
+        name = cell if cell else f"Col_{i}"
+        if name in names:
+            name = f"{name}_{i}"
+        names.append(name)
+    return names
+
+
+class ColumnarInputCache:
+    """Sidecar next to the workbook (or in cache_dir), keyed by content hash + sheet name"""
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir
+        self.last_event = None  # 'hit' / 'build' / None
+
+    @staticmethod
+    def _sheet_key(sheet_name: str = None) -> str:
+        """Filename-safe key per sheet ('first' = the reader's default sheet)"""
+        if not sheet_name:
+            return "first"
+        return hashlib.blake2b(sheet_name.encode('utf-8'), digest_size=6).hexdigest()
+
+    def _sidecar_prefix(self, file_path: str, sheet_name: str = None) -> str:
+        directory = self.cache_dir or os.path.dirname(os.path.abspath(file_path))
+        return os.path.join(directory, f"{os.path.basename(file_path)}.{self._sheet_key(sheet_name)}.")
+
+    def sidecar_path(self, file_path: str, sheet_name: str = None) -> str:
+        return f"{self._sidecar_prefix(file_path, sheet_name)}{content_hash(file_path)}{SIDECAR_SUFFIX}"
+
+    def has_sidecar(self, file_path: str, sheet_name: str = None) -> bool:
+        return is_available() and os.path.exists(self.sidecar_path(file_path, sheet_name))
+
+    def _remove_stale(self, file_path: str, sheet_name: str, keep: str):
+        """Drop sidecars of the same (file, sheet) built from older content"""
+        prefix = self._sidecar_prefix(file_path, sheet_name)
+        for path in glob.glob(f"{glob.escape(prefix)}*{SIDECAR_SUFFIX}"):
+            # only '<prefix><hash>.arrow' - not another workbook whose name extends the prefix
+            if path != keep and '.' not in path[len(prefix):-len(SIDECAR_SUFFIX)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # ---------- read ----------
+    def read_columns(self, file_path: str, columns: List[str] = None, sheet_name: str = None) -> "pa.Table":
+        """Memory-mapped read of the sidecar, projected to `columns` (missing names are ignored)"""
+        with pa.memory_map(self.sidecar_path(file_path, sheet_name), 'r') as source:
+            table = pa_ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select([name for name in columns if name in table.column_names])
+        return table
+
+    def iter_chunks(self, file_path: str, chunksize: int, columns: List[str] = None,
+                    sheet_name: str = None) -> Iterator[pd.DataFrame]:
+        table = self.read_columns(file_path, columns, sheet_name)
+        self.last_event = 'hit'
+        for offset in range(0, table.num_rows, chunksize):
+            yield table.slice(offset, chunksize).to_pandas()
+
+    # ---------- build ----------
+    def build_chunks(self, file_path: str, chunksize: int, columns: List[str] = None,
+                     sheet_name: str = None) -> Iterator[pd.DataFrame]:
+        """
+        Parse the workbook once, writing every column to the sidecar while yielding
+        (projected) chunks to the caller. The sidecar only appears after a complete pass.
+        """
+        target = self.sidecar_path(file_path, sheet_name)
+        temp_path = f"{target}.tmp{os.getpid()}"
+        self.last_event = 'build'
+        completed = False
+        with open_tabular_reader(file_path, sheet_name) as reader:
+            header = _unique_header(reader.read_header())
+            width = len(header)
+            schema = pa.schema([(name, pa.string()) for name in header])
+            projection = header if columns is None else [name for name in columns if name in header]
+            writer = pa_ipc.new_file(temp_path, schema)
+            try:
+                chunk_data = []
+                for row in reader.iter_rows(min_row=2):
+                    values = list(row[:width])
+                    if len(values) < width:
+                        values += [""] * (width - len(values))
+                    chunk_data.append(values)
+                    if len(chunk_data) >= chunksize:
+                        yield self._write_batch(writer, schema, chunk_data)[projection]
+                        chunk_data = []
+                if chunk_data:
+                    yield self._write_batch(writer, schema, chunk_data)[projection]
+                completed = True
+            finally:
+                writer.close()
+                if completed:
+                    os.replace(temp_path, target)
+                    self._remove_stale(file_path, sheet_name, keep=target)
+                elif os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    @staticmethod
+    def _write_batch(writer, schema, chunk_data: List[list]) -> pd.DataFrame:
+        frame = pd.DataFrame(chunk_data, columns=schema.names)
+        writer.write_batch(pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False))
+        return frame
+
+    def iter_cached(self, file_path: str, chunksize: int, columns: List[str] = None,
+                    sheet_name: str = None) -> Iterator[pd.DataFrame]:
+        """Read from the sidecar when present, otherwise build it during this pass"""
+        if self.has_sidecar(file_path, sheet_name):
+            yield from self.iter_chunks(file_path, chunksize, columns, sheet_name)
+        else:
+            yield from self.build_chunks(file_path, chunksize, columns, sheet_name)
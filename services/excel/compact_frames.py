@@ -0,0 +1,91 @@
+"""Compact in-memory storage for the DataFrame (normal-file) paths.
+
+Input sheets are mostly strings and coordinate columns repeat a handful of
+values, so a column of Python ``str`` objects wastes most of its memory.
+``compact_string_columns`` converts low-cardinality string columns to
+``category`` (int codes + one copy of each distinct value) and the rest to
+Arrow-backed strings when pyarrow is available. Mixed / numeric columns are
+left alone so values the encoders see do not change.
+
+``row_group_codes`` turns the category codes of the input columns into one
+integer per row, equal for rows with identical inputs: encoders key their
+result caches on it instead of hashing string tuples, and compute each
+distinct input combination once. Passing ``key`` groups on the text an
+encoder actually sees (values equal in Python such as 1 / 1.0 / True or
+0.0 / -0.0 print differently and must not share a result).
+"""
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRING = "string[pyarrow]"
+except ImportError:
+    ARROW_STRING = None
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    if not (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)):
+        return False
+    return pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty")
+
+
+def compact_string_columns(df: pd.DataFrame, columns: Sequence[str] = None,
+                           max_unique_ratio: float = 0.5) -> Dict[str, Any]:
+    """
+    Convert string columns of `df` in place: ``category`` when distinct/rows <= max_unique_ratio,
+    Arrow strings otherwise. Returns memory before/after (MB) and the converted column names.
+    """
+    before = df.memory_usage(deep=True).sum()
+    categorical: List[str] = []
+    arrow: List[str] = []
+    rows = max(len(df), 1)
+    for name in (columns if columns is not None else list(df.columns)):
+        if name not in df.columns or not _is_string_column(df[name]):
+            continue
+        series = df[name]
+        if series.nunique(dropna=True) / rows <= max_unique_ratio:
+            df[name] = series.astype("category")
+            categorical.append(name)
+        elif ARROW_STRING is not None and series.dtype != ARROW_STRING:
+            df[name] = series.astype(ARROW_STRING)
+            arrow.append(name)
+    after = df.memory_usage(deep=True).sum()
+    return {
+        'before_mb': float(before) / (1024 * 1024),
+        'after_mb': float(after) / (1024 * 1024),
+        'categorical_columns': categorical,
+        'arrow_columns': arrow,
+    }
+
+
+def row_group_codes(df: pd.DataFrame, columns: Sequence[str],
+                    key: Callable[[Any], str] = None) -> np.ndarray:
+    """
+    One int per row, identical for rows whose `columns` hold identical values (missing == missing),
+    or identical key(value) when `key` is given
+    """
+    present = [name for name in columns if name in df.columns]
+    if not present or df.empty:
+        return np.zeros(len(df), dtype=np.int64)
+    codes = {}
+    for name in present:
+        series = df[name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            category_codes = series.cat.codes.to_numpy()
+            if key is not None:
+                # Key each category once; missing (-1, read back as NaN) takes the last slot
+                keyed = [key(value) for value in series.cat.categories] + [key(np.nan)]
+                category_codes = pd.factorize(pd.Series(keyed, dtype=object))[0][category_codes]
+            codes[name] = category_codes
+        elif key is not None:
+            codes[name] = pd.factorize(pd.Series([key(value) for value in series], dtype=object))[0]
+        else:
+            codes[name] = pd.factorize(series, use_na_sentinel=True)[0]
+    if len(present) == 1:
+        return codes[present[0]].astype(np.int64)
+    return pd.DataFrame(codes).groupby(present, sort=False, dropna=False).ngroup().to_numpy()
@@ -0,0 +1,154 @@
+"""CSV / TSV fast path for batch inputs and outputs.
+
+``DelimitedReader`` has the same surface as ``FastXlsxReader`` (read_header,
+iter_rows with column projection, context manager) so the streaming pipeline
+can switch on the file extension only. Values are kept as strings, exactly
+like the xlsx readers return them; blank cells are "".
+
+Files are read as UTF-8 with an optional BOM and written as UTF-8 with a BOM,
+so Excel opens Vietnamese text correctly when a user double-clicks the output.
+"""
+import os
+import csv
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+DELIMITERS: Dict[str, str] = {'.csv': ',', '.tsv': '\t'}
+READ_ENCODING = 'utf-8-sig'
+WRITE_ENCODING = 'utf-8-sig'
+
+
+def is_delimited_path(file_path: str) -> bool:
+    return os.path.splitext(str(file_path))[1].lower() in DELIMITERS
+
+
+def delimiter_for(file_path: str) -> str:
+    return DELIMITERS.get(os.path.splitext(str(file_path))[1].lower(), ',')
+
+
+class DelimitedReader:
+    """Streaming CSV/TSV reader with the FastXlsxReader row interface"""
+
+    def __init__(self, file_path: str, sheet_name: str = None):
+        self.file_path = file_path
+        self.delimiter = delimiter_for(file_path)
+        # One table per file; the stem stands in for the sheet name in logs/stats
+        self.sheet_name = sheet_name or os.path.splitext(os.path.basename(file_path))[0]
+
+    def get_sheet_names(self) -> List[str]:
+        return [self.sheet_name]
+
+    def iter_rows(self, columns: Sequence[int] = None, min_row: int = 1,
+                  max_row: int = None) -> Iterator[Tuple[str, ...]]:
+        with open(self.file_path, 'r', encoding=READ_ENCODING, newline='') as handle:
+            for row_number, row in enumerate(csv.reader(handle, delimiter=self.delimiter), start=1):
+                if max_row is not None and row_number > max_row:
+                    break
+                if row_number < min_row:
+                    continue
+                if columns is None:
+                    yield tuple(row)
+                else:
+                    yield tuple(row[i] if 0 <= i < len(row) else "" for i in columns)
+
+    def read_header(self) -> Tuple[str, ...]:
+        return next(self.iter_rows(max_row=1), ())
+
+    def count_rows(self) -> int:
+        """Number of records including the header (quoted multi-line values count once)"""
+        return sum(1 for _ in self.iter_rows())
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_tabular_reader(file_path: str, sheet_name: str = None):
+    """DelimitedReader for .csv/.tsv, FastXlsxReader otherwise"""
+    if is_delimited_path(file_path):
+        return DelimitedReader(file_path, sheet_name)
+    from .xlsx_fast_reader import FastXlsxReader
+    return FastXlsxReader(file_path, sheet_name)
+
+
+def read_delimited(file_path: str) -> pd.DataFrame:
+    """Whole-file read (small/medium inputs); every value stays a string"""
+    return pd.read_csv(file_path, sep=delimiter_for(file_path), dtype=str,
+                       keep_default_na=False, encoding=READ_ENCODING)
+
+
+def iter_delimited_chunks(file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    return pd.read_csv(file_path, sep=delimiter_for(file_path), dtype=str, keep_default_na=False,
+                       encoding=READ_ENCODING, chunksize=chunksize)
+
+
+def iter_table_chunks(file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """String-valued DataFrame chunks from any supported input (.xlsx streamed, .csv/.tsv via pandas)"""
+    if is_delimited_path(file_path):
+        yield from iter_delimited_chunks(file_path, chunksize)
+        return
+    with open_tabular_reader(file_path) as reader:
+        header = [cell if cell else f"Col_{i}" for i, cell in enumerate(reader.read_header())]
+        width = len(header)
+        chunk_data = []
+        for row in reader.iter_rows(min_row=2):
+            values = list(row[:width])
+            if len(values) < width:
+                values += [""] * (width - len(values))
+            chunk_data.append(values)
+            if len(chunk_data) >= chunksize:
+                yield pd.DataFrame(chunk_data, columns=header)
+                chunk_data = []
+        if chunk_data:
+            yield pd.DataFrame(chunk_data, columns=header)
+
+
+def read_table(file_path: str, **excel_kwargs) -> pd.DataFrame:
+    """pd.read_excel for workbooks, read_delimited for .csv/.tsv"""
+    if is_delimited_path(file_path):
+        return read_delimited(file_path)
+    return pd.read_excel(file_path, **excel_kwargs)
+
+
+def write_dataframe_delimited(df: pd.DataFrame, output_path: str) -> str:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    df.to_csv(output_path, sep=delimiter_for(output_path), index=False, encoding=WRITE_ENCODING)
+    return output_path
+
+
+class DelimitedWriter:
+    """Row-at-a-time CSV/TSV writer; header written on open"""
+
+    def __init__(self, output_path: str, header: Sequence[str]):
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        self.output_path = output_path
+        self.rows_written = 0
+        self._handle = open(output_path, 'w', encoding=WRITE_ENCODING, newline='')
+        self._writer = csv.writer(self._handle, delimiter=delimiter_for(output_path))
+        self._writer.writerow(["" if h is None else str(h) for h in header])
+
+    def append(self, values: Sequence[str]):
+        self._writer.writerow(values)
+        self.rows_written += 1
+
+    def append_many(self, rows):
+        for values in rows:
+            self.append(values)
+
+    def close(self) -> List[str]:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        return [self.output_path]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -2,12 +2,23 @@ import pandas as pd
 import json
 import os
 import openpyxl
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Sequence
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, PatternFill
+import xlsxwriter
 import re
 from datetime import datetime
 from .large_file_processor import LargeFileProcessor
+from .file_probe import probe_xlsx
+from .csv_io import read_table, is_delimited_path, write_dataframe_delimited, open_tabular_reader
+from .compact_frames import compact_string_columns
+from .data_validation import DataQualityReport
+from .file_preview import preview_file, PREVIEW_ROWS
+from .output_styles import ColumnWidthSampler
+
+# Result workbooks: rows stream to disk in order; no automatic hyperlinks (as openpyxl wrote them)
+RESULTS_WORKBOOK_OPTIONS = {'constant_memory': True, 'strings_to_urls': False}
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
 
 class ExcelProcessor:
     """Excel Processor for ConvertKeylogApp - Enhanced with large file support"""
@@ -18,6 +29,9 @@ class ExcelProcessor:
         self.large_file_processor = LargeFileProcessor(config)  # NEW: Large file handler
         self.large_file_threshold_mb = 20  # Files > 20MB use large file processor
         self.large_file_threshold_rows = 50000  # Files > 50k rows use large file processor
+        # category / Arrow string dtypes for loaded input columns (see compact_frames)
+        self.compact_frames = bool(self.config.get('compact_frames', True))
+        self.last_frame_stats: Dict[str, Any] = {}
     
     def _load_mapping(self) -> Dict:
         """Load Excel mapping configuration from config or fallback"""
@@ -124,14 +138,10 @@ class ExcelProcessor:
     def is_large_file(self, file_path: str) -> Tuple[bool, Dict[str, Any]]:
         """Check if file is too large for normal processing"""
         try:
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            
-            # Quick row count estimation using openpyxl
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path, read_only=True)
-            ws = wb.active
-            estimated_rows = ws.max_row - 1 if hasattr(ws, 'max_row') else 0
-            wb.close()
+            # Quick row count from <dimension> (cached by path/size/mtime)
+            probe = probe_xlsx(file_path)
+            file_size_mb = probe['file_size_mb']
+            estimated_rows = probe['estimated_rows']
             
             is_large = (file_size_mb > self.large_file_threshold_mb or 
                        estimated_rows > self.large_file_threshold_rows)
@@ -160,9 +170,14 @@ class ExcelProcessor:
                     f"Vui lòng sử dụng chế độ xử lý file lớn."
                 )
             
-            df = pd.read_excel(file_path)
+            df = read_table(file_path)
             # Normalize column names (remove extra spaces)
             df.columns = df.columns.str.strip()
+            if self.compact_frames:
+                self.last_frame_stats = compact_string_columns(df)
+                print(f"🗜️ Frame memory: {self.last_frame_stats['before_mb']:.1f}MB → "
+                      f"{self.last_frame_stats['after_mb']:.1f}MB "
+                      f"({len(self.last_frame_stats['categorical_columns'])} category columns)")
             return df
         except Exception as e:
             raise Exception(f"Không thể đọc file Excel: {str(e)}")
@@ -187,10 +202,23 @@ class ExcelProcessor:
 
         return len(missing_columns) == 0, missing_columns
     
+    def input_columns(self, shape_a: str, shape_b: str = None) -> List[str]:
+        """Excel columns the encoders read for the selected shapes (group A then B)"""
+        columns = list(self.mapping['group_a_mapping'].get(shape_a, {}).get('required_columns', []))
+        if shape_b:
+            columns += self.mapping['group_b_mapping'].get(shape_b, {}).get('required_columns', [])
+        return columns
+    
     def validate_large_file_structure(self, file_path: str, shape_a: str, shape_b: str = None) -> Dict[str, Any]:
         """Validate large file structure without loading entire file"""
         return self.large_file_processor.validate_large_file_structure(file_path, shape_a, shape_b)
     
+    def shape_fields(self, shape_type: str, group: str) -> Dict[str, str]:
+        """Shape field -> Excel column for one group (fields without a column are left out)"""
+        mapping = self.mapping['group_a_mapping' if group == 'A' else 'group_b_mapping'].get(shape_type, {})
+        return {field: config.get('excel_column') for field, config in mapping.get('columns', {}).items()
+                if config.get('excel_column')}
+    
     def extract_shape_data(self, row: pd.Series, shape_type: str, group: str) -> Dict:
         """Extract data for specific shape from Excel row"""
         if group == 'A':
@@ -246,119 +274,117 @@ class ExcelProcessor:
             else:
                 result_df['Kết quả mã hóa'] = encoded_results
 
+            # CSV/TSV output: plain values, no formatting pass
+            if is_delimited_path(output_path):
+                return write_dataframe_delimited(result_df, output_path)
+
             # Ensure directory exists
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-            # Export with formatting
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                result_df.to_excel(writer, index=False, sheet_name='Results')
-
-                # Format the worksheet
-                worksheet = writer.sheets['Results']
-                self._format_results_worksheet(worksheet, result_df, keylog_column)
+            # Export with formatting (fonts are column formats set before the rows are written)
+            with xlsxwriter.Workbook(output_path, RESULTS_WORKBOOK_OPTIONS) as workbook:
+                self._write_results_sheet(workbook, 'Results', result_df,
+                                          self._keylog_column_indexes(result_df, keylog_column))
 
             return output_path
 
         except Exception as e:
             raise Exception(f"Không thể xuất file kết quả: {str(e)}")
     
-    def _format_results_worksheet(self, worksheet, df, keylog_column=None):
-        """Format Excel worksheet with colors and fonts"""
+    def export_keylog_columns(self, original_df: pd.DataFrame, columns: Dict[str, Sequence[str]],
+                              output_path: str) -> str:
+        """Export with several result columns (operation fan-out), each formatted like the keylog column"""
         try:
-            # Header formatting
-            header_font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-            header_fill = PatternFill(start_color='2E86AB', end_color='2E86AB', fill_type='solid')
+            result_df = original_df.copy()
+            for name, values in columns.items():
+                result_df[name] = list(values)
 
-            # Data formatting
-            data_font = Font(name='Arial', size=10)
-            result_font = Font(name='Arial', size=10, bold=True, color='2E7D32')
+            if is_delimited_path(output_path):
+                return write_dataframe_delimited(result_df, output_path)
 
-            # Apply header formatting
-            for col in range(1, len(df.columns) + 1):
-                cell = worksheet.cell(row=1, column=col)
-                cell.font = header_font
-                cell.fill = header_fill
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with xlsxwriter.Workbook(output_path, RESULTS_WORKBOOK_OPTIONS) as workbook:
+                self._write_results_sheet(workbook, 'Results', result_df,
+                                          self._keylog_column_indexes(result_df, keylog_columns=list(columns)))
+            return output_path
 
-            # Find keylog column index
-            keylog_col_name = keylog_column if keylog_column else 'Kết quả mã hóa'
-            keylog_col_idx = None
-            for idx, col_name in enumerate(df.columns):
-                if keylog_col_name in str(col_name):
-                    keylog_col_idx = idx
-                    break
+        except Exception as e:
+            raise Exception(f"Không thể xuất file kết quả: {str(e)}")
 
-            # Apply data formatting - limit to first 10k rows for performance
-            max_format_rows = min(len(df) + 2, 10000)
-            for row in range(2, max_format_rows):
-                for col in range(1, len(df.columns) + 1):
-                    cell = worksheet.cell(row=row, column=col)
-                    
-                    # Special formatting for result column
-                    if keylog_col_idx is not None and col == keylog_col_idx + 1:
-                        cell.font = result_font
-                    else:
-                        cell.font = data_font
+    @staticmethod
+    def _keylog_column_indexes(df, keylog_column=None, keylog_columns=None) -> List[int]:
+        """Result column index(es): `keylog_columns` (exact names) or the single keylog / 'Kết quả mã hóa' one"""
+        if keylog_columns:
+            return [idx for idx, col_name in enumerate(df.columns) if col_name in keylog_columns]
+        keylog_col_name = keylog_column if keylog_column else 'Kết quả mã hóa'
+        return [idx for idx, col_name in enumerate(df.columns) if keylog_col_name in str(col_name)][:1]
 
-            # Auto-adjust column widths - limited for performance
-            for col_idx, column in enumerate(worksheet.columns):
-                if col_idx > 20:  # Limit to first 20 columns
-                    break
-                    
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
+    def _write_results_sheet(self, workbook, sheet_name: str, df: pd.DataFrame, keylog_col_idxs=()):
+        """Write `df` to a new sheet of an xlsxwriter workbook with the results formatting.
+        Fonts are column formats (set_column) that every unformatted cell picks up as it is
+        written, so formatting costs O(columns); widths come from the first 100 rows."""
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({'font_name': 'Arial', 'font_size': 12, 'bold': True,
+                                             'font_color': '#FFFFFF', 'bg_color': '#2E86AB'})
+        data_font = {'font_name': 'Arial', 'font_size': 10}
+        keylog_font = {**data_font, 'bold': True, 'font_color': '#2E7D32'}
+        formats = {}
 
-                # Check only first 100 rows for performance
-                for i, cell in enumerate(column):
-                    if i > 100:
-                        break
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
+        sampler = ColumnWidthSampler(df.columns, sample_rows=100, cap=48, min_width=0)
+        for values in df.head(sampler.remaining).itertuples(index=False, name=None):
+            sampler.observe(values)
+        widths = sampler.widths()
 
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+        for idx, col_name in enumerate(df.columns):
+            font = keylog_font if idx in keylog_col_idxs else data_font
+            # Datetime columns keep a date display (the cells carry no format of their own)
+            number_format = DATETIME_FORMAT if pd.api.types.is_datetime64_any_dtype(df[col_name]) else None
+            key = (idx in keylog_col_idxs, number_format)
+            if key not in formats:
+                formats[key] = workbook.add_format({**font, 'num_format': number_format} if number_format else font)
+            worksheet.set_column(idx, idx, widths[idx] if idx < 21 else None, formats[key])
+
+        worksheet.write_row(0, 0, [str(col_name) for col_name in df.columns], header_format)
+        # Missing cells (NaN / NaT / pd.NA) are left empty
+        frame = df.astype(object).where(df.notna(), None)
+        for row_idx, values in enumerate(frame.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_idx, 0, values)
+        return worksheet
 
-        except Exception as e:
-            print(f"Warning: Could not format worksheet: {e}")
-    
     def get_total_rows(self, file_path: str) -> int:
         """Get total number of rows in Excel file - optimized for large files"""
         try:
-            # For potentially large files, use openpyxl for efficiency
+            # For potentially large files, avoid loading the workbook
             file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
             
-            if file_size_mb > 10:  # Large file - use openpyxl
-                import openpyxl
-                wb = openpyxl.load_workbook(file_path, read_only=True)
-                ws = wb.active
-                total_rows = ws.max_row - 1 if hasattr(ws, 'max_row') else 0
-                wb.close()
-                return total_rows
+            if file_size_mb > 10:  # Large file - probe sheet XML only
+                return probe_xlsx(file_path)['estimated_rows']
             else:
                 # Small file - use pandas
-                df = pd.read_excel(file_path)
+                df = read_table(file_path)
                 return len(df)
         except Exception:
             return 0
     
-    def read_excel_data_chunked(self, file_path: str, chunksize: int = 1000):
-        """Read Excel data in chunks - Enhanced for large files"""
+    def read_excel_data_chunked(self, file_path: str, chunksize: int = 1000, df: pd.DataFrame = None):
+        """
+        Read Excel data in chunks - Enhanced for large files.
+        Pass an already loaded `df` to chunk it without parsing the workbook again.
+        """
         try:
-            # Check if we need large file processing
-            is_large, file_info = self.is_large_file(file_path)
-            
-            if is_large:
-                # Use streaming processor for very large files
-                print(f"🔥 Large file detected - using streaming processor")
-                return self.large_file_processor.read_excel_streaming(file_path, chunksize)
-            else:
-                # Use pandas chunking for smaller files
-                df = pd.read_excel(file_path)
-                # Yield chunks
-                for i in range(0, len(df), chunksize):
-                    yield df.iloc[i:i + chunksize]
+            if df is None:
+                # Check if we need large file processing
+                is_large, file_info = self.is_large_file(file_path)
+                if is_large:
+                    # Use streaming processor for very large files
+                    print(f"🔥 Large file detected - using streaming processor")
+                    yield from self.large_file_processor.read_excel_streaming_single_workbook(file_path, chunksize)
+                    return
+                # Smaller files: one parse, then slice
+                df = read_table(file_path)
+                df.columns = df.columns.str.strip()
+            for i in range(0, len(df), chunksize):
+                yield df.iloc[i:i + chunksize]
         except Exception as e:
             raise Exception(f"Không thể đọc file Excel theo chunk: {str(e)}")
     
@@ -372,44 +398,45 @@ class ExcelProcessor:
                 # Use openpyxl for large file info
                 return self._get_large_file_info(file_path, large_file_info)
             else:
-                # Use pandas for normal files
-                df = self.read_excel_data(file_path)
-                file_name = os.path.basename(file_path)
-
+                # Header + first rows only; the row count comes from the size probe
+                preview = preview_file(file_path, rows=3)
+                columns = preview['columns']
                 return {
-                    'file_name': file_name,
-                    'total_rows': len(df),
-                    'total_columns': len(df.columns),
-                    'columns': list(df.columns),
+                    'file_name': preview['file_name'],
+                    'total_rows': large_file_info.get('estimated_rows', preview['estimated_rows']),
+                    'total_columns': len(columns),
+                    'columns': columns,
                     'file_size': os.path.getsize(file_path),
-                    'file_size_mb': os.path.getsize(file_path) / (1024 * 1024),
+                    'file_size_mb': preview['file_size_mb'],
                     'is_large_file': False,
-                    'first_few_rows': df.head(3).to_dict('records') if len(df) > 0 else []
+                    'first_few_rows': [dict(zip(columns, row)) for row in preview['rows']]
                 }
         except Exception as e:
             raise Exception(f"Không thể đọc thông tin file: {str(e)}")
     
+    def preview_file(self, file_path: str, rows: int = PREVIEW_ROWS) -> Dict[str, Any]:
+        """First rows + row estimate + shapes whose columns are all present (bounded time, any file size)"""
+        preview = preview_file(file_path, rows)
+        columns = set(preview['columns'])
+        preview['detected_mapping'] = {
+            group: [shape for shape, config in self.mapping[f'group_{group.lower()}_mapping'].items()
+                    if config.get('required_columns') and columns.issuperset(config['required_columns'])]
+            for group in ('A', 'B')
+        }
+        return preview
+    
     def _get_large_file_info(self, file_path: str, large_file_info: Dict) -> Dict[str, Any]:
         """Get file info for large files without loading data"""
         try:
-            import openpyxl
-            
-            wb = openpyxl.load_workbook(file_path, read_only=True)
-            ws = wb.active
-            
-            # Get header
-            header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
-            columns = [str(cell) for cell in header_row if cell is not None]
-            
-            # Get sample rows (first 3 data rows)
-            sample_rows = []
-            for i, row in enumerate(ws.iter_rows(min_row=2, max_row=5, values_only=True)):
-                if i >= 3:
-                    break
-                row_dict = {col: str(cell) if cell is not None else "" for col, cell in zip(columns, row)}
-                sample_rows.append(row_dict)
-            
-            wb.close()
+            with open_tabular_reader(file_path) as reader:
+                # Get header
+                columns = [cell for cell in reader.read_header() if cell]
+                
+                # Get sample rows (first 3 data rows)
+                sample_rows = []
+                for row in reader.iter_rows(min_row=2, max_row=4):
+                    row_dict = {col: (row[i] if i < len(row) else "") for i, col in enumerate(columns)}
+                    sample_rows.append(row_dict)
             
             return {
                 'file_name': os.path.basename(file_path),
@@ -525,64 +552,33 @@ class ExcelProcessor:
             print(f"Warning: Could not format template: {e}")
     
     def validate_data_quality(self, df: pd.DataFrame, shape_a: str, shape_b: str = None) -> Dict[str, Any]:
-        """Validate data quality in Excel file - optimized for large files"""
-        # For large DataFrames, limit validation to first 1000 rows
-        sample_size = min(1000, len(df))
-        sample_df = df.head(sample_size) if len(df) > 1000 else df
-        
-        quality_info = {
-            'valid': True,
-            'total_rows': len(df),
-            'sample_size': sample_size,
-            'rows_with_data': 0,
-            'rows_with_errors': 0,
-            'missing_columns': [],
-            'data_issues': [],
-            'is_sample_validation': len(df) > 1000
-        }
-        
+        """Validate data quality of every row with vectorized column checks (see DataQualityReport)"""
         # Check structure first
         is_valid, missing_cols = self.validate_excel_structure(df, shape_a, shape_b)
         if not is_valid:
-            quality_info['valid'] = False
-            quality_info['missing_columns'] = missing_cols
-            return quality_info
-        
-        # Check sample rows for data quality
-        for row_index in range(len(sample_df)):
-            row = sample_df.iloc[row_index]
-            has_data = False
-            row_issues = []
-            
-            # Check Group A data
-            data_a = self.extract_shape_data(row, shape_a, 'A')
-            if any(str(v).strip() for v in data_a.values()):
-                has_data = True
-                # Validate shape-specific data
-                shape_issues = self._validate_shape_data(data_a, shape_a, f"Nhóm A")
-                row_issues.extend(shape_issues)
-            
-            # Check Group B data if needed
-            if shape_b:
-                data_b = self.extract_shape_data(row, shape_b, 'B')
-                if any(str(v).strip() for v in data_b.values()):
-                    has_data = True
-                    shape_issues = self._validate_shape_data(data_b, shape_b, f"Nhóm B")
-                    row_issues.extend(shape_issues)
-            
-            if has_data:
-                quality_info['rows_with_data'] += 1
-            
-            if row_issues:
-                quality_info['rows_with_errors'] += 1
-                # Only store first 10 error samples to avoid memory issues
-                if len(quality_info['data_issues']) < 10:
-                    quality_info['data_issues'].append({
-                        'row': row_index + 2,  # +2 for Excel row number (1-indexed + header)
-                        'issues': row_issues[:3]  # Limit to first 3 issues per row
-                    })
-        
-        return quality_info
+            return {
+                'valid': False,
+                'total_rows': len(df),
+                'sample_size': 0,
+                'rows_with_data': 0,
+                'rows_with_errors': 0,
+                'missing_columns': missing_cols,
+                'data_issues': [],
+                'is_sample_validation': False
+            }
+
+        report = self.data_quality_report(shape_a, shape_b)
+        report.add_chunk(df, first_excel_row=2)  # +2 for Excel row number (1-indexed + header)
+        return report.to_dict()
+
+    def data_quality_report(self, shape_a: str, shape_b: str = None) -> DataQualityReport:
+        """Empty report wired to this processor's column mapping"""
+        return DataQualityReport(shape_a, self.shape_fields(shape_a, 'A'),
+                                 shape_b, self.shape_fields(shape_b, 'B') if shape_b else None)
+
+    def validate_large_file_data(self, file_path: str, shape_a: str, shape_b: str = None) -> Dict[str, Any]:
+        """Full-file data quality check streamed in chunks (no whole-file DataFrame)"""
+        return self.large_file_processor.validate_large_file_data(file_path, shape_a, shape_b)
     
     def _validate_shape_data(self, data: Dict, shape: str, group_name: str) -> List[str]:
         """Validate data for specific shape - simplified for performance"""
@@ -0,0 +1,59 @@
+"""Bounded-latency file preview for the import buttons.
+
+``preview_file`` streams only the beginning of the sheet (FastXlsxReader /
+DelimitedReader stop after the requested rows) and estimates the row count
+from ``<dimension>`` or the first bytes of the sheet (``quick_row_estimate``),
+so its cost does not grow with the file. Modes add their own mapping
+detection on top (``detected_mapping``).
+"""
+import os
+import time
+from typing import Any, Dict
+
+from .csv_io import open_tabular_reader
+from .file_probe import quick_row_estimate
+
+PREVIEW_ROWS = 5
+
+
+def preview_file(file_path: str, rows: int = PREVIEW_ROWS, sheet_name: str = None) -> Dict[str, Any]:
+    """
+    Header (stripped), first `rows` data rows (tuples of strings padded to the header width),
+    estimated data rows + source, keylog column index (or None) and timing.
+    """
+    start = time.perf_counter()
+    try:
+        with open_tabular_reader(file_path, sheet_name) as reader:
+            sheet_names = reader.get_sheet_names()
+            resolved_sheet = reader.sheet_name
+            header = [str(cell).strip() for cell in reader.read_header()]
+            while header and not header[-1]:
+                header.pop()
+            width = len(header)
+            sample = []
+            for row in reader.iter_rows(min_row=2, max_row=rows + 1):
+                values = tuple(row[:width])
+                sample.append(values + ("",) * (width - len(values)))
+        estimated_rows, estimate_source = quick_row_estimate(file_path, resolved_sheet)
+    except Exception as e:
+        raise Exception(f"Không thể xem trước file: {str(e)}")
+    keylog_index = next((i for i, name in enumerate(header) if name.lower() == 'keylog'), None)
+    return {
+        'file_name': os.path.basename(file_path),
+        'file_size_mb': os.path.getsize(file_path) / (1024 * 1024),
+        'sheet_name': resolved_sheet,
+        'sheet_names': list(sheet_names),
+        'columns': header,
+        'rows': sample,
+        'estimated_rows': estimated_rows,
+        'row_estimate_source': estimate_source,
+        'keylog_column': keylog_index,
+        'preview_seconds': time.perf_counter() - start,
+    }
+
+
+def preview_summary(preview: Dict[str, Any]) -> str:
+    """One-line status text for the views"""
+    approx = "" if preview['row_estimate_source'] in ('dimension', 'exact') else "~"
+    return (f"📊 {approx}{preview['estimated_rows']:,} dòng | {len(preview['columns'])} cột | "
+            f"{preview['file_size_mb']:.1f}MB")
@@ -0,0 +1,164 @@
+"""Fast .xlsx size probe for large-file routing decisions.
+
+Reads only the sheet ``<dimension ref="A1:G250001"/>`` element from the start
+of the worksheet XML. When the writer left it out (or wrote a bare "A1"), the
+sheet XML is streamed once and ``<row`` tags are counted. Results are cached by
+(path, size, mtime) so repeated routing / validation calls are free.
+CSV/TSV inputs are probed by counting records with the csv module.
+``quick_row_estimate`` never scans past a fixed head of the sheet / text, for
+previews that must answer in bounded time.
+"""
+import os
+import re
+import time
+import threading
+from typing import Dict, Any, Tuple
+
+from .xlsx_fast_reader import FastXlsxReader, column_index_from_ref
+from .csv_io import DelimitedReader, is_delimited_path
+
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+_ROW_TAG_RE = re.compile(rb'<(?:\w+:)?row[\s>/]')
+_ROW_NUMBER_RE = re.compile(rb'<(?:\w+:)?row\b[^>]*?\sr="(\d+)"')
+
+_HEAD_BYTES = 4096
+_SCAN_CHUNK_BYTES = 1 << 20
+
+_cache: Dict[Tuple[str, str], Tuple[int, int, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _read_dimension(archive, member: str):
+    """(max_row, max_column) from <dimension>, or None if absent / only 'A1'"""
+    with archive.open(member) as sheet_xml:
+        head = sheet_xml.read(_HEAD_BYTES)
+    match = _DIMENSION_RE.search(head)
+    if not match or match.group(3) is None:
+        return None
+    max_row = int(match.group(4))
+    max_column = column_index_from_ref(match.group(3).decode('ascii')) + 1
+    return max_row, max_column
+
+
+def _scan_rows(archive, member: str) -> int:
+    """Stream the sheet XML counting <row> tags; highest r= wins if present"""
+    row_tags = 0
+    last_row_number = 0
+    carry = b""
+    with archive.open(member) as sheet_xml:
+        while True:
+            chunk = sheet_xml.read(_SCAN_CHUNK_BYTES)
+            if not chunk:
+                break
+            buffer = carry + chunk
+            # Keep an unfinished trailing tag for the next chunk
+            cut = buffer.rfind(b"<")
+            if cut == -1:
+                cut = len(buffer)
+            complete, carry = buffer[:cut], buffer[cut:]
+            row_tags += len(_ROW_TAG_RE.findall(complete))
+            numbers = _ROW_NUMBER_RE.findall(complete)
+            if numbers:
+                last_row_number = max(last_row_number, int(numbers[-1]))
+    if carry:
+        row_tags += len(_ROW_TAG_RE.findall(carry))
+        numbers = _ROW_NUMBER_RE.findall(carry)
+        if numbers:
+            last_row_number = max(last_row_number, int(numbers[-1]))
+    return max(row_tags, last_row_number)
+
+
+def _probe_openpyxl(file_path: str, sheet_name: str = None) -> Tuple[int, int]:
+    import openpyxl
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.active
+        return (ws.max_row or 0), (ws.max_column or 0)
+    finally:
+        wb.close()
+
+
+def _probe_uncached(file_path: str, sheet_name: str = None) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if is_delimited_path(file_path):
+        reader = DelimitedReader(file_path)
+        max_row, max_column = reader.count_rows(), len(reader.read_header())
+        source = 'csv_scan'
+    else:
+        try:
+            with FastXlsxReader(file_path, sheet_name) as reader:
+                dimension = _read_dimension(reader.archive, reader.sheet_member)
+                if dimension is not None:
+                    max_row, max_column = dimension
+                    source = 'dimension'
+                else:
+                    max_row, max_column = _scan_rows(reader.archive, reader.sheet_member), 0
+                    source = 'row_scan'
+        except Exception:
+            max_row, max_column = _probe_openpyxl(file_path, sheet_name)
+            source = 'openpyxl'
+    return {
+        'max_row': max_row,
+        'max_column': max_column,
+        'estimated_rows': max(0, max_row - 1),
+        'source': source,
+        'probe_seconds': time.perf_counter() - start,
+    }
+
+
+def probe_xlsx(file_path: str, sheet_name: str = None) -> Dict[str, Any]:
+    """
+    Cheap size probe of a workbook sheet (active sheet by default).
+    Returns max_row, max_column (0 if unknown), estimated_rows (data rows, header excluded),
+    file_size_mb, source ('dimension' / 'row_scan' / 'csv_scan' / 'openpyxl') and cached flag.
+    """
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    key = (abs_path, sheet_name or "")
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return dict(cached[2], cached=True)
+
+    info = _probe_uncached(abs_path, sheet_name)
+    info['file_size_mb'] = stat.st_size / (1024 * 1024)
+    with _cache_lock:
+        _cache[key] = (stat.st_size, stat.st_mtime_ns, info)
+    return dict(info, cached=False)
+
+
+def _extrapolate(count: int, head_len: int, total_len: int) -> Tuple[int, str]:
+    """Scale a count seen in the first head_len bytes to total_len bytes ('exact' if the head is everything)"""
+    if head_len >= total_len:
+        return count, 'exact'
+    return int(round(count * total_len / max(head_len, 1))), 'sampled'
+
+
+def quick_row_estimate(file_path: str, sheet_name: str = None,
+                       head_bytes: int = _SCAN_CHUNK_BYTES // 4) -> Tuple[int, str]:
+    """
+    Bounded-time data row estimate (header excluded): <dimension> when present, else rows counted
+    in the first `head_bytes` of the sheet XML / CSV text scaled by size. Source is
+    'dimension', 'exact' (head covered the file) or 'sampled'.
+    """
+    if is_delimited_path(file_path):
+        total = os.path.getsize(file_path)
+        with open(file_path, 'rb') as handle:
+            head = handle.read(head_bytes)
+        lines = head.count(b"\n") + (1 if head and not head.endswith(b"\n") and len(head) >= total else 0)
+        rows, source = _extrapolate(lines, len(head), total)
+        return max(0, rows - 1), source
+    with FastXlsxReader(file_path, sheet_name) as reader:
+        dimension = _read_dimension(reader.archive, reader.sheet_member)
+        if dimension is not None:
+            return max(0, dimension[0] - 1), 'dimension'
+        total = reader.archive.getinfo(reader.sheet_member).file_size
+        with reader.archive.open(reader.sheet_member) as sheet_xml:
+            head = sheet_xml.read(head_bytes)
+    rows, source = _extrapolate(len(_ROW_TAG_RE.findall(head)), len(head), total)
+    return max(0, rows - 1), source
+
+
+def clear_probe_cache():
+    with _cache_lock:
+        _cache.clear()
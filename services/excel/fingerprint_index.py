@@ -0,0 +1,84 @@
+"""Per-row fingerprint sidecar for incremental re-processing.
+
+Every output row gets a 16-byte blake2b digest of
+(config hash, input cells, keylog written). The digests are saved next to the
+output as ``<output>.keylog_index``. When that workbook is edited and processed
+again, a row whose current (inputs, keylog) still hashes to a stored digest was
+produced by this exact configuration and is copied through; edited, inserted or
+re-configured rows miss and are recomputed.
+
+Digests are matched as a set, not by position, so sorting, inserting or
+deleting rows does not invalidate the untouched ones. Pairing the keylog with
+its inputs means a row whose inputs were edited (even into a copy of another
+row's inputs) can never keep a stale keylog.
+"""
+import os
+import json
+import struct
+import hashlib
+from typing import Any, Iterable, Optional, Set
+
+SIDECAR_SUFFIX = ".keylog_index"
+MAGIC = b"KLFP1\n"
+DIGEST_SIZE = 16
+_COUNT = struct.Struct("<Q")
+
+
+def config_fingerprint(*parts: Any) -> bytes:
+    """Stable hash of everything besides the row cells that shapes the keylog (mapping config, shapes, ...)"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def sidecar_path(file_path: str) -> str:
+    return f"{file_path}{SIDECAR_SUFFIX}"
+
+
+class FingerprintIndex:
+    def __init__(self, config_hash: bytes, digests: Set[bytes] = None):
+        self.config_hash = config_hash
+        self.digests: Set[bytes] = digests if digests is not None else set()
+
+    def row_digest(self, inputs: Iterable[Any], keylog: str) -> bytes:
+        digest = hashlib.blake2b(self.config_hash, digest_size=DIGEST_SIZE)
+        for value in inputs:
+            digest.update(str(value).encode('utf-8'))
+            digest.update(b"\x1f")
+        digest.update(b"\x1e")
+        digest.update(str(keylog).strip().encode('utf-8'))
+        return digest.digest()
+
+    def add(self, digest: bytes):
+        self.digests.add(digest)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return digest in self.digests
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def save(self, path: str) -> str:
+        temp_path = f"{path}.tmp{os.getpid()}"
+        with open(temp_path, 'wb') as handle:
+            handle.write(MAGIC)
+            handle.write(self.config_hash)
+            handle.write(_COUNT.pack(len(self.digests)))
+            handle.write(b"".join(sorted(self.digests)))
+        os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FingerprintIndex"]:
+        """Index saved at `path`, or None if missing / unreadable"""
+        try:
+            with open(path, 'rb') as handle:
+                if handle.read(len(MAGIC)) != MAGIC:
+                    return None
+                config_hash = handle.read(DIGEST_SIZE)
+                (count,) = _COUNT.unpack(handle.read(_COUNT.size))
+                blob = handle.read(count * DIGEST_SIZE)
+        except (OSError, struct.error):
+            return None
+        if len(config_hash) != DIGEST_SIZE or len(blob) != count * DIGEST_SIZE:
+            return None
+        return cls(config_hash, {blob[i:i + DIGEST_SIZE] for i in range(0, len(blob), DIGEST_SIZE)})
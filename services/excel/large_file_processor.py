@@ -1,12 +1,45 @@
 import pandas as pd
 import os
-import gc
 import psutil
-from typing import Dict, List, Tuple, Any, Optional, Iterator, Callable
+from typing import Dict, List, Tuple, Any, Optional, Iterator, Callable, Sequence
 from datetime import datetime
 import threading
 import time
 
+from .xlsx_fast_reader import FastXlsxReader
+from .csv_io import DelimitedWriter, is_delimited_path, open_tabular_reader
+from .xlsx_splice_writer import XlsxKeylogSplicer
+from .results_store import ResultsStore
+from .file_probe import probe_xlsx
+from .spill_writer import SpillingXlsxWriter, EXCEL_MAX_ROWS
+from .data_validation import DataQualityReport
+from .xlsx_stream_writer import StreamingXlsxWriter, DEFAULT_COMPRESSION_LEVEL
+from .output_styles import ColumnWidthSampler, ensure_keylog_style, set_column_widths
+from .columnar_cache import ColumnarInputCache, _unique_header, is_available as columnar_cache_available
+from .adaptive_chunker import AdaptiveChunkSizer
+from .memory_governor import MemoryGovernor
+from .row_result_cache import RowResultCache
+from .fingerprint_index import FingerprintIndex, config_fingerprint, sidecar_path as fingerprint_sidecar_path
+from .persistent_keylog_cache import PersistentKeylogCache, mapping_files_fingerprint
+from .multi_sheet_runner import run_sheet_tasks, sheet_throughput, print_sheet_summary
+from .row_config import (row_config_columns, resolve_row_settings, fanout_operations, fanout_value_operation,
+                         fanout_versions, fanout_keylog_columns)
+
+# (group, shape) -> [(service input key, Excel column)]; drives both column projection and row extraction
+SHAPE_FIELDS: Dict[Tuple[str, str], List[Tuple[str, str]]] = {
+    ('A', "Điểm"): [('point_input', 'data_A')],
+    ('A', "Đường thẳng"): [('line_A1', 'd_P_data_A'), ('line_X1', 'd_V_data_A')],
+    ('A', "Mặt phẳng"): [('plane_a', 'P1_a'), ('plane_b', 'P1_b'), ('plane_c', 'P1_c'), ('plane_d', 'P1_d')],
+    ('A', "Đường tròn"): [('circle_center', 'C_data_I1'), ('circle_radius', 'C_data_R1')],
+    ('A', "Mặt cầu"): [('sphere_center', 'S_data_I1'), ('sphere_radius', 'S_data_R1')],
+    ('B', "Điểm"): [('point_input', 'data_B')],
+    ('B', "Đường thẳng"): [('line_A2', 'd_P_data_B'), ('line_X2', 'd_V_data_B')],
+    ('B', "Mặt phẳng"): [('plane_a', 'P2_a'), ('plane_b', 'P2_b'), ('plane_c', 'P2_c'), ('plane_d', 'P2_d')],
+    ('B', "Đường tròn"): [('circle_center', 'C_data_I2'), ('circle_radius', 'C_data_R2')],
+    ('B', "Mặt cầu"): [('sphere_center', 'S_data_I2'), ('sphere_radius', 'S_data_R2')],
+}
+
+
 class LargeFileProcessor:
     """
     OPTIMIZED HIGH-SPEED processor for large Excel files - Phương án A
@@ -20,8 +53,47 @@ class LargeFileProcessor:
         self.processing_cancelled = False
         self.max_memory_mb = 1500
         self.emergency_cleanup = False
-        self.max_rows_allowed = 250_000
+        # Optional hard cap (None = unlimited); outputs past one sheet spill over instead
+        self.max_rows_allowed = self.config.get('max_rows_allowed')
+        # 'sheets' = Results, Results_2, ... in one workbook; 'files' = output.xlsx, output_2.xlsx, ...
+        self.spill_mode = self.config.get('spill_mode', 'sheets')
+        self.rows_per_sheet = int(self.config.get('rows_per_sheet', EXCEL_MAX_ROWS - 1))
+        self.last_output_files: List[str] = []
+        # 'stream' = minimal zip/inline-string writer (StreamingXlsxWriter), 'openpyxl' = write-only workbook
+        self.xlsx_writer = self.config.get('xlsx_writer', 'stream')
+        self.xlsx_compression_level = int(self.config.get('xlsx_compression_level', DEFAULT_COMPRESSION_LEVEL))
+        # Chunk size tuned per run from measured rows/sec and RSS growth (see AdaptiveChunkSizer)
+        self.adaptive_chunks = bool(self.config.get('adaptive_chunks', True))
+        self.chunk_sizer: Optional[AdaptiveChunkSizer] = None
+        # RSS sampled on a timer; caps chunk size, flushes buffers early and collects under pressure
+        self.memory_governor = MemoryGovernor(self.max_memory_mb,
+                                              interval=float(self.config.get('memory_sample_interval', 0.25)))
+        # Identical input rows are computed once per run and the keylog reused (see RowResultCache)
+        self.row_dedup = bool(self.config.get('row_dedup', True))
+        self.row_dedup_max_entries = int(self.config.get('row_dedup_max_entries', 200_000))
+        self.row_cache: Optional[RowResultCache] = None
+        # Per-row fingerprints saved as <output>.keylog_index; re-runs on that workbook only recompute changed rows
+        self.incremental = bool(self.config.get('incremental', False))
+        self.incremental_stats: Dict[str, Any] = {}
+        # Optional sqlite cache of keylogs shared across runs/files (None = off)
+        self.keylog_cache_path = self.config.get('keylog_cache_path')
+        # Vectorized answer_* columns per chunk (see services.geometry.numeric_engine)
+        self.numeric_answers = bool(self.config.get('numeric_answers', False))
+        self.keylog_cache: Optional[PersistentKeylogCache] = None
+        self.keylog_cache_stats: Dict[str, Any] = {}
+        self._keylog_config_hash = ""
         self.fast_mode = True
+        # Raw-XML reader (bypasses openpyxl cell objects); opt-in until proven on all customer files
+        self.fast_xml_reader = bool(self.config.get('fast_xml_reader', False))
+        # 'rebuild' = write a fresh Results workbook, 'splice' = copy the input package and rewrite only the keylog cells
+        self.output_mode = self.config.get('output_mode', 'rebuild')
+        # Arrow IPC sidecar of the parsed input (needs pyarrow); re-runs skip the xlsx parse
+        self.columnar_cache = None
+        if self.config.get('columnar_cache', False):
+            if columnar_cache_available():
+                self.columnar_cache = ColumnarInputCache(self.config.get('columnar_cache_dir'))
+            else:
+                print("⚠️ columnar_cache requested but pyarrow is not installed - parsing xlsx every run")
         
     def get_memory_usage(self) -> float:
         try:
@@ -31,14 +103,14 @@ class LargeFileProcessor:
             return 0.0
     
     def check_memory_limit(self) -> bool:
-        return self.get_memory_usage() > self.max_memory_mb
+        return self.memory_governor.rss_mb > self.max_memory_mb
     
     def emergency_memory_cleanup(self):
         self.emergency_cleanup = True
-        gc.collect()
+        self.memory_governor.maybe_collect(force=True)
         
     def _enforce_row_limit(self, total_rows: int):
-        if total_rows > self.max_rows_allowed:
+        if self.max_rows_allowed is not None and total_rows > self.max_rows_allowed:
             raise Exception(
                 f"File có {total_rows:,} dòng, vượt quá giới hạn tối đa {self.max_rows_allowed:,} dòng.\n"
                 f"Vui lòng chia nhỏ file hoặc lọc bớt dữ liệu trước khi import."
@@ -58,14 +130,16 @@ class LargeFileProcessor:
         except Exception:
             return 5000
     
+    def _chunk_target(self, chunksize: int) -> int:
+        """Rows for the next chunk: the adaptive sizer's pick (else the fixed size), capped by memory pressure"""
+        target = self.chunk_sizer.next_size() if self.chunk_sizer is not None else chunksize
+        return self.memory_governor.cap_chunk_size(target)
+    
     def _get_actual_total_rows(self, file_path: str) -> int:
         try:
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-            ws = wb.active
-            actual_total = max(0, (ws.max_row - 1)) if hasattr(ws, 'max_row') and ws.max_row else 0
-            wb.close()
-            print(f"📊 Actual file dimensions: {actual_total:,} data rows")
+            probe = probe_xlsx(file_path)
+            actual_total = probe['estimated_rows']
+            print(f"📊 Actual file dimensions: {actual_total:,} data rows ({probe['source']})")
             return actual_total
         except Exception as e:
             print(f"⚠️ Could not get actual rows: {e}")
@@ -74,11 +148,15 @@ class LargeFileProcessor:
     def _detect_keylog_column_strict(self, file_path: str) -> Tuple[bool, str, int]:
         """Strict detection: only 'keylog' (case-insensitive). Returns (has_keylog, 'keylog', index or -1)."""
         try:
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-            ws = wb.active
-            header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
-            wb.close()
+            if is_delimited_path(file_path):
+                with open_tabular_reader(file_path) as reader:
+                    header_row = reader.read_header()
+            else:
+                import openpyxl
+                wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+                ws = wb.active
+                header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
+                wb.close()
             for i, cell in enumerate(header_row):
                 if cell is not None and str(cell).strip().lower() == 'keylog':
                     print(f"🔍 Found strict keylog column at position {i+1}")
@@ -89,9 +167,28 @@ class LargeFileProcessor:
             print(f"⚠️ Strict keylog detection failed: {e}")
             return False, 'keylog', -1
     
-    def read_excel_streaming_single_workbook(self, file_path: str, chunksize: int = None) -> Iterator[pd.DataFrame]:
+    def _row_config_columns(self, file_path: str) -> List[str]:
+        """Per-row configuration columns (shape_A / shape_B / operation / dim) in the header"""
+        try:
+            with open_tabular_reader(file_path) as reader:
+                return row_config_columns(cell for cell in reader.read_header() if cell is not None)
+        except Exception as e:
+            print(f"⚠️ Row configuration detection failed: {e}")
+            return []
+
+    def read_excel_streaming_single_workbook(self, file_path: str, chunksize: int = None,
+                                             use_fast_reader: bool = None,
+                                             columns: List[str] = None) -> Iterator[pd.DataFrame]:
         if chunksize is None:
             chunksize = self.estimate_optimal_chunksize(file_path)
+        if use_fast_reader is None:
+            use_fast_reader = self.fast_xml_reader
+        if self.columnar_cache is not None:
+            yield from self._read_excel_streaming_columnar(file_path, chunksize, columns)
+            return
+        if use_fast_reader or is_delimited_path(file_path):
+            yield from self._read_excel_streaming_fast_xml(file_path, chunksize, columns)
+            return
         try:
             import openpyxl
             print(f"🚀 PHƯƠNG ÁN A: Single-workbook streaming")
@@ -112,32 +209,162 @@ class LargeFileProcessor:
                 columns = [f"Col_{i}" for i in range(max_col)]
             current_row = 2
             chunk_count = 0
-            while current_row <= max_row and not self.processing_cancelled:
-                try:
-                    end_row = min(current_row + chunksize - 1, max_row)
-                    print(f"⚡ Reading chunk {chunk_count + 1}: rows {current_row:,}-{end_row:,}")
-                    chunk_data = []
-                    for row in ws.iter_rows(min_row=current_row, max_row=end_row, values_only=True):
-                        row_data = [str(cell) if cell is not None else "" for cell in row]
-                        chunk_data.append(row_data)
-                    if chunk_data:
-                        chunk_df = pd.DataFrame(chunk_data, columns=columns).fillna('')
-                        yield chunk_df
-                        del chunk_df, chunk_data
-                        if chunk_count % 10 == 0 and chunk_count > 0:
-                            gc.collect()
-                            print(f"🧹 Cleanup checkpoint: Memory {self.get_memory_usage():.1f}MB")
-                    current_row = end_row + 1
-                    chunk_count += 1
-                except Exception as e:
-                    print(f"❌ Error reading chunk {chunk_count + 1}: {e}")
-                    current_row += chunksize
-                    continue
+            # One pass over the sheet: read-only iter_rows re-parses from the top on every call,
+            # so per-chunk iter_rows(min_row, max_row) made reading quadratic in file length
+            rows_iter = ws.iter_rows(min_row=2, values_only=True)
+            width = len(columns)
+            while not self.processing_cancelled:
+                target = self._chunk_target(chunksize)
+                end_row = current_row + target - 1
+                print(f"⚡ Reading chunk {chunk_count + 1}: rows {current_row:,}-{end_row:,}")
+                chunk_data = []
+                for row in rows_iter:
+                    row_data = [str(cell) if cell is not None else "" for cell in row[:width]]
+                    if len(row_data) < width:
+                        # Sheets without <dimension> yield ragged rows
+                        row_data += [""] * (width - len(row_data))
+                    chunk_data.append(row_data)
+                    if len(chunk_data) >= target:
+                        break
+                if not chunk_data:
+                    break
+                chunk_df = pd.DataFrame(chunk_data, columns=columns).fillna('')
+                yield chunk_df
+                del chunk_df
+                freed = self.memory_governor.maybe_collect()
+                if freed:
+                    print(f"🧹 Cleanup checkpoint: freed {freed:.1f}MB, Memory {self.memory_governor.rss_mb:.1f}MB")
+                current_row += len(chunk_data)
+                chunk_count += 1
+                del chunk_data
             wb.close()
             print(f"✅ Single-workbook streaming completed: {chunk_count} chunks")
         except Exception as e:
             raise Exception(f"Lỗi streaming single-workbook: {str(e)}")
     
+    def _read_excel_streaming_fast_xml(self, file_path: str, chunksize: int,
+                                       columns: List[str] = None) -> Iterator[pd.DataFrame]:
+        """Same chunks as the openpyxl path, built from FastXlsxReader (or DelimitedReader for
+        .csv/.tsv) row tuples. If `columns` is given only those header columns are materialized."""
+        try:
+            print(f"🚀 FAST XML streaming: {os.path.basename(file_path)}")
+            with open_tabular_reader(file_path) as reader:
+                header = [cell if cell else f"Col_{i}" for i, cell in enumerate(reader.read_header())]
+                if columns is not None:
+                    positions = [header.index(col) if col in header else -1 for col in columns]
+                    projection = [pos for pos in positions if pos >= 0]
+                    chunk_columns = [header[pos] for pos in projection]
+                else:
+                    projection = list(range(len(header)))
+                    chunk_columns = header
+                print(f"⚡ Chunk size: {chunksize:,} rows | Columns read: {len(chunk_columns)}")
+                chunk_data = []
+                chunk_count = 0
+                target = self._chunk_target(chunksize)
+                for row in reader.iter_rows(columns=projection, min_row=2):
+                    if self.processing_cancelled:
+                        break
+                    chunk_data.append(row)
+                    if len(chunk_data) >= target:
+                        chunk_count += 1
+                        yield pd.DataFrame(chunk_data, columns=chunk_columns)
+                        chunk_data = []
+                        target = self._chunk_target(chunksize)
+                if chunk_data and not self.processing_cancelled:
+                    chunk_count += 1
+                    yield pd.DataFrame(chunk_data, columns=chunk_columns)
+            print(f"✅ Fast XML streaming completed: {chunk_count} chunks")
+        except Exception as e:
+            raise Exception(f"Lỗi streaming fast XML: {str(e)}")
+    
+    def iter_projected_row_chunks(self, file_path: str, columns: List[str],
+                                  chunksize: int = None) -> Iterator[List[Tuple[str, ...]]]:
+        """
+        Lean read path: lists of plain tuples holding only `columns` (in that order; headers are
+        matched stripped, absent columns read as ""). Column indices are resolved once from the
+        header; no DataFrame is built and pass-through columns are left for the output writer.
+        """
+        if chunksize is None:
+            chunksize = self.estimate_optimal_chunksize(file_path)
+        if self.columnar_cache is not None:
+            # Sidecar columns carry the raw (unstripped, de-duplicated) header names: resolve them
+            # from the header like the other readers, project on them, then rename
+            with open_tabular_reader(file_path) as reader:
+                header = reader.read_header()
+            names = _unique_header(header)
+            renames = {names[pos]: column for column, pos in zip(columns, self._header_positions(header, columns))
+                       if pos >= 0}
+            for chunk_df in self._read_excel_streaming_columnar(file_path, chunksize, list(renames)):
+                chunk_df = chunk_df.rename(columns=renames).reindex(columns=columns, fill_value="").fillna("")
+                yield list(chunk_df.itertuples(index=False, name=None))
+            return
+        try:
+            if self.fast_xml_reader or is_delimited_path(file_path):
+                reader = open_tabular_reader(file_path)
+                header = reader.read_header()
+                positions = self._header_positions(header, columns)
+                rows = reader.iter_rows(columns=positions, min_row=2)
+                close = reader.close
+            else:
+                import openpyxl
+                wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+                ws = wb.active
+                header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+                positions = self._header_positions(header, columns)
+                rows = (tuple("" if pos < 0 or pos >= len(row) or row[pos] is None else str(row[pos])
+                              for pos in positions)
+                        for row in ws.iter_rows(min_row=2, values_only=True))
+                close = wb.close
+            print(f"🚀 Tuple streaming: {os.path.basename(file_path)} | Columns read: "
+                  f"{sum(1 for pos in positions if pos >= 0)}/{len(columns)}")
+            try:
+                chunk_count = 0
+                chunk = []
+                target = self._chunk_target(chunksize)
+                for values in rows:
+                    if self.processing_cancelled:
+                        break
+                    chunk.append(values)
+                    if len(chunk) >= target:
+                        chunk_count += 1
+                        yield chunk
+                        chunk = []
+                        freed = self.memory_governor.maybe_collect()
+                        if freed:
+                            print(f"🧹 Cleanup checkpoint: freed {freed:.1f}MB, Memory {self.memory_governor.rss_mb:.1f}MB")
+                        target = self._chunk_target(chunksize)
+                if chunk and not self.processing_cancelled:
+                    chunk_count += 1
+                    yield chunk
+            finally:
+                close()
+            print(f"✅ Tuple streaming completed: {chunk_count} chunks")
+        except Exception as e:
+            raise Exception(f"Lỗi streaming tuple: {str(e)}")
+
+    @staticmethod
+    def _header_positions(header, columns: List[str]) -> List[int]:
+        names = [str(cell).strip() if cell is not None else "" for cell in header]
+        return [names.index(column.strip()) if column.strip() in names else -1 for column in columns]
+
+    def _read_excel_streaming_columnar(self, file_path: str, chunksize: int,
+                                       columns: List[str] = None) -> Iterator[pd.DataFrame]:
+        """Chunks from the Arrow sidecar (memory-mapped, projected) or built on this pass"""
+        try:
+            cache = self.columnar_cache
+            hit = cache.has_sidecar(file_path)
+            print(f"🚀 COLUMNAR CACHE {'hit' if hit else 'miss - building sidecar'}: {os.path.basename(file_path)}")
+            start = time.time()
+            chunk_count = 0
+            for chunk_df in cache.iter_cached(file_path, chunksize, columns):
+                if self.processing_cancelled:
+                    break
+                chunk_count += 1
+                yield chunk_df
+            print(f"✅ Columnar streaming completed: {chunk_count} chunks in {time.time() - start:.1f}s")
+        except Exception as e:
+            raise Exception(f"Lỗi streaming columnar cache: {str(e)}")
+    
     def process_large_excel_fast(self, file_path: str, shape_a: str, shape_b: str,
                                 operation: str, dimension_a: str, dimension_b: str,
                                 output_path: str, progress_callback: Callable = None) -> Tuple[int, int, str]:
@@ -147,6 +374,7 @@ class LargeFileProcessor:
         processed_count = 0
         start_time = time.time()
         temp_results_file = f"{output_path}.temp_results"
+        answer_files: List[str] = []
         from services.geometry.geometry_service import GeometryService
         try:
             print(f"🚀 PHƯƠNG ÁN A - HIGH-SPEED processing: {os.path.basename(file_path)}")
@@ -158,31 +386,101 @@ class LargeFileProcessor:
             service.set_kich_thuoc(dimension_a, dimension_b)
             service.set_current_operation(operation)
             chunk_size = self.estimate_optimal_chunksize(file_path)
-            print(f"⚡ Optimized chunk size: {chunk_size:,} rows")
+            if self.adaptive_chunks:
+                self.chunk_sizer = AdaptiveChunkSizer(self.max_memory_mb, max_size=max(chunk_size * 5, 10000))
+                print(f"⚡ Adaptive chunk size: starting at {self.chunk_sizer.next_size():,} rows "
+                      f"(memory budget {self.max_memory_mb}MB)")
+            else:
+                self.chunk_sizer = None
+                print(f"⚡ Optimized chunk size: {chunk_size:,} rows")
             print(f"🎯 Target: {total_rows:,} rows at 400+ rows/sec")
             results_buffer = []
             buffer_size = 5000
             chunk_count = 0
             last_speed_check = time.time()
-            for chunk_df in self.read_excel_streaming_single_workbook(file_path, chunk_size):
+            required_columns = self._get_required_columns(shape_a, 'A') + self._get_required_columns(shape_b, 'B')
+            # Per-row shape_A / shape_B / operation / dim columns: read every shape column once
+            config_columns = self._row_config_columns(file_path)
+            if config_columns:
+                required_columns = config_columns + list(dict.fromkeys(
+                    column for fields in SHAPE_FIELDS.values() for _, column in fields))
+                print(f"🧩 Per-row configuration columns: {', '.join(config_columns)}")
+            defaults = (shape_a, shape_b or None, operation, dimension_a, dimension_b)
+            self.row_cache = RowResultCache(self.row_dedup_max_entries) if self.row_dedup else None
+            self._open_keylog_cache(shape_a, shape_b, operation, dimension_a, dimension_b)
+            previous_index, new_index, keylog_header = self._open_incremental_index(
+                file_path, has_keylog, keylog_col_index, shape_a, shape_b, operation, dimension_a, dimension_b)
+            read_columns = required_columns + [keylog_header] if keylog_header else required_columns
+            reused_count = 0
+            # Chunk timing covers read + process (the generator reads lazily between iterations)
+            chunk_mark = time.time()
+            governor = self.memory_governor.start()
+            rss_mark = governor.rss_mb
+            fields_a = self._shape_field_positions(shape_a, 'A', read_columns)
+            fields_b = self._shape_field_positions(shape_b, 'B', read_columns)
+            active_settings = defaults
+            settings_prefix = ()
+            settings_error = None
+            keylog_position = read_columns.index(keylog_header) if keylog_header else None
+            answer_names = []
+            if self.numeric_answers and not config_columns:
+                from services.geometry.numeric_engine import answer_columns, answer_texts
+                answer_names = answer_columns(operation, shape_a, shape_b or None)
+                if answer_names:
+                    print(f"🧮 Numeric answers: {', '.join(answer_names)} (vectorized per chunk)")
+            answer_files = [f"{temp_results_file}.{name}" for name in answer_names]
+            answer_buffers = [[] for _ in answer_names]
+            for chunk_rows in self.iter_projected_row_chunks(file_path, read_columns, chunk_size):
                 if self.processing_cancelled:
                     break
                 chunk_count += 1
                 chunk_start = time.time()
                 chunk_results = []
-                for index, row in chunk_df.iterrows():
+                if answer_names:
+                    answers = service.compute_numeric_answers(pd.DataFrame(chunk_rows, columns=read_columns),
+                                                              shape_a, shape_b, operation, dimension_a, dimension_b)
+                    for buffer, name in zip(answer_buffers, answer_names):
+                        buffer.extend(answer_texts(answers[name].to_numpy()))
+                for values in chunk_rows:
                     try:
                         if self.processing_cancelled:
                             break
-                        data_a = self._extract_shape_data_fast(row, shape_a, 'A')
-                        data_b = self._extract_shape_data_fast(row, shape_b, 'B') if shape_b else {}
                         if processed_count % 10000 == 0 and processed_count > 0:
                             service = GeometryService(self.config)
-                            service.set_current_shapes(shape_a, shape_b)
-                            service.set_kich_thuoc(dimension_a, dimension_b)
-                            service.set_current_operation(operation)
-                        service.thuc_thi_tat_ca(data_a, data_b)
-                        result = service.generate_final_result()
+                            service.set_current_shapes(*active_settings[:2])
+                            service.set_kich_thuoc(*active_settings[3:])
+                            service.set_current_operation(active_settings[2])
+                        if config_columns:
+                            settings = resolve_row_settings(
+                                {name: values[pos].strip() for pos, name in enumerate(config_columns)}, defaults)
+                            if settings != active_settings:
+                                active_settings = settings
+                                settings_error = service.settings_error(settings)
+                                fields_a = self._shape_field_positions(settings[0], 'A', read_columns)
+                                fields_b = self._shape_field_positions(settings[1], 'B', read_columns)
+                                service.set_current_shapes(settings[0], settings[1])
+                                service.set_kich_thuoc(settings[3], settings[4])
+                                service.set_current_operation(settings[2])
+                            settings_prefix = tuple(str(item) for item in settings)
+                            if settings_error:
+                                raise Exception(settings_error)
+                        data_a = {key: values[pos].strip() for key, pos in fields_a}
+                        data_b = {key: values[pos].strip() for key, pos in fields_b}
+                        inputs = settings_prefix + tuple(data_a.values()) + tuple(data_b.values())
+                        result = None
+                        if previous_index is not None:
+                            existing = values[keylog_position].strip()
+                            if existing and new_index.row_digest(inputs, existing) in previous_index:
+                                result = existing
+                                reused_count += 1
+                        if result is None and self.row_cache is not None:
+                            key = (settings_prefix, tuple(data_a.values()), tuple(data_b.values()))
+                            result = self.row_cache.get_or_compute(
+                                key, lambda: self._compute_row_cached(service, data_a, data_b, settings_prefix))
+                        elif result is None:
+                            result = self._compute_row_cached(service, data_a, data_b, settings_prefix)
+                        if new_index is not None:
+                            new_index.add(new_index.row_digest(inputs, result))
                         chunk_results.append(result)
                         success_count += 1
                     except Exception as e:
@@ -190,11 +488,14 @@ class LargeFileProcessor:
                         error_count += 1
                     processed_count += 1
                 results_buffer.extend(chunk_results)
-                if len(results_buffer) >= buffer_size:
+                if len(results_buffer) >= buffer_size or governor.should_flush(len(results_buffer)):
                     self._write_results_buffer_fast(temp_results_file, results_buffer)
                     results_buffer = []
+                    for answer_file, buffer in zip(answer_files, answer_buffers):
+                        self._write_results_buffer_fast(answer_file, buffer)
+                        buffer.clear()
                 chunk_time = time.time() - chunk_start
-                chunk_speed = len(chunk_df) / chunk_time if chunk_time >= 0.5 else None
+                chunk_speed = len(chunk_rows) / chunk_time if chunk_time >= 0.5 else None
                 current_time = time.time()
                 elapsed = current_time - start_time
                 avg_speed = processed_count / elapsed if elapsed > 0 else 0
@@ -216,39 +517,426 @@ class LargeFileProcessor:
                         speed_display = f"🔥 Speed: {avg_speed:.0f} rows/sec (avg)"
                     print(f"{speed_display} | Progress: {processed_display:,}/{total_rows:,} ({progress_percent:.1f}%) | ETA: {eta_str}")
                     last_speed_check = current_time
-                if chunk_count % 5 == 0 and self.check_memory_limit():
-                    print(f"⚠️ Memory: {self.get_memory_usage():.1f}MB - Quick cleanup")
-                    gc.collect()
-                del chunk_df
+                freed = governor.maybe_collect()
+                if freed:
+                    print(f"⚠️ Memory: {governor.rss_mb:.1f}MB - cleanup freed {freed:.1f}MB")
+                if self.chunk_sizer is not None:
+                    rss_now = governor.sample()
+                    self.chunk_sizer.record(len(chunk_rows), current_time - chunk_mark, rss_mark, rss_now)
+                    chunk_mark, rss_mark = time.time(), rss_now
+                del chunk_rows
             if results_buffer:
                 self._write_results_buffer_fast(temp_results_file, results_buffer)
-            print("🔧 Creating final Excel file with strict keylog + Flexio font...")
-            final_output = self._create_excel_with_smart_keylog(file_path, temp_results_file, output_path, 
-                                                               has_keylog, keylog_col_name, keylog_col_index)
+            for answer_file, buffer in zip(answer_files, answer_buffers):
+                if buffer:
+                    self._write_results_buffer_fast(answer_file, buffer)
+            if answer_names:
+                print("🔧 Writing output with keylog + numeric answer columns...")
+                final_output = self._write_fanout_output(file_path, [temp_results_file] + answer_files,
+                                                         ['keylog'] + answer_names, output_path,
+                                                         keylog_col_index if has_keylog else None, styled_count=1)
+            elif is_delimited_path(output_path):
+                print("🔧 Writing CSV/TSV output with keylog column...")
+                final_output = self._create_delimited_output(file_path, temp_results_file, output_path,
+                                                             has_keylog, keylog_col_index)
+                self.last_output_files = [final_output]
+            elif self.output_mode == 'splice' and not is_delimited_path(file_path):
+                print("🔧 Splicing keylog column into a copy of the original workbook...")
+                final_output = self._create_excel_spliced(file_path, temp_results_file, output_path,
+                                                          has_keylog, keylog_col_name, keylog_col_index)
+                self.last_output_files = [final_output]
+            else:
+                print("🔧 Creating final Excel file with strict keylog + Flexio font...")
+                final_output = self._create_excel_streaming_rebuild(file_path, temp_results_file, output_path,
+                                                                    has_keylog, keylog_col_name, keylog_col_index)
+            if new_index is not None:
+                new_index.save(fingerprint_sidecar_path(final_output))
+                self.incremental_stats.update(rows_reused=reused_count,
+                                              rows_recomputed=processed_count - reused_count,
+                                              index_file=fingerprint_sidecar_path(final_output))
+                print(f"🔁 Incremental: reused {reused_count:,} rows, recomputed "
+                      f"{processed_count - reused_count:,} (index: {os.path.basename(fingerprint_sidecar_path(final_output))})")
             total_time = time.time() - start_time
             final_speed = processed_count / total_time if total_time > 0 else 0
             print(f"🏁 PHƯƠNG ÁN A COMPLETED!")
             print(f"⚡ Final speed: {final_speed:.0f} rows/sec (Target: 400+ rows/sec)")
             print(f"📊 Total: {processed_count:,} rows in {total_time:.1f}s")
             print(f"✅ Success: {success_count:,} | ❌ Errors: {error_count:,}")
+            if self.chunk_sizer is not None:
+                sizing = self.chunk_sizer.summary()
+                print(f"📐 Adaptive chunking: settled on {sizing['best_size']:,} rows "
+                      f"({sizing['best_rows_per_sec']:,.0f} rows/sec) after {sizing['chunks']} chunks, "
+                      f"sizes used: {sizing['sizes_used']}")
+            if self.row_cache is not None:
+                print(self.row_cache.summary_line())
+            if self.keylog_cache is not None:
+                print(self.keylog_cache.summary_line())
+            gov = governor.stats()
+            print(f"🧠 Memory governor: peak {gov['peak_rss_mb']:.0f}MB, {gov['collections']} collections "
+                  f"({gov['freed_mb']:.0f}MB freed), {gov['early_flushes']} early flushes, "
+                  f"{gov['chunk_caps']} chunk caps")
             return success_count, error_count, final_output
         except Exception as e:
             raise Exception(f"Lỗi xử lý PHƯƠNG ÁN A: {str(e)}")
         finally:
+            self.memory_governor.stop()
+            self._close_keylog_cache()
             try:
-                if os.path.exists(temp_results_file):
-                    os.remove(temp_results_file)
-                    print(f"🧹 Cleaned up temp file: {os.path.basename(temp_results_file)}")
+                for temp_file in [temp_results_file] + answer_files:
+                    if os.path.exists(temp_file):
+                        ResultsStore(temp_file).remove()
+                        print(f"🧹 Cleaned up temp file: {os.path.basename(temp_file)}")
             except Exception as cleanup_err:
                 print(f"⚠️ Could not remove temp file: {cleanup_err}")
     
+    def _open_keylog_cache(self, *run_settings):
+        """Open the persistent keylog cache (if configured) keyed by config + geometry mapping files + run settings"""
+        self.keylog_cache_stats = {}
+        if not self.keylog_cache_path:
+            self.keylog_cache = None
+            return
+        self._keylog_config_hash = config_fingerprint(
+            self.config, mapping_files_fingerprint('geometry_mode'), *run_settings).hex()
+        self.keylog_cache = PersistentKeylogCache(self.keylog_cache_path)
+
+    def _close_keylog_cache(self):
+        if self.keylog_cache is not None:
+            try:
+                self.keylog_cache.close()
+                self.keylog_cache_stats = self.keylog_cache.stats()
+            except Exception as e:
+                print(f"⚠️ Could not close keylog cache: {e}")
+            self.keylog_cache = None
+
+    def _compute_row_cached(self, service, data_a: Dict, data_b: Dict, settings: Tuple = ()) -> str:
+        """`settings` (per-row configuration, if any) is part of the persistent cache key"""
+        if self.keylog_cache is None:
+            return _compute_geometry_row(service, data_a, data_b)
+        inputs = tuple(settings) + tuple(data_a.values()) + tuple(data_b.values())
+        return self.keylog_cache.get_or_compute('geometry', self._keylog_config_hash, inputs,
+                                                lambda: _compute_geometry_row(service, data_a, data_b))
+
+    def _open_incremental_index(self, file_path: str, has_keylog: bool, keylog_col_index: int,
+                                *run_settings) -> Tuple[Optional[FingerprintIndex], Optional[FingerprintIndex], Optional[str]]:
+        """
+        (previous index of the input, index being built for the output, keylog header to read).
+        The previous index is only used when the input already has a keylog column and was
+        produced under the same config + shapes/operation/dimensions.
+        """
+        self.incremental_stats = {}
+        if not self.incremental:
+            return None, None, None
+        new_index = FingerprintIndex(config_fingerprint(self.config, mapping_files_fingerprint('geometry_mode'),
+                                                        *run_settings))
+        previous_index = FingerprintIndex.load(fingerprint_sidecar_path(file_path)) if has_keylog else None
+        if previous_index is None:
+            status = 'no_index'
+        elif previous_index.config_hash != new_index.config_hash:
+            status = 'config_changed'
+            previous_index = None
+        else:
+            status = 'reuse'
+        self.incremental_stats = {'status': status,
+                                  'previous_rows': len(previous_index) if previous_index is not None else 0}
+        print(f"🔁 Incremental mode: {status}")
+        if previous_index is None:
+            return None, new_index, None
+        with open_tabular_reader(file_path) as reader:
+            header = reader.read_header()
+        keylog_header = header[keylog_col_index] if keylog_col_index < len(header) else None
+        return (previous_index, new_index, keylog_header) if keylog_header else (None, new_index, None)
+
+    def _create_excel_spliced(self, original_file: str, temp_results_file: str, output_path: str,
+                              has_keylog: bool, keylog_col_name: str, keylog_col_index: int) -> str:
+        """Near-copy finalize: only the keylog cells of the active sheet are rewritten.
+        Other sheets, styles and untouched cells keep their original bytes."""
+        try:
+            with ResultsStore(temp_results_file) as store:
+                splicer = XlsxKeylogSplicer(original_file)
+                stats = splicer.write(output_path, iter(store), keylog_col_index if has_keylog else -1)
+            print(f"✅ Splice completed: {stats['rows_written']:,} rows in {stats['seconds']:.1f}s "
+                  f"({stats['rows_per_sec']:.0f} rows/sec, column {stats['keylog_column']})")
+            return output_path
+        except Exception as splice_error:
+            print(f"⚠️ Splice output failed: {splice_error} - falling back to rebuild")
+            return self._create_excel_with_smart_keylog(original_file, temp_results_file, output_path,
+                                                       has_keylog, keylog_col_name, keylog_col_index)
+    
+    def _create_excel_streaming_rebuild(self, original_file: str, temp_results_file: str, output_path: str,
+                                        has_keylog: bool, keylog_col_name: str, keylog_col_index: int) -> str:
+        """Constant-memory rebuild: source rows (FastXlsxReader) zipped with ResultsStore records,
+        streamed into write-only Results sheets that spill over past the sheet row limit.
+        Returns the first output file; all parts are kept in self.last_output_files."""
+        try:
+            start = time.time()
+            with open_tabular_reader(original_file) as reader, ResultsStore(temp_results_file) as store:
+                writer = self._write_sheet_with_results(reader, iter(store), output_path,
+                                                        keylog_col_index if has_keylog else -1)
+            self.last_output_files = writer.output_files
+            elapsed = time.time() - start
+            print(f"✅ Streaming rebuild completed: {writer.rows_written:,} rows in {elapsed:.1f}s "
+                  f"→ {len(writer.output_files)} file(s), sheets: {', '.join(writer.sheet_names)}")
+            return writer.output_files[0]
+        except Exception as stream_error:
+            print(f"⚠️ Streaming rebuild failed: {stream_error} - falling back to pandas rebuild")
+            self.last_output_files = [output_path]
+            return self._create_excel_with_smart_keylog(original_file, temp_results_file, output_path,
+                                                       has_keylog, keylog_col_name, keylog_col_index)
+    
+    def _merge_results_into_rows(self, reader, results: Iterator[str],
+                                 keylog_col_index: int = -1) -> Tuple[List[str], int, Iterator[List[str]]]:
+        """(header, keylog column, row iterator) with the keylog column filled from `results`
+        (appended as a new 'keylog' column when keylog_col_index is -1)."""
+        header = list(reader.read_header())
+        if 0 <= keylog_col_index < len(header):
+            target_col_index = keylog_col_index
+        else:
+            target_col_index = len(header)
+            header.append('keylog')
+        width = len(header)
+        
+        def rows():
+            for row in reader.iter_rows(min_row=2):
+                values = list(row[:width])
+                if len(values) < width:
+                    values += [""] * (width - len(values))
+                values[target_col_index] = next(results, "")
+                yield values
+        return header, target_col_index, rows()
+    
+    def _write_sheet_with_results(self, reader, results: Iterator[str], output_path: str,
+                                  keylog_col_index: int = -1, sheet_title: str = 'Results',
+                                  workbook=None) -> SpillingXlsxWriter:
+        """Stream reader's sheet into a SpillingXlsxWriter with the keylog column filled in"""
+        header, target_col_index, rows = self._merge_results_into_rows(reader, results, keylog_col_index)
+        writer = SpillingXlsxWriter(output_path, header, spill_mode=self.spill_mode,
+                                    rows_per_sheet=self.rows_per_sheet, sheet_title=sheet_title,
+                                    keylog_col_index=target_col_index, workbook=workbook,
+                                    engine=self.xlsx_writer, compression_level=self.xlsx_compression_level)
+        with writer:
+            for values in rows:
+                writer.append(values)
+        return writer
+    
+    def _create_delimited_output(self, original_file: str, temp_results_file: str, output_path: str,
+                                 has_keylog: bool, keylog_col_index: int) -> str:
+        """CSV/TSV output: same columns and keylog placement as the xlsx rebuild, no row limit"""
+        try:
+            start = time.time()
+            with open_tabular_reader(original_file) as reader, ResultsStore(temp_results_file) as store:
+                header, _, rows = self._merge_results_into_rows(reader, iter(store),
+                                                                keylog_col_index if has_keylog else -1)
+                with DelimitedWriter(output_path, header) as writer:
+                    writer.append_many(rows)
+            print(f"✅ Delimited output completed: {writer.rows_written:,} rows in {time.time() - start:.1f}s")
+            return output_path
+        except Exception as e:
+            raise Exception(f"Lỗi ghi CSV/TSV: {str(e)}")
+    
+    def process_large_excel_operations(self, file_path: str, shape_a: str, shape_b: str,
+                                       operations: Sequence[str], dimension_a: str, dimension_b: str,
+                                       output_path: str, progress_callback: Callable = None,
+                                       versions: Sequence[str] = None) -> Tuple[int, int, str]:
+        """
+        Operation fan-out over the streaming path: each row's values are encoded once and one
+        keylog_<operation> column per operation (times each of `versions`, prefix swapped) is
+        appended to the output (an existing keylog column passes through). shape_A / shape_B /
+        dim columns apply per row.
+        Returns (rows without errors, rows with an error in any column, output file).
+        """
+        from services.geometry.geometry_service import GeometryService
+        operations = fanout_operations(operations)
+        versions = fanout_versions(versions) if versions else None
+        columns = fanout_keylog_columns(operations, versions)
+        self.processing_cancelled = False
+        success_count = 0
+        error_count = 0
+        processed_count = 0
+        start_time = time.time()
+        temp_files = [f"{output_path}.temp_results_{i}" for i in range(len(columns))]
+        try:
+            print(f"🔀 Fan-out: {', '.join(columns)} | {os.path.basename(file_path)}")
+            total_rows = self._get_actual_total_rows(file_path)
+            self._enforce_row_limit(total_rows)
+            service = GeometryService(self.config)
+            defaults = (shape_a, shape_b or None, fanout_value_operation(operations), dimension_a, dimension_b)
+            config_columns = [name for name in self._row_config_columns(file_path) if name != 'operation']
+            if config_columns:
+                read_columns = config_columns + list(dict.fromkeys(
+                    column for fields in SHAPE_FIELDS.values() for _, column in fields))
+            else:
+                read_columns = service._formatter(defaults).columns
+            self.row_cache = RowResultCache(self.row_dedup_max_entries) if self.row_dedup else None
+            buffers: List[List[str]] = [[] for _ in columns]
+            for chunk_rows in self.iter_projected_row_chunks(file_path, read_columns):
+                if self.processing_cancelled:
+                    break
+                for values in chunk_rows:
+                    cells = dict(zip(read_columns, (value.strip() for value in values)))
+                    settings = resolve_row_settings(cells, defaults) if config_columns else defaults
+                    formatter = service._formatter(settings)
+                    compute = lambda: formatter.encode(cells, operations, versions)
+                    if self.row_cache is not None:
+                        keylogs = self.row_cache.get_or_compute(
+                            (settings, tuple(cells[column] for column in formatter.columns)), compute)
+                    else:
+                        keylogs = compute()
+                    for buffer, keylog in zip(buffers, keylogs):
+                        buffer.append(keylog)
+                    if any(keylog.startswith("LỖI:") for keylog in keylogs):
+                        error_count += 1
+                    else:
+                        success_count += 1
+                    processed_count += 1
+                if len(buffers[0]) >= 5000:
+                    for temp_file, buffer in zip(temp_files, buffers):
+                        self._write_results_buffer_fast(temp_file, buffer)
+                    buffers = [[] for _ in columns]
+                if progress_callback:
+                    processed_display = min(processed_count, total_rows)
+                    progress_percent = (processed_display / total_rows) * 100 if total_rows > 0 else 0
+                    progress_callback(progress_percent, processed_display, total_rows, error_count)
+            for temp_file, buffer in zip(temp_files, buffers):
+                self._write_results_buffer_fast(temp_file, buffer)
+            final_output = self._write_fanout_output(file_path, temp_files, columns, output_path)
+            total_time = time.time() - start_time
+            print(f"🏁 Fan-out completed: {processed_count:,} rows x {len(columns)} keylog columns "
+                  f"in {total_time:.1f}s | ✅ {success_count:,} | ❌ {error_count:,}")
+            if self.row_cache is not None:
+                print(self.row_cache.summary_line())
+            return success_count, error_count, final_output
+        except Exception as e:
+            raise Exception(f"Lỗi xử lý nhiều phép toán: {str(e)}")
+        finally:
+            for temp_file in temp_files:
+                try:
+                    if os.path.exists(temp_file):
+                        ResultsStore(temp_file).remove()
+                except Exception as cleanup_err:
+                    print(f"⚠️ Could not remove temp file: {cleanup_err}")
+
+    def _write_fanout_output(self, original_file: str, temp_files: List[str], columns: List[str],
+                             output_path: str, keylog_col_index: Optional[int] = None,
+                             styled_count: Optional[int] = None) -> str:
+        """
+        Source rows with one appended column per temp results file (fan-out keylogs, numeric answers).
+        With keylog_col_index the first column fills that existing keylog column instead of being
+        appended; only the first `styled_count` columns (default all) get the keylog formatting.
+        """
+        stores = [ResultsStore(temp_file) for temp_file in temp_files]
+        try:
+            with open_tabular_reader(original_file) as reader:
+                header = list(reader.read_header())
+                width = len(header)
+                replace = keylog_col_index is not None and 0 <= keylog_col_index < width
+                appended = columns[1:] if replace else columns
+                positions = ([keylog_col_index] if replace else []) + list(range(width, width + len(appended)))
+                keylog_columns = positions[:len(columns) if styled_count is None else styled_count]
+                results = [iter(store) for store in stores]
+
+                def rows():
+                    for row in reader.iter_rows(min_row=2):
+                        values = list(row[:width])
+                        if len(values) < width:
+                            values += [""] * (width - len(values))
+                        extra = [next(column_results, "") for column_results in results]
+                        if replace:
+                            values[keylog_col_index] = extra.pop(0)
+                        yield values + extra
+
+                if is_delimited_path(output_path):
+                    with DelimitedWriter(output_path, header + appended) as writer:
+                        writer.append_many(rows())
+                    self.last_output_files = [output_path]
+                    return output_path
+                writer = SpillingXlsxWriter(output_path, header + appended, spill_mode=self.spill_mode,
+                                            rows_per_sheet=self.rows_per_sheet, keylog_col_index=keylog_columns[0],
+                                            engine=self.xlsx_writer, compression_level=self.xlsx_compression_level,
+                                            extra_keylog_columns=keylog_columns[1:])
+                with writer:
+                    for values in rows():
+                        writer.append(values)
+            self.last_output_files = writer.output_files
+            return writer.output_files[0]
+        finally:
+            for store in stores:
+                store.close()
+
+    def process_large_excel_multi_sheet(self, file_path: str, shape_a: str, shape_b: str,
+                                        operation: str, dimension_a: str, dimension_b: str,
+                                        output_path: str, sheet_names: List[str] = None,
+                                        max_workers: int = None) -> Dict[str, Any]:
+        """
+        Process every (or the selected) sheet of one workbook in parallel worker processes.
+        The GeometryService is configured once per worker; each sheet streams into its own
+        ResultsStore and is written back to a sheet of the same name in output_path.
+        Sheets without the required input columns are copied unchanged and reported as skipped.
+        """
+        start_time = time.time()
+        with FastXlsxReader(file_path) as reader:
+            available = reader.get_sheet_names()
+        selected = list(sheet_names) if sheet_names else available
+        unknown = [name for name in selected if name not in available]
+        if unknown:
+            raise Exception(f"Không tìm thấy sheet: {', '.join(unknown)}")
+        tasks = [(file_path, name, f"{output_path}.sheet{i}.temp_results") for i, name in enumerate(selected)]
+        try:
+            print(f"🚀 MULTI-SHEET processing: {len(tasks)} sheet(s) of {os.path.basename(file_path)}")
+            sheet_stats = run_sheet_tasks(_process_geometry_sheet, tasks,
+                                          initializer=_init_geometry_sheet_worker,
+                                          initargs=(self.config, shape_a, shape_b, operation, dimension_a, dimension_b),
+                                          max_workers=max_workers)
+            print_sheet_summary(sheet_stats)
+            self._write_multi_sheet_output(file_path, available, dict(zip(selected, sheet_stats)), output_path)
+            total_rows = sum(stats['rows'] for stats in sheet_stats)
+            total_time = time.time() - start_time
+            self.last_output_files = [output_path]
+            return {
+                'output_path': output_path,
+                'sheets': sheet_stats,
+                'rows': total_rows,
+                'success': sum(stats.get('success', 0) for stats in sheet_stats),
+                'errors': sum(stats.get('errors', 0) for stats in sheet_stats),
+                'seconds': total_time,
+                'rows_per_sec': total_rows / total_time if total_time > 0 else 0.0,
+            }
+        except Exception as e:
+            raise Exception(f"Lỗi xử lý multi-sheet: {str(e)}")
+        finally:
+            for _, _, temp_results_file in tasks:
+                if os.path.exists(temp_results_file):
+                    ResultsStore(temp_results_file).remove()
+    
+    def _write_multi_sheet_output(self, file_path: str, sheet_order: List[str],
+                                  processed: Dict[str, Dict[str, Any]], output_path: str):
+        if self.xlsx_writer == 'stream':
+            output_wb = StreamingXlsxWriter(output_path, self.xlsx_compression_level)
+        else:
+            import openpyxl
+            output_wb = openpyxl.Workbook(write_only=True)
+        for name in sheet_order:
+            stats = processed.get(name)
+            with FastXlsxReader(file_path, name) as reader:
+                if stats is None or stats.get('skipped'):
+                    source_rows = reader.iter_rows()
+                    sheet = output_wb.create_sheet(name)
+                    for row in source_rows:
+                        sheet.append(list(row))
+                    continue
+                header = reader.read_header()
+                keylog_index = next((i for i, h in enumerate(header) if h.strip().lower() == 'keylog'), -1)
+                with ResultsStore(stats['temp_results_file']) as store:
+                    self._write_sheet_with_results(reader, iter(store), output_path, keylog_index,
+                                                   sheet_title=name, workbook=output_wb)
+        output_wb.save(output_path)
+        output_wb.close()
+    
     def _create_excel_with_smart_keylog(self, original_file: str, temp_results_file: str, 
                                        output_path: str, has_keylog: bool, keylog_col_name: str, 
                                        keylog_col_index: int) -> str:
         try:
-            from openpyxl.styles import Font
             print(f"⚡ SMART KEYLOG Excel creation (strict 'keylog' + Flexio font)...")
-            all_results = self._read_temp_results_fast(temp_results_file)
+            all_results = ResultsStore(temp_results_file)
             # Always use 'keylog' as the column name
             keylog_col_name = 'keylog'
             if has_keylog:
@@ -257,7 +945,7 @@ class LargeFileProcessor:
                 print(f"📝 Creating new 'keylog' column")
             try:
                 original_df = pd.read_excel(original_file, dtype=str, keep_default_na=False, engine='openpyxl')
-                results_to_add = all_results[:len(original_df)]
+                results_to_add = list(all_results.iter_range(0, len(original_df)))
                 if len(results_to_add) < len(original_df):
                     results_to_add.extend([''] * (len(original_df) - len(results_to_add)))
                 if 'keylog' in [c.strip().lower() for c in original_df.columns]:
@@ -280,21 +968,15 @@ class LargeFileProcessor:
                             keylog_col_idx = idx
                             break
                     if keylog_col_idx:
-                        keylog_font = Font(name="Flexio Fx799VN", size=11, bold=True, color="000000")
-                        max_row = worksheet.max_row
-                        for row in range(1, max_row + 1):
-                            worksheet.cell(row=row, column=keylog_col_idx).font = keylog_font
-                    # Minimal auto-width for readability
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if cell.value and len(str(cell.value)) > max_length:
-                                    max_length = min(len(str(cell.value)), 40)
-                            except:
-                                pass
-                        worksheet.column_dimensions[column_letter].width = max(max_length + 2, 10)
+                        # One shared named style referenced by the keylog cells (no per-cell Font)
+                        keylog_style = ensure_keylog_style(writer.book)
+                        for (cell,) in worksheet.iter_rows(min_col=keylog_col_idx, max_col=keylog_col_idx):
+                            cell.style = keylog_style
+                    # Widths from a row sample of the frame, not a pass over every written cell
+                    sampler = ColumnWidthSampler(original_df.columns)
+                    for values in original_df.head(sampler.remaining).itertuples(index=False, name=None):
+                        sampler.observe(values)
+                    set_column_widths(worksheet, sampler.widths())
                 print(f"✅ SMART KEYLOG Excel creation completed!")
                 return output_path
             except Exception as pandas_error:
@@ -303,12 +985,14 @@ class LargeFileProcessor:
                                                                has_keylog, 'keylog', keylog_col_index)
         except Exception as e:
             raise Exception(f"Lỗi tạo Excel SMART KEYLOG: {str(e)}")
+        finally:
+            if 'all_results' in locals():
+                all_results.close()
     
-    def _create_excel_openpyxl_smart_keylog(self, original_file: str, results: List[str], output_path: str,
+    def _create_excel_openpyxl_smart_keylog(self, original_file: str, results: Sequence[str], output_path: str,
                                            has_keylog: bool, keylog_col_name: str, keylog_col_index: int) -> str:
         try:
             import openpyxl
-            from openpyxl.styles import Font
             print("🔄 Using openpyxl smart keylog method (strict 'keylog')...")
             source_wb = openpyxl.load_workbook(original_file, read_only=True, data_only=True)
             source_ws = source_wb.active
@@ -337,27 +1021,26 @@ class LargeFileProcessor:
                 output_ws.cell(row=1, column=col_idx + 1, value=cell_value)
             # Write data rows with 'keylog'
             row_count = 2
-            result_idx = 0
+            results_iter = iter(results)
             for data_row in source_ws.iter_rows(min_row=2, values_only=True):
-                if result_idx >= len(results):
+                result = next(results_iter, None)
+                if result is None:
                     break
                 data_list = list(data_row)
                 if len(data_list) < len(final_header):
                     data_list += [""] * (len(final_header) - len(data_list))
-                data_list[target_col_index] = results[result_idx]
+                data_list[target_col_index] = result
                 for col_idx, cell_value in enumerate(data_list):
                     value = str(cell_value) if cell_value is not None else ""
                     output_ws.cell(row=row_count, column=col_idx + 1, value=value)
                 row_count += 1
-                result_idx += 1
                 if row_count % 5000 == 0:
-                    gc.collect()
-            # Apply Flexio font to keylog column
-            keylog_font = Font(name="Flexio Fx799VN", size=11, bold=True, color="000000")
+                    self.memory_governor.maybe_collect()
+            # Apply the shared Flexio named style to the keylog column
+            keylog_style = ensure_keylog_style(output_wb)
             col = target_col_index + 1
-            max_row = output_ws.max_row
-            for row in range(1, max_row + 1):
-                output_ws.cell(row=row, column=col).font = keylog_font
+            for (cell,) in output_ws.iter_rows(min_col=col, max_col=col):
+                cell.style = keylog_style
             source_wb.close()
             output_wb.save(output_path)
             output_wb.close()
@@ -366,58 +1049,28 @@ class LargeFileProcessor:
         except Exception as e:
             raise Exception(f"Lỗi openpyxl smart keylog fallback: {str(e)}")
     
-    def _extract_shape_data_fast(self, row: pd.Series, shape_type: str, group: str) -> Dict:
-        data_dict = {}
+    def _extract_shape_data_fast(self, row, shape_type: str, group: str) -> Dict:
         if not shape_type:
-            return data_dict
-        if group == 'A':
-            if shape_type == "Điểm":
-                data_dict['point_input'] = str(row.get('data_A', '')).strip()
-            elif shape_type == "Đường thẳng":
-                data_dict['line_A1'] = str(row.get('d_P_data_A', '')).strip()
-                data_dict['line_X1'] = str(row.get('d_V_data_A', '')).strip()
-            elif shape_type == "Mặt phẳng":
-                data_dict['plane_a'] = str(row.get('P1_a', '')).strip()
-                data_dict['plane_b'] = str(row.get('P1_b', '')).strip()
-                data_dict['plane_c'] = str(row.get('P1_c', '')).strip()
-                data_dict['plane_d'] = str(row.get('P1_d', '')).strip()
-            elif shape_type == "Đường tròn":
-                data_dict['circle_center'] = str(row.get('C_data_I1', '')).strip()
-                data_dict['circle_radius'] = str(row.get('C_data_R1', '')).strip()
-            elif shape_type == "Mặt cầu":
-                data_dict['sphere_center'] = str(row.get('S_data_I1', '')).strip()
-                data_dict['sphere_radius'] = str(row.get('S_data_R1', '')).strip()
-        else:
-            if shape_type == "Điểm":
-                data_dict['point_input'] = str(row.get('data_B', '')).strip()
-            elif shape_type == "Đường thẳng":
-                data_dict['line_A2'] = str(row.get('d_P_data_B', '')).strip()
-                data_dict['line_X2'] = str(row.get('d_V_data_B', '')).strip()
-            elif shape_type == "Mặt phẳng":
-                data_dict['plane_a'] = str(row.get('P2_a', '')).strip()
-                data_dict['plane_b'] = str(row.get('P2_b', '')).strip()
-                data_dict['plane_c'] = str(row.get('P2_c', '')).strip()
-                data_dict['plane_d'] = str(row.get('P2_d', '')).strip()
-            elif shape_type == "Đường tròn":
-                data_dict['circle_center'] = str(row.get('C_data_I2', '')).strip()
-                data_dict['circle_radius'] = str(row.get('C_data_R2', '')).strip()
-            elif shape_type == "Mặt cầu":
-                data_dict['sphere_center'] = str(row.get('S_data_I2', '')).strip()
-                data_dict['sphere_radius'] = str(row.get('S_data_R2', '')).strip()
-        return data_dict
+            return {}
+        return {key: str(row.get(column, '')).strip() for key, column in SHAPE_FIELDS.get((group, shape_type), [])}
+
+    def _shape_field_positions(self, shape_type: str, group: str, columns: List[str]) -> List[Tuple[str, int]]:
+        """(service input key, index into `columns`) pairs, resolved once per run for tuple rows"""
+        if not shape_type:
+            return []
+        return [(key, columns.index(column)) for key, column in SHAPE_FIELDS.get((group, shape_type), [])]
     
     def _write_results_buffer_fast(self, temp_file: str, results: List[str]):
         try:
-            mode = 'a' if os.path.exists(temp_file) else 'w'
-            with open(temp_file, mode, encoding='utf-8', buffering=16384) as f:
-                f.write('\n'.join(results) + '\n')
+            ResultsStore(temp_file).append_many(results)
         except Exception as e:
             print(f"⚠️ Warning: Fast buffer write failed: {e}")
     
     def _read_temp_results_fast(self, temp_file: str) -> List[str]:
+        """Materialize all results - prefer iterating ResultsStore(temp_file) lazily"""
         try:
-            with open(temp_file, 'r', encoding='utf-8', buffering=16384) as f:
-                return f.read().strip().split('\n')
+            with ResultsStore(temp_file) as store:
+                return list(store)
         except Exception:
             return []
     
@@ -437,14 +1090,37 @@ class LargeFileProcessor:
         return self.process_large_excel_fast(file_path, shape_a, shape_b, operation, 
                                            dimension_a, dimension_b, output_path, progress_callback)
     
+    def validate_large_file_data(self, file_path: str, shape_a: str, shape_b: str = None,
+                                 chunksize: int = 50_000) -> Dict[str, Any]:
+        """
+        Vectorized data quality check of every row, streamed over projected input columns.
+        Returns DataQualityReport.to_dict(): issue counts, samples and the full error row index.
+        """
+        try:
+            report = DataQualityReport(shape_a, dict(SHAPE_FIELDS.get(('A', shape_a), [])),
+                                       shape_b, dict(SHAPE_FIELDS.get(('B', shape_b), [])) if shape_b else None)
+            columns = report.columns
+            first_excel_row = 2
+            for rows in self.iter_projected_row_chunks(file_path, columns, chunksize):
+                report.add_chunk(pd.DataFrame.from_records(rows, columns=columns), first_excel_row)
+                first_excel_row += len(rows)
+            print(report.summary_line())
+            return report.to_dict()
+        except Exception as e:
+            raise Exception(f"Lỗi kiểm tra dữ liệu: {str(e)}")
+    
     def validate_large_file_structure(self, file_path: str, shape_a: str, shape_b: str = None) -> Dict[str, Any]:
         try:
             actual_rows = self._get_actual_total_rows(file_path)
             file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            header_df = pd.read_excel(file_path, nrows=0, engine='openpyxl')
-            columns = header_df.columns.tolist()
+            if is_delimited_path(file_path):
+                with open_tabular_reader(file_path) as reader:
+                    columns = list(reader.read_header())
+            else:
+                header_df = pd.read_excel(file_path, nrows=0, engine='openpyxl')
+                columns = header_df.columns.tolist()
             has_keylog, keylog_col_name, keylog_col_index = self._detect_keylog_column_strict(file_path)
-            over_limit = actual_rows > self.max_rows_allowed
+            over_limit = self.max_rows_allowed is not None and actual_rows > self.max_rows_allowed
             required_columns_A = self._get_required_columns(shape_a, 'A')
             required_columns_B = self._get_required_columns(shape_b, 'B') if shape_b else []
             missing_columns = [col for col in (required_columns_A + required_columns_B) if col not in columns]
@@ -461,6 +1137,8 @@ class LargeFileProcessor:
                 'max_rows_allowed': self.max_rows_allowed,
                 'over_row_limit': over_limit,
                 'validation_method': 'phương_án_A_strict_keylog',
+                'spill_mode': self.spill_mode,
+                'output_parts': max(1, -(-actual_rows // self.rows_per_sheet)),
                 'warning': f'File vượt quá giới hạn {self.max_rows_allowed:,} dòng' if over_limit else ''
             }
         except Exception as e:
@@ -469,23 +1147,7 @@ class LargeFileProcessor:
     def _get_required_columns(self, shape: str, group: str) -> List[str]:
         if not shape:
             return []
-        if group == 'A':
-            mapping = {
-                "Điểm": ["data_A"],
-                "Đường thẳng": ["d_P_data_A", "d_V_data_A"],
-                "Mặt phẳng": ["P1_a", "P1_b", "P1_c", "P1_d"],
-                "Đường tròn": ["C_data_I1", "C_data_R1"],
-                "Mặt cầu": ["S_data_I1", "S_data_R1"]
-            }
-        else:
-            mapping = {
-                "Điểm": ["data_B"],
-                "Đường thẳng": ["d_P_data_B", "d_V_data_B"],
-                "Mặt phẳng": ["P2_a", "P2_b", "P2_c", "P2_d"],
-                "Đường tròn": ["C_data_I2", "C_data_R2"],
-                "Mặt cầu": ["S_data_I2", "S_data_R2"]
-            }
-        return mapping.get(shape, [])
+        return [column for _, column in SHAPE_FIELDS.get((group, shape), [])]
     
     def get_processing_statistics(self) -> Dict[str, Any]:
         return {
@@ -496,7 +1158,97 @@ class LargeFileProcessor:
             'processing_cancelled': self.processing_cancelled,
             'recommended_max_chunksize': 5000 if self.get_memory_usage() > 800 else 7000,
             'max_rows_allowed': self.max_rows_allowed,
+            'spill_mode': self.spill_mode,
+            'rows_per_sheet': self.rows_per_sheet,
+            'xlsx_writer': self.xlsx_writer,
+            'columnar_cache': self.columnar_cache.last_event if self.columnar_cache else 'disabled',
+            'chunk_sizing': self.chunk_sizer.summary() if self.chunk_sizer is not None else 'fixed',
+            'memory_governor': self.memory_governor.stats(),
+            'row_dedup': self.row_cache.stats() if self.row_cache is not None else 'disabled',
+            'incremental': dict(self.incremental_stats) if self.incremental else 'disabled',
+            'keylog_cache': (self.keylog_cache.stats() if self.keylog_cache is not None
+                             else dict(self.keylog_cache_stats) if self.keylog_cache_path else 'disabled'),
+            'last_output_files': list(self.last_output_files),
             'processing_method': 'phương_án_A_strict_keylog_flexio',
             'target_speed_rows_per_sec': 400,
-            'optimizations': ['single_workbook_open', 'strict_keylog', 'flexio_font', 'large_chunks', 'minimal_gc', 'batch_io']
-        }
\ No newline at end of file
+            'optimizations': ['single_workbook_open', 'strict_keylog', 'flexio_font', 'large_chunks', 'memory_governor', 'batch_io']
+        }
+
+
+# ---------- multi-sheet worker (module level so it can be pickled into worker processes) ----------
+_SHEET_WORKER: Dict[str, Any] = {}
+
+
+def _init_geometry_sheet_worker(config: Dict, shape_a: str, shape_b: str, operation: str,
+                                dimension_a: str, dimension_b: str):
+    """Build the configured GeometryService once per worker process"""
+    from services.geometry.geometry_service import GeometryService
+    service = GeometryService(config)
+    service.set_current_shapes(shape_a, shape_b)
+    service.set_kich_thuoc(dimension_a, dimension_b)
+    service.set_current_operation(operation)
+    processor = LargeFileProcessor(config)
+    required = processor._get_required_columns(shape_a, 'A')
+    if shape_b:
+        required += processor._get_required_columns(shape_b, 'B')
+    # Each worker process opens its own connection; WAL lets them read concurrently
+    processor._open_keylog_cache(shape_a, shape_b, operation, dimension_a, dimension_b)
+    _SHEET_WORKER.update(service=service, processor=processor, shape_a=shape_a, shape_b=shape_b,
+                         required_columns=required)
+
+
+def _compute_geometry_row(service, data_a: Dict, data_b: Dict) -> str:
+    service.thuc_thi_tat_ca(data_a, data_b)
+    return service.generate_final_result()
+
+
+def _process_geometry_sheet(task) -> Dict[str, Any]:
+    file_path, sheet_name, temp_results_file = task
+    started = time.time()
+    service = _SHEET_WORKER['service']
+    processor = _SHEET_WORKER['processor']
+    shape_a, shape_b = _SHEET_WORKER['shape_a'], _SHEET_WORKER['shape_b']
+    required = _SHEET_WORKER['required_columns']
+    rows = success = errors = 0
+    try:
+        with FastXlsxReader(file_path, sheet_name) as reader:
+            header = [h.strip() for h in reader.read_header()]
+            missing = [col for col in required if col not in header]
+            if missing:
+                return sheet_throughput(sheet_name, 0, started, skipped=True,
+                                        reason=f"thiếu cột {', '.join(missing)}")
+            positions = [header.index(col) for col in required]
+            store = ResultsStore(temp_results_file)
+            buffer = []
+            row_cache = RowResultCache(processor.row_dedup_max_entries) if processor.row_dedup else None
+            cache = processor.keylog_cache
+            lookups_before, hits_before = (cache.lookups, cache.hits) if cache is not None else (0, 0)
+            for values in reader.iter_rows(columns=positions, min_row=2):
+                record = dict(zip(required, values))
+                try:
+                    data_a = processor._extract_shape_data_fast(record, shape_a, 'A')
+                    data_b = processor._extract_shape_data_fast(record, shape_b, 'B') if shape_b else {}
+                    if row_cache is not None:
+                        # data_a/data_b are derived from the projected cells only, so those cells are the key
+                        buffer.append(row_cache.get_or_compute(
+                            tuple(values), lambda: processor._compute_row_cached(service, data_a, data_b)))
+                    else:
+                        buffer.append(processor._compute_row_cached(service, data_a, data_b))
+                    success += 1
+                except Exception as e:
+                    buffer.append(f"LỖI: {str(e)}")
+                    errors += 1
+                rows += 1
+                if len(buffer) >= 5000:
+                    store.append_many(buffer)
+                    buffer = []
+            store.append_many(buffer)
+        extra = {'duplication_ratio': row_cache.stats()['duplication_ratio'] if row_cache is not None else 0.0}
+        if cache is not None:
+            cache.flush()
+            lookups = cache.lookups - lookups_before
+            extra['keylog_cache_hit_rate'] = (cache.hits - hits_before) / lookups if lookups else 0.0
+        return sheet_throughput(sheet_name, rows, started, success=success, errors=errors,
+                                temp_results_file=temp_results_file, **extra)
+    except Exception as e:
+        return sheet_throughput(sheet_name, rows, started, skipped=True, reason=str(e))
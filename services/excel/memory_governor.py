@@ -0,0 +1,176 @@
+"""Memory governor for the large-file pipeline.
+
+A daemon thread samples RSS on a timer (one psutil call per interval), so the
+hot loop only reads a float. Pressure levels drive backpressure:
+
+- ``ok``   (< soft_ratio of the budget): no action
+- ``soft`` (>= soft_ratio): chunk sizes are halved, result buffers are flushed early,
+  and a collection is tried if the previous ones actually freed memory
+- ``hard`` (>= hard_ratio): chunks drop to the minimum size (collect and early flush
+  as above). The pipeline is single-threaded, so there is no reader pause: sleeping
+  cannot lower RSS, and freed pages are often never returned to the OS.
+
+Collections are measured (RSS before/after). A collection that frees less than
+``useful_mb`` doubles the cooldown before the next attempt, so a steady-state
+heap is not walked over and over for nothing.
+"""
+import gc
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+LEVEL_OK = 'ok'
+LEVEL_SOFT = 'soft'
+LEVEL_HARD = 'hard'
+
+
+class MemoryGovernor:
+    def __init__(self, max_memory_mb: float, interval: float = 0.25, soft_ratio: float = 0.75,
+                 hard_ratio: float = 0.9, useful_mb: float = 16.0, min_chunk_size: int = 100):
+        self.max_memory_mb = max_memory_mb
+        self.interval = interval
+        self.soft_ratio = soft_ratio
+        self.hard_ratio = hard_ratio
+        self.useful_mb = useful_mb
+        self.min_chunk_size = min_chunk_size
+        self._process = psutil.Process() if psutil is not None else None
+        self._rss_mb = 0.0
+        self._peak_rss_mb = 0.0
+        self._samples = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cooldown_seconds = 1.0
+        self._next_collect_at = 0.0
+        self.collections = 0
+        self.useful_collections = 0
+        self.freed_mb = 0.0
+        self.skipped_collections = 0
+        self.early_flushes = 0
+        self.chunk_caps = 0
+        self.decisions = deque(maxlen=200)
+
+    # ---------- sampling ----------
+    def sample(self) -> float:
+        if self._process is None:
+            return 0.0
+        try:
+            rss = self._process.memory_info().rss / 1024 / 1024
+        except Exception:
+            return self._rss_mb
+        self._rss_mb = rss
+        self._peak_rss_mb = max(self._peak_rss_mb, rss)
+        self._samples += 1
+        return rss
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="memory-governor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 4)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def rss_mb(self) -> float:
+        """Latest sampled RSS; sampled on demand when the timer thread is not running"""
+        return self._rss_mb if self.running else self.sample()
+
+    def level(self) -> str:
+        rss = self.rss_mb
+        if rss >= self.max_memory_mb * self.hard_ratio:
+            return LEVEL_HARD
+        if rss >= self.max_memory_mb * self.soft_ratio:
+            return LEVEL_SOFT
+        return LEVEL_OK
+
+    def _decide(self, action: str, level: str, **detail):
+        self.decisions.append(dict(time=time.time(), action=action, level=level,
+                                   rss_mb=round(self._rss_mb, 1), **detail))
+
+    # ---------- backpressure ----------
+    def cap_chunk_size(self, size: int) -> int:
+        level = self.level()
+        if level == LEVEL_OK:
+            return size
+        capped = self.min_chunk_size if level == LEVEL_HARD else max(self.min_chunk_size, size // 2 // 100 * 100)
+        if capped < size:
+            self.chunk_caps += 1
+            self._decide('cap_chunk', level, requested=size, allowed=capped)
+        return min(size, capped)
+
+    def should_flush(self, buffered: int) -> bool:
+        """Flush result buffers early (before they reach their normal size) under pressure"""
+        if buffered <= 0 or self.level() == LEVEL_OK:
+            return False
+        self.early_flushes += 1
+        self._decide('early_flush', self.level(), buffered=buffered)
+        return True
+
+    def maybe_collect(self, force: bool = False) -> float:
+        """gc.collect() only under pressure and only if recent collections were worth it; returns MB freed"""
+        level = self.level()
+        now = time.time()
+        if not force and (level == LEVEL_OK or now < self._next_collect_at):
+            if level != LEVEL_OK:
+                self.skipped_collections += 1
+            return 0.0
+        before = self.sample()
+        gc.collect()
+        after = self.sample()
+        freed = max(0.0, before - after)
+        self.collections += 1
+        self.freed_mb += freed
+        if freed >= self.useful_mb:
+            self.useful_collections += 1
+            self._cooldown_seconds = 1.0
+        else:
+            self._cooldown_seconds = min(self._cooldown_seconds * 2, 60.0)
+        self._next_collect_at = now + self._cooldown_seconds
+        self._decide('collect', level, freed_mb=round(freed, 1), cooldown_s=self._cooldown_seconds)
+        return freed
+
+    # ---------- reporting ----------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rss_mb': self._rss_mb,
+            'peak_rss_mb': self._peak_rss_mb,
+            'level': self.level(),
+            'samples': self._samples,
+            'sample_interval_s': self.interval,
+            'soft_limit_mb': self.max_memory_mb * self.soft_ratio,
+            'hard_limit_mb': self.max_memory_mb * self.hard_ratio,
+            'collections': self.collections,
+            'useful_collections': self.useful_collections,
+            'skipped_collections': self.skipped_collections,
+            'freed_mb': self.freed_mb,
+            'early_flushes': self.early_flushes,
+            'chunk_caps': self.chunk_caps,
+            'recent_decisions': list(self.decisions)[-20:],
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,62 @@
+"""Run one task per worksheet in parallel processes.
+
+The worker initializer receives the compiled config once per process (not once
+per sheet); each task then only carries the sheet name and its own paths.
+Falls back to in-process sequential execution when only one worker is needed
+or the process pool cannot be started (frozen builds, restricted sandboxes).
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+def resolve_worker_count(task_count: int, max_workers: int = None) -> int:
+    if task_count <= 0:
+        return 0
+    workers = max_workers or (os.cpu_count() or 1)
+    return max(1, min(workers, task_count))
+
+
+def run_sheet_tasks(worker: Callable[[Any], Dict[str, Any]], tasks: Sequence[Any],
+                    initializer: Callable = None, initargs: Tuple = (),
+                    max_workers: int = None) -> List[Dict[str, Any]]:
+    """
+    Execute worker(task) for every task and return the results in task order.
+    worker / initializer must be module-level functions (picklable).
+    """
+    workers = resolve_worker_count(len(tasks), max_workers)
+    if workers == 0:
+        return []
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+                return list(pool.map(worker, tasks))
+        except (OSError, RuntimeError, NotImplementedError) as pool_error:
+            print(f"⚠️ Process pool unavailable ({pool_error}) - processing sheets sequentially")
+    if initializer is not None:
+        initializer(*initargs)
+    return [worker(task) for task in tasks]
+
+
+def sheet_throughput(sheet_name: str, rows: int, started: float, **extra) -> Dict[str, Any]:
+    """Per-sheet stats dict shared by the geometry and polynomial multi-sheet paths"""
+    seconds = time.time() - started
+    stats = {
+        'sheet': sheet_name,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds > 0 else 0.0,
+        'worker_pid': os.getpid(),
+    }
+    stats.update(extra)
+    return stats
+
+
+def print_sheet_summary(sheet_stats: List[Dict[str, Any]]):
+    for stats in sheet_stats:
+        if stats.get('skipped'):
+            print(f"⏭️ Sheet '{stats['sheet']}': skipped ({stats.get('reason', '')})")
+            continue
+        print(f"📄 Sheet '{stats['sheet']}': {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+              f"({stats['rows_per_sec']:.0f} rows/sec) | ✅ {stats.get('success', 0):,} | ❌ {stats.get('errors', 0):,}")
@@ -0,0 +1,75 @@
+"""Shared output styling: named styles registered once per workbook, widths from a row sample.
+
+Cells reference a registered ``NamedStyle`` by name instead of each getting its
+own ``Font`` copy, and column widths come from the first rows seen while
+streaming (``ColumnWidthSampler``) instead of a pass over every written cell.
+Formatting cost is therefore O(columns) plus one style reference per keylog
+cell written.
+"""
+from typing import Dict, Optional, Sequence
+
+KEYLOG_FONT_SPEC = dict(name="Flexio Fx799VN", size=11, bold=True, color="000000")
+KEYLOG_STYLE = "keylog_flexio"
+WIDTH_SAMPLE_ROWS = 200
+
+
+def ensure_named_style(workbook, name: str, font=None, fill=None) -> str:
+    """Register `name` on the workbook once (no-op if present); returns the name for cell.style"""
+    if name not in workbook.named_styles:
+        from openpyxl.styles import NamedStyle
+        style = NamedStyle(name=name)
+        if font is not None:
+            style.font = font
+        if fill is not None:
+            style.fill = fill
+        workbook.add_named_style(style)
+    return name
+
+
+def ensure_keylog_style(workbook) -> str:
+    from openpyxl.styles import Font
+    return ensure_named_style(workbook, KEYLOG_STYLE, font=Font(**KEYLOG_FONT_SPEC))
+
+
+class ColumnWidthSampler:
+    """
+    Running width estimate: longest value (capped) over the header and the first
+    `sample_rows` rows, + padding, with a minimum. Rows after the sample are ignored.
+    """
+
+    def __init__(self, header: Sequence, sample_rows: int = WIDTH_SAMPLE_ROWS, cap: int = 40,
+                 padding: int = 2, min_width: int = 10):
+        self.cap = cap
+        self.padding = padding
+        self.min_width = min_width
+        self.remaining = sample_rows
+        self.lengths = [min(len(str(h)) if h is not None else 0, cap) for h in header]
+
+    @property
+    def sampling(self) -> bool:
+        return self.remaining > 0
+
+    def observe(self, values: Sequence) -> bool:
+        """Feed one row; returns False once the sample is complete"""
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        lengths = self.lengths
+        for i, value in enumerate(values[:len(lengths)]):
+            if value is None:
+                continue
+            size = len(value) if isinstance(value, str) else len(str(value))
+            if size > lengths[i]:
+                lengths[i] = min(size, self.cap)
+        return self.remaining > 0
+
+    def widths(self) -> Dict[int, float]:
+        return {i: max(length + self.padding, self.min_width) for i, length in enumerate(self.lengths)}
+
+
+def set_column_widths(worksheet, widths: Dict[int, float], max_columns: Optional[int] = None):
+    from openpyxl.utils import get_column_letter
+    for col_idx, width in widths.items():
+        if max_columns is not None and col_idx >= max_columns:
+            break
+        worksheet.column_dimensions[get_column_letter(col_idx + 1)].width = width
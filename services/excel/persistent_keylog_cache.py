@@ -0,0 +1,186 @@
+"""Persistent keylog cache shared across runs (sqlite).
+
+Maps (mode, config hash, normalized input cells) -> result, where the result is
+whatever the batch path stores per row (a keylog string for geometry, a dict of
+result cells for equation / polynomial), serialized as JSON.
+
+- WAL journal: any number of readers (other processes, multi-sheet workers) can
+  look up while one writer appends; writes are batched into one transaction per
+  ``flush_every`` misses.
+- Size bound: rows carry a ``last_used`` counter; when the table has grown past
+  ``max_entries`` the least recently used rows are deleted on close.
+- Only successful computations are stored; exceptions propagate uncached.
+
+The config hash should cover everything besides the cells that changes the
+output: mapping files on disk (``mapping_files_fingerprint``) and run settings.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+CONFIG_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'config')
+DEFAULT_MAX_ENTRIES = 2_000_000
+
+_mapping_memo: Dict[Tuple[str, ...], Tuple[Any, str]] = {}
+_mapping_lock = threading.Lock()
+
+
+def mapping_files_fingerprint(*subdirs: str) -> str:
+    """Content hash of the JSON files under config/<subdir> (plus config/common and version_configs)"""
+    folders = sorted(set(subdirs) | {'common', 'version_configs'})
+    files: List[str] = []
+    for folder in folders:
+        base = os.path.join(CONFIG_ROOT, folder)
+        for root, _, names in os.walk(base):
+            files.extend(os.path.join(root, name) for name in names if name.endswith('.json'))
+    files.sort()
+    signature = tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in files)
+    key = tuple(folders)
+    with _mapping_lock:
+        memo = _mapping_memo.get(key)
+        if memo and memo[0] == signature:
+            return memo[1]
+    digest = hashlib.blake2b(digest_size=16)
+    for path in files:
+        digest.update(os.path.relpath(path, CONFIG_ROOT).encode('utf-8'))
+        with open(path, 'rb') as handle:
+            digest.update(handle.read())
+    value = digest.hexdigest()
+    with _mapping_lock:
+        _mapping_memo[key] = (signature, value)
+    return value
+
+
+class PersistentKeylogCache:
+    def __init__(self, db_path: str, max_entries: int = DEFAULT_MAX_ENTRIES, flush_every: int = 500):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS keylog_cache ("
+            " key BLOB PRIMARY KEY, value TEXT NOT NULL,"
+            " compute_seconds REAL NOT NULL, last_used INTEGER NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[bytes, str, float, int]] = []
+        self._touched: List[Tuple[int, bytes]] = []
+        self._clock = time.time_ns()
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+        self.saved_seconds = 0.0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(mode: str, config_hash: str, inputs: Iterable[Any]) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{mode}\x1d{config_hash}\x1d".encode('utf-8'))
+        for value in inputs:
+            digest.update(str(value).strip().encode('utf-8'))
+            digest.update(b"\x1f")
+        return digest.digest()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_or_compute(self, mode: str, config_hash: str, inputs: Iterable[Any],
+                       compute: Callable[[], Any]) -> Any:
+        key = self.make_key(mode, config_hash, inputs)
+        started = time.perf_counter()
+        with self._lock:
+            self.lookups += 1
+            row = self._conn.execute(
+                "SELECT value, compute_seconds FROM keylog_cache WHERE key = ?", (key,)).fetchone()
+        self.lookup_seconds += time.perf_counter() - started
+        if row is not None:
+            self.hits += 1
+            self.saved_seconds += row[1]
+            self._touched.append((self._tick(), key))
+            if len(self._touched) >= self.flush_every:
+                self.flush()
+            return json.loads(row[0])
+        started = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - started
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return value  # not JSON-representable: serve it, just don't persist it
+        self._pending.append((key, payload, elapsed, self._tick()))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return value
+
+    def flush(self, trim: bool = False):
+        """Write pending results / LRU touches in one transaction; `trim` also evicts down to max_entries"""
+        with self._lock:
+            if not self._pending and not self._touched and not trim:
+                return
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO keylog_cache (key, value, compute_seconds, last_used) "
+                        "VALUES (?, ?, ?, ?)", self._pending)
+                    self._conn.executemany(
+                        "UPDATE keylog_cache SET last_used = ? WHERE key = ?", self._touched)
+                    if trim:
+                        self._trim()
+            except sqlite3.OperationalError as e:
+                # Another writer held the lock past the timeout: the cache is best-effort
+                print(f"⚠️ Keylog cache write skipped: {e}")
+            self._pending = []
+            self._touched = []
+
+    def _trim(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM keylog_cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM keylog_cache WHERE key IN "
+                "(SELECT key FROM keylog_cache ORDER BY last_used ASC LIMIT ?)", (excess,))
+            self.evictions += excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM keylog_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'db_path': self.db_path,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+            'saved_seconds': self.saved_seconds,
+            'lookup_seconds': self.lookup_seconds,
+            'evictions': self.evictions,
+            'max_entries': self.max_entries,
+        }
+
+    def summary_line(self) -> str:
+        stats = self.stats()
+        return (f"💾 Keylog cache: {stats['hits']:,}/{stats['lookups']:,} hits "
+                f"({stats['hit_rate'] * 100:.1f}%), ~{stats['saved_seconds']:.1f}s saved "
+                f"(lookups {stats['lookup_seconds']:.2f}s)")
+
+    def close(self):
+        if self._conn is None:
+            return
+        self.flush(trim=True)
+        with self._lock:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
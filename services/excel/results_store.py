@@ -0,0 +1,180 @@
+"""Indexed, memory-mapped temp results store.
+
+Data file: one record per result, ``<u32 length><utf-8 bytes>``.
+Index file (``<path>.idx``): one ``<u64 offset>`` per record.
+Records may contain any text (newlines included) without shifting later rows,
+and readers can access them sequentially or by position without loading the
+whole file into RAM.
+"""
+import os
+import mmap
+import struct
+import threading
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+_LEN = struct.Struct('<I')
+_OFFSET = struct.Struct('<Q')
+
+
+class _FileLock:
+    """Advisory inter-process lock on a sidecar .lock file (fcntl / msvcrt)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    def __enter__(self):
+        self._handle = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            self._handle.seek(0)
+            msvcrt.locking(self._handle.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._handle.close()
+
+
+class ResultsStore:
+    """
+    Append-only, length-prefixed result records with an offset index.
+    Appends are serialized by a thread lock plus an inter-process file lock,
+    so several workers can append whole batches to the same store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.lock_path = f"{path}.lock"
+        self._thread_lock = threading.Lock()
+        self._data_map: Optional[mmap.mmap] = None
+        self._index_map: Optional[mmap.mmap] = None
+        self._mapped_count = 0
+
+    # ---------- writing ----------
+    def append_many(self, results: Iterable[str]) -> int:
+        """Append a batch in one write per file; returns the number of records appended"""
+        payload = bytearray()
+        lengths: List[int] = []
+        for result in results:
+            data = (result if result is not None else "").encode('utf-8')
+            payload += _LEN.pack(len(data))
+            payload += data
+            lengths.append(len(data))
+        if not lengths:
+            return 0
+        with self._thread_lock, _FileLock(self.lock_path):
+            with open(self.path, 'ab') as data_file:
+                data_file.seek(0, os.SEEK_END)
+                offset = data_file.tell()
+                data_file.write(payload)
+            index_bytes = bytearray()
+            for length in lengths:
+                index_bytes += _OFFSET.pack(offset)
+                offset += _LEN.size + length
+            with open(self.index_path, 'ab') as index_file:
+                index_file.write(index_bytes)
+        return len(lengths)
+
+    def append(self, result: str):
+        self.append_many([result])
+
+    # ---------- reading ----------
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.index_path) // _OFFSET.size
+        except OSError:
+            return 0
+
+    def _ensure_mapped(self) -> int:
+        """(Re)map data + index if the store grew since the last mapping"""
+        count = len(self)
+        if count != self._mapped_count or self._data_map is None:
+            self._unmap()
+            if count == 0:
+                self._mapped_count = 0
+                return 0
+            with open(self.path, 'rb') as data_file:
+                self._data_map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(self.index_path, 'rb') as index_file:
+                self._index_map = mmap.mmap(index_file.fileno(), count * _OFFSET.size, access=mmap.ACCESS_READ)
+            self._mapped_count = count
+        return self._mapped_count
+
+    def _record_at(self, offset: int) -> str:
+        (length,) = _LEN.unpack_from(self._data_map, offset)
+        start = offset + _LEN.size
+        return self._data_map[start:start + length].decode('utf-8')
+
+    def __getitem__(self, index: int) -> str:
+        count = self._ensure_mapped()
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f"ResultsStore index {index} out of range ({count})")
+        (offset,) = _OFFSET.unpack_from(self._index_map, index * _OFFSET.size)
+        return self._record_at(offset)
+
+    def iter_range(self, start: int = 0, stop: int = None) -> Iterator[str]:
+        """Sequential lazy read of records [start, stop)"""
+        count = self._ensure_mapped()
+        stop = count if stop is None else min(stop, count)
+        if start >= stop:
+            return
+        (offset,) = _OFFSET.unpack_from(self._index_map, start * _OFFSET.size)
+        data_map = self._data_map
+        for _ in range(start, stop):
+            (length,) = _LEN.unpack_from(data_map, offset)
+            begin = offset + _LEN.size
+            offset = begin + length
+            yield data_map[begin:offset].decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_range(0)
+
+    def head(self, n: int = 5) -> List[str]:
+        """First n results for previews without touching the rest"""
+        return list(islice(self.iter_range(0, n), n))
+
+    # ---------- lifecycle ----------
+    def _unmap(self):
+        for mapped in (self._data_map, self._index_map):
+            if mapped is not None:
+                mapped.close()
+        self._data_map = None
+        self._index_map = None
+
+    def close(self):
+        self._unmap()
+        self._mapped_count = 0
+
+    def remove(self):
+        """Close and delete data, index and lock files"""
+        self.close()
+        for path in (self.path, self.index_path, self.lock_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,110 @@
+"""Per-row configuration columns for heterogeneous geometry batches.
+
+A batch normally runs with one (shape A, shape B, operation, dimensions)
+from the view's dropdowns. When the sheet has any of the optional
+``shape_A`` / ``shape_B`` / ``operation`` / ``dim`` columns, each row's
+non-blank cells override those defaults, so a mixed exam is encoded in one
+read: rows are grouped (or, when streaming, switched) by their resolved
+settings and each settings tuple is compiled once into its field lookups.
+The cells are free text, so resolved settings are checked against the known
+shapes / operations / dimensions; a typo gives "LỖI: ..." rows, never a
+silently wrong keylog.
+
+Operation fan-out encodes a row's values once and emits one keylog per
+requested operation (``keylog_<operation>`` columns); only the tail codes
+differ between operations. Version fan-out does the same across calculator
+versions (``keylog_<version>``), where only the prefix differs.
+"""
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+ROW_CONFIG_COLUMNS = ('shape_A', 'shape_B', 'operation', 'dim')
+SINGLE_SHAPE_OPERATIONS = ("Diện tích", "Thể tích")
+ROW_DIMENSIONS = ("2", "3")
+
+# (shape_a, shape_b, operation, dimension_a, dimension_b)
+RowSettings = Tuple[str, Optional[str], str, str, str]
+
+
+def row_config_columns(columns: Iterable) -> List[str]:
+    """Config columns present in a header (matched stripped), in ROW_CONFIG_COLUMNS order"""
+    present = {str(column).strip() for column in columns}
+    return [name for name in ROW_CONFIG_COLUMNS if name in present]
+
+
+def _normalize_dim(value: str) -> str:
+    """'2.0' (numeric cell read back as float) -> '2'"""
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return str(int(number)) if number.is_integer() else value
+
+
+def resolve_row_settings(cells: Mapping[str, str], defaults: RowSettings) -> RowSettings:
+    """Row overrides (blank cells keep the batch default); single-shape operations drop shape B"""
+    shape_a, shape_b, operation, dimension_a, dimension_b = defaults
+    shape_a = cells.get('shape_A') or shape_a
+    shape_b = cells.get('shape_B') or shape_b
+    operation = cells.get('operation') or operation
+    dim = cells.get('dim')
+    if dim:
+        dimension_a = dimension_b = _normalize_dim(dim)
+    if operation in SINGLE_SHAPE_OPERATIONS:
+        shape_b = None
+    return shape_a, shape_b or None, operation, dimension_a, dimension_b
+
+
+def row_settings_error(settings: RowSettings, shapes: Iterable[str], operations: Iterable[str]) -> Optional[str]:
+    """Message naming the unknown shape / operation / dimension values of a settings tuple, None when valid"""
+    shape_a, shape_b, operation, dimension_a, dimension_b = settings
+    shapes, operations = set(shapes), set(operations)
+    problems = []
+    if shape_a not in shapes:
+        problems.append(f"shape_A '{shape_a}'")
+    if shape_b is not None and shape_b not in shapes:
+        problems.append(f"shape_B '{shape_b}'")
+    if operation not in operations:
+        problems.append(f"operation '{operation}'")
+    for dimension in dict.fromkeys((str(dimension_a), str(dimension_b))):
+        if dimension not in ROW_DIMENSIONS:
+            problems.append(f"dim '{dimension}'")
+    return f"Cấu hình không hợp lệ: {', '.join(problems)}" if problems else None
+
+
+def _selection(values: Iterable[str], what: str) -> List[str]:
+    cleaned = list(dict.fromkeys(str(value).strip() for value in values if value and str(value).strip()))
+    if not cleaned:
+        raise Exception(f"Cần chọn ít nhất một {what}")
+    return cleaned
+
+
+def fanout_operations(operations: Iterable[str]) -> List[str]:
+    """Requested fan-out operations, blanks and repeats dropped (at least one required)"""
+    return _selection(operations, "phép toán")
+
+
+def fanout_versions(versions: Iterable[str]) -> List[str]:
+    """Requested calculator versions (fx799, fx880, ...), blanks and repeats dropped"""
+    return _selection(versions, "phiên bản")
+
+
+def fanout_value_operation(operations: List[str]) -> str:
+    """Operation the shared value pass runs under: a two-shape one when requested, so group B is encoded"""
+    return next((op for op in operations if op not in SINGLE_SHAPE_OPERATIONS), operations[0])
+
+
+def version_keylog_columns(versions: List[str]) -> List[str]:
+    """keylog_<version> column per fan-out version"""
+    return [f"keylog_{version}" for version in versions]
+
+
+def fanout_keylog_columns(operations: List[str], versions: Optional[List[str]] = None) -> List[str]:
+    """
+    Output column per fan-out result, operation-major: keylog_<operation>, keylog_<version>
+    for one operation over several versions, else keylog_<operation>_<version>
+    """
+    if not versions:
+        return [f"keylog_{operation}" for operation in operations]
+    if len(operations) == 1:
+        return version_keylog_columns(versions)
+    return [f"keylog_{operation}_{version}" for operation in operations for version in versions]
@@ -0,0 +1,77 @@
+"""Per-run deduplication of row computations.
+
+Batch sheets repeat the same input rows a lot (generated test data cycles
+through ``j % 10`` patterns, customer files carry whole duplicated blocks).
+``RowResultCache`` keys each row by the tuple of the input cells the engine
+actually reads, computes every distinct key once and hands the stored result
+back for every duplicate. Failures are cached too, so a bad row raises the same
+error for each copy without re-running the engine.
+
+The cache lives for one run and is bounded (LRU), so memory stays flat on
+files with few duplicates.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class _CachedError:
+    __slots__ = ('error',)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class RowResultCache:
+    def __init__(self, max_entries: int = 200_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.rows = 0
+        self.hits = 0
+        self.evictions = 0
+        self.compute_seconds = 0.0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Result for `key`, computing it on first sight; cached failures are re-raised"""
+        self.rows += 1
+        entry = self._entries.get(key, self)
+        if entry is not self:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            started = time.perf_counter()
+            try:
+                entry = compute()
+            except Exception as e:
+                entry = _CachedError(e)
+            self.compute_seconds += time.perf_counter() - started
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        if isinstance(entry, _CachedError):
+            raise entry.error
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        computed = self.rows - self.hits
+        per_row = self.compute_seconds / computed if computed else 0.0
+        return {
+            'rows': self.rows,
+            'computed': computed,
+            'duplicates': self.hits,
+            'duplication_ratio': self.hits / self.rows if self.rows else 0.0,
+            'compute_seconds': self.compute_seconds,
+            'saved_seconds': self.hits * per_row,
+            'evictions': self.evictions,
+            'max_entries': self.max_entries,
+        }
+
+    def summary_line(self) -> str:
+        stats = self.stats()
+        return (f"♻️ Row dedup: {stats['computed']:,} distinct / {stats['rows']:,} rows "
+                f"({stats['duplication_ratio'] * 100:.1f}% duplicates), "
+                f"~{stats['saved_seconds']:.1f}s saved")
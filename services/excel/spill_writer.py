@@ -0,0 +1,169 @@
+"""Constant-memory Results writer with spill-over past Excel's sheet limit.
+
+Rows are streamed into a ``StreamingXlsxWriter`` (engine='stream', sheet XML
+written straight into the zip) or an openpyxl ``write_only`` workbook
+(engine='openpyxl'); nothing is kept per row either way. When a sheet reaches
+``rows_per_sheet`` data rows the output continues on ``Results_2``,
+``Results_3``... (spill_mode='sheets') or in ``name_2.xlsx``, ``name_3.xlsx``...
+(spill_mode='files'). Every part repeats the header row.
+
+Without explicit ``column_widths`` the first rows are held back until the width
+sample is complete (write-only sheets need widths before the first row), so no
+pass over the written cells is needed afterwards.
+"""
+import os
+from typing import List, Sequence, Dict, Optional
+
+from .output_styles import KEYLOG_FONT_SPEC, ColumnWidthSampler, ensure_keylog_style, set_column_widths
+from .xlsx_stream_writer import StreamingXlsxWriter, XLSX_WRITER_ENGINES, DEFAULT_COMPRESSION_LEVEL
+
+EXCEL_MAX_ROWS = 1_048_576
+SPILL_MODES = ('sheets', 'files')
+
+
+class SpillingXlsxWriter:
+    """
+    Append rows one at a time; call close() to get the list of written files.
+    The keylog column (if given) references the shared Flexio Fx799VN 11 bold named style,
+    as do `extra_keylog_columns` (operation fan-out writes one keylog column per operation).
+    Widths: `column_widths` if given, else sampled from the first rows appended.
+    """
+
+    def __init__(self, output_path: str, header: Sequence[str], spill_mode: str = 'sheets',
+                 rows_per_sheet: int = EXCEL_MAX_ROWS - 1, sheet_title: str = 'Results',
+                 keylog_col_index: Optional[int] = None, column_widths: Dict[int, float] = None,
+                 workbook=None, engine: str = 'stream', compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                 extra_keylog_columns: Sequence[int] = ()):
+        if spill_mode not in SPILL_MODES:
+            raise Exception(f"spill_mode không hợp lệ: {spill_mode} (chỉ hỗ trợ {', '.join(SPILL_MODES)})")
+        if engine not in XLSX_WRITER_ENGINES:
+            raise Exception(f"xlsx_writer không hợp lệ: {engine} (chỉ hỗ trợ {', '.join(XLSX_WRITER_ENGINES)})")
+        if not 0 < rows_per_sheet <= EXCEL_MAX_ROWS - 1:
+            raise Exception(f"rows_per_sheet phải trong khoảng 1..{EXCEL_MAX_ROWS - 1:,}")
+        self.output_path = output_path
+        self.header = [str(h) if h is not None else "" for h in header]
+        self.spill_mode = spill_mode
+        self.rows_per_sheet = rows_per_sheet
+        self.sheet_title = sheet_title
+        self.keylog_col_index = keylog_col_index
+        self._keylog_columns = tuple(dict.fromkeys(
+            ([] if keylog_col_index is None else [keylog_col_index]) + list(extra_keylog_columns)))
+        self.engine = engine
+        self.compression_level = compression_level
+        self.column_widths = column_widths or {}
+        self._width_sampler = ColumnWidthSampler(self.header) if column_widths is None else None
+        self._sample_rows: List[list] = []
+        self._keylog_style = None
+        self.output_files: List[str] = []
+        self.sheet_names: List[str] = []
+        self.rows_written = 0
+        # A caller-owned write-only workbook: sheets are added to it and the caller saves it
+        self._shared_workbook = workbook
+        if workbook is not None:
+            self.spill_mode = 'sheets'
+        self._workbook = workbook
+        self._sheet = None
+        self._sheet_rows = 0
+        self._part = 0
+
+    # ---------- part management ----------
+    def _part_file_path(self, part: int) -> str:
+        if part == 1:
+            return self.output_path
+        root, ext = os.path.splitext(self.output_path)
+        return f"{root}_{part}{ext or '.xlsx'}"
+
+    def _part_sheet_title(self, part: int) -> str:
+        return self.sheet_title if part == 1 else f"{self.sheet_title}_{part}"
+
+    def _save_workbook(self):
+        if self._shared_workbook is not None:
+            return
+        if self._workbook is not None:
+            self._workbook.save(self.output_files[-1])
+            self._workbook.close()
+            self._workbook = None
+
+    def _start_part(self):
+        import openpyxl
+        self._part += 1
+        if self._shared_workbook is not None and self._part == 1:
+            self.output_files.append(self.output_path)
+            title = self.sheet_title
+        elif self._workbook is None or self.spill_mode == 'files':
+            self._save_workbook()
+            self.output_files.append(self._part_file_path(self._part))
+            if self.engine == 'stream':
+                self._workbook = StreamingXlsxWriter(self.output_files[-1], self.compression_level)
+            else:
+                self._workbook = openpyxl.Workbook(write_only=True)
+            title = self.sheet_title
+        else:
+            title = self._part_sheet_title(self._part)
+        if isinstance(self._workbook, StreamingXlsxWriter):
+            # Widths and the keylog style are part of the sheet header; cells need no per-row styling
+            self._sheet = self._workbook.create_sheet(title, self.column_widths, self._keylog_columns)
+            self._keylog_style = None
+        else:
+            self._sheet = self._workbook.create_sheet(title)
+            if self._keylog_columns:
+                self._keylog_style = ensure_keylog_style(self._workbook)
+            set_column_widths(self._sheet, self.column_widths)
+        self.sheet_names.append(title)
+        self._sheet.append(self._styled(self.header))
+        self._sheet_rows = 0
+        if self._part > 1:
+            print(f"📄 Spill-over: continuing on {self.output_files[-1] if self.spill_mode == 'files' else title}")
+
+    def _styled(self, values: List[str]) -> list:
+        if self._keylog_style is None:
+            return values
+        from openpyxl.cell import WriteOnlyCell
+        styled = list(values)
+        for index in self._keylog_columns:
+            if index < len(values):
+                cell = WriteOnlyCell(self._sheet, value=values[index])
+                cell.style = self._keylog_style
+                styled[index] = cell
+        return styled
+
+    # ---------- public API ----------
+    def _flush_sample(self):
+        self.column_widths = self._width_sampler.widths()
+        self._width_sampler = None
+        rows, self._sample_rows = self._sample_rows, []
+        for values in rows:
+            self._write(values)
+
+    def _write(self, values: List[str]):
+        if self._sheet is None or self._sheet_rows >= self.rows_per_sheet:
+            self._start_part()
+        self._sheet.append(self._styled(values))
+        self._sheet_rows += 1
+        self.rows_written += 1
+
+    def append(self, values: List[str]):
+        if self._width_sampler is not None:
+            self._sample_rows.append(values)
+            if not self._width_sampler.observe(values):
+                self._flush_sample()
+            return
+        self._write(values)
+
+    def close(self) -> List[str]:
+        if self._width_sampler is not None:
+            self._flush_sample()
+        if self._sheet is None:
+            self._start_part()
+        self._save_workbook()
+        return list(self.output_files)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._workbook is not None and self._shared_workbook is None:
+            self._workbook.close()
+            self._workbook = None
@@ -0,0 +1,351 @@
+"""Raw-XML fast path reader for .xlsx files.
+
+Streams ``xl/worksheets/sheetN.xml`` with ``iterparse`` instead of building
+openpyxl cell objects. Shared strings are resolved lazily: ``sharedStrings.xml``
+is only parsed as far as the highest index requested so far. Numeric cells
+whose style has a date / time number format are converted like openpyxl does
+(``str`` of the datetime), so dates do not come out as raw serials.
+"""
+import os
+import re
+import time
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Tuple, Optional, Iterator, Sequence
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_TAG_ROW = f"{{{NS_MAIN}}}row"
+_TAG_C = f"{{{NS_MAIN}}}c"
+_TAG_V = f"{{{NS_MAIN}}}v"
+_TAG_IS = f"{{{NS_MAIN}}}is"
+_TAG_T = f"{{{NS_MAIN}}}t"
+_TAG_SI = f"{{{NS_MAIN}}}si"
+_TAG_R = f"{{{NS_MAIN}}}r"
+_TAG_SHEET_DATA = f"{{{NS_MAIN}}}sheetData"
+
+_CELL_REF_RE = re.compile(r"([A-Z]+)(\d*)")
+
+
+def column_index_from_ref(cell_ref: str) -> int:
+    """'A1' -> 0, 'AB7' -> 27 (0-based column index)"""
+    match = _CELL_REF_RE.match(cell_ref)
+    if not match:
+        return -1
+    index = 0
+    for ch in match.group(1):
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+def column_letter_from_index(index: int) -> str:
+    """0 -> 'A', 27 -> 'AB'"""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _text_of(element) -> str:
+    """Concatenate <t> text of a plain/rich string, skipping phonetic runs"""
+    parts = []
+    for child in element:
+        if child.tag == _TAG_T:
+            parts.append(child.text or "")
+        elif child.tag == _TAG_R:
+            run_text = child.find(_TAG_T)
+            if run_text is not None and run_text.text:
+                parts.append(run_text.text)
+    return "".join(parts)
+
+
+def _format_number(raw: str) -> str:
+    """Match str() of the value openpyxl would return for a numeric cell"""
+    try:
+        if '.' in raw or 'E' in raw or 'e' in raw:
+            return str(float(raw))
+        return str(int(raw))
+    except ValueError:
+        return raw
+
+
+class LazySharedStrings:
+    """Shared string table parsed on demand up to the highest requested index"""
+
+    def __init__(self, archive: zipfile.ZipFile, member: Optional[str]):
+        self._archive = archive
+        self._member = member
+        self._strings: List[str] = []
+        self._iterator = None
+        self._exhausted = member is None
+
+    def _advance_to(self, index: int):
+        if self._iterator is None and not self._exhausted:
+            self._stream = self._archive.open(self._member)
+            self._iterator = ET.iterparse(self._stream, events=("end",))
+        while len(self._strings) <= index and not self._exhausted:
+            try:
+                _, element = next(self._iterator)
+            except StopIteration:
+                self._exhausted = True
+                self._stream.close()
+                break
+            if element.tag == _TAG_SI:
+                self._strings.append(_text_of(element))
+                element.clear()
+
+    def __getitem__(self, index: int) -> str:
+        if index >= len(self._strings):
+            self._advance_to(index)
+        try:
+            return self._strings[index]
+        except IndexError:
+            return ""
+
+    def close(self):
+        if self._iterator is not None and not self._exhausted:
+            self._stream.close()
+        self._exhausted = True
+
+
+class FastXlsxReader:
+    """
+    Streaming .xlsx reader that works directly on the sheet XML.
+    Rows are yielded as tuples of strings (empty string for blank cells),
+    optionally projected to a subset of column indices.
+    """
+
+    def __init__(self, file_path: str, sheet_name: str = None):
+        self.file_path = file_path
+        self.archive = zipfile.ZipFile(file_path)
+        self.sheets = self._read_workbook_sheets()
+        if not self.sheets:
+            self.archive.close()
+            raise Exception("Không tìm thấy sheet nào trong workbook")
+        self.sheet_name, self.sheet_member = self._resolve_sheet(sheet_name)
+        self.shared_strings = LazySharedStrings(self.archive, self._find_shared_strings())
+        self.date_styles = self._read_date_styles()
+
+    # ---------- package structure ----------
+    def _read_rels(self, rels_member: str) -> Dict[str, str]:
+        base_dir = posixpath.dirname(posixpath.dirname(rels_member))
+        targets = {}
+        try:
+            root = ET.fromstring(self.archive.read(rels_member))
+        except KeyError:
+            return targets
+        for rel in root.findall(f"{{{NS_PKG_REL}}}Relationship"):
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                path = target.lstrip("/")
+            else:
+                path = posixpath.normpath(posixpath.join(base_dir, target))
+            targets[rel.get("Id")] = path
+        return targets
+
+    def _read_workbook_sheets(self) -> List[Tuple[str, str]]:
+        """Ordered (sheet name, zip member) pairs; active sheet index stored separately"""
+        root = ET.fromstring(self.archive.read("xl/workbook.xml"))
+        rels = self._read_rels("xl/_rels/workbook.xml.rels")
+        self.active_index = 0
+        view = root.find(f"{{{NS_MAIN}}}bookViews/{{{NS_MAIN}}}workbookView")
+        if view is not None:
+            try:
+                self.active_index = int(view.get("activeTab", "0"))
+            except ValueError:
+                self.active_index = 0
+        sheets = []
+        for sheet in root.findall(f"{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet"):
+            rel_id = sheet.get(f"{{{NS_REL}}}id")
+            member = rels.get(rel_id)
+            if member:
+                sheets.append((sheet.get("name", ""), member))
+        if self.active_index >= len(sheets):
+            self.active_index = 0
+        pr = root.find(f"{{{NS_MAIN}}}workbookPr")
+        self.date1904 = pr is not None and pr.get("date1904", "0") in ("1", "true")
+        return sheets
+
+    def _read_date_styles(self) -> Dict[str, bool]:
+        """cellXfs index (the cell's s attribute) -> is-timedelta, for styles with a date/time number format"""
+        from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+        try:
+            root = ET.fromstring(self.archive.read("xl/styles.xml"))
+        except KeyError:
+            return {}
+        formats = dict(BUILTIN_FORMATS)
+        for fmt in root.findall(f"{{{NS_MAIN}}}numFmts/{{{NS_MAIN}}}numFmt"):
+            try:
+                formats[int(fmt.get("numFmtId"))] = fmt.get("formatCode", "")
+            except (TypeError, ValueError):
+                continue
+        date_styles = {}
+        for index, xf in enumerate(root.findall(f"{{{NS_MAIN}}}cellXfs/{{{NS_MAIN}}}xf")):
+            try:
+                code = formats.get(int(xf.get("numFmtId", "0")))
+            except ValueError:
+                continue
+            if code and is_date_format(code):
+                date_styles[str(index)] = is_timedelta_format(code)
+        return date_styles
+
+    def _format_date(self, raw: str, timedelta: bool) -> str:
+        from openpyxl.utils.datetime import from_excel, CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+        try:
+            value = from_excel(float(raw), CALENDAR_MAC_1904 if self.date1904 else CALENDAR_WINDOWS_1900,
+                               timedelta=timedelta)
+        except (ValueError, OverflowError):
+            return _format_number(raw)
+        return str(value)
+
+    def _resolve_sheet(self, sheet_name: str = None) -> Tuple[str, str]:
+        if sheet_name is None:
+            return self.sheets[self.active_index]
+        for name, member in self.sheets:
+            if name == sheet_name:
+                return name, member
+        raise Exception(f"Không tìm thấy sheet '{sheet_name}'")
+
+    def _find_shared_strings(self) -> Optional[str]:
+        names = set(self.archive.namelist())
+        for candidate in ("xl/sharedStrings.xml", "xl/SharedStrings.xml"):
+            if candidate in names:
+                return candidate
+        return None
+
+    def get_sheet_names(self) -> List[str]:
+        return [name for name, _ in self.sheets]
+
+    # ---------- row streaming ----------
+    def _cell_value(self, cell) -> str:
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            inline = cell.find(_TAG_IS)
+            return _text_of(inline) if inline is not None else ""
+        value_node = cell.find(_TAG_V)
+        if value_node is None or value_node.text is None:
+            return ""
+        raw = value_node.text
+        if cell_type == "s":
+            return self.shared_strings[int(raw)]
+        if cell_type == "n":
+            style = cell.get("s")
+            if style is not None and style in self.date_styles:
+                return self._format_date(raw, self.date_styles[style])
+            return _format_number(raw)
+        if cell_type == "b":
+            return "True" if raw == "1" else "False"
+        return raw
+
+    def iter_rows(self, columns: Sequence[int] = None, min_row: int = 1,
+                  max_row: int = None) -> Iterator[Tuple[str, ...]]:
+        """
+        Yield rows as tuples of strings.
+        columns: 0-based column indices to project (None = all cells up to the last non-empty one).
+        Rows missing from the XML are yielded as empty rows so row numbers stay aligned.
+        """
+        wanted = {col: pos for pos, col in enumerate(columns)} if columns is not None else None
+        width = len(columns) if columns is not None else 0
+        expected_row = 1
+        with self.archive.open(self.sheet_member) as stream:
+            sheet_data = None
+            context = ET.iterparse(stream, events=("start", "end"))
+            for event, element in context:
+                if event == "start":
+                    if element.tag == _TAG_SHEET_DATA:
+                        sheet_data = element
+                    continue
+                if element.tag != _TAG_ROW:
+                    continue
+                row_attr = element.get("r")
+                row_number = int(row_attr) if row_attr else expected_row
+                if max_row is not None and row_number > max_row:
+                    break
+                while expected_row < row_number:
+                    if expected_row >= min_row and (max_row is None or expected_row <= max_row):
+                        yield ("",) * width
+                    expected_row += 1
+                expected_row = row_number + 1
+                if row_number < min_row:
+                    if sheet_data is not None:
+                        sheet_data.clear()
+                    continue
+                if wanted is not None:
+                    values = [""] * width
+                    position = 0
+                    for cell in element.iter(_TAG_C):
+                        ref = cell.get("r")
+                        col = column_index_from_ref(ref) if ref else position
+                        position = col + 1
+                        slot = wanted.get(col)
+                        if slot is not None:
+                            values[slot] = self._cell_value(cell)
+                else:
+                    values = []
+                    position = 0
+                    for cell in element.iter(_TAG_C):
+                        ref = cell.get("r")
+                        col = column_index_from_ref(ref) if ref else position
+                        position = col + 1
+                        if col >= len(values):
+                            values.extend([""] * (col + 1 - len(values)))
+                        values[col] = self._cell_value(cell)
+                # Drop processed rows from the tree so memory stays flat
+                if sheet_data is not None:
+                    sheet_data.clear()
+                yield tuple(values)
+
+    def read_header(self) -> List[str]:
+        for row in self.iter_rows(min_row=1, max_row=1):
+            return list(row)
+        return []
+
+    def close(self):
+        self.shared_strings.close()
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def benchmark_against_openpyxl(file_path: str, columns: Sequence[int] = None) -> Dict[str, float]:
+    """Compare full-sheet read throughput of FastXlsxReader vs openpyxl read-only iter_rows"""
+    import openpyxl
+
+    start = time.time()
+    fast_rows = 0
+    with FastXlsxReader(file_path) as reader:
+        for _ in reader.iter_rows(columns=columns, min_row=2):
+            fast_rows += 1
+    fast_time = time.time() - start
+
+    start = time.time()
+    openpyxl_rows = 0
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    ws = wb.active
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if columns is not None:
+            [str(row[i]) if i < len(row) and row[i] is not None else "" for i in columns]
+        else:
+            [str(cell) if cell is not None else "" for cell in row]
+        openpyxl_rows += 1
+    wb.close()
+    openpyxl_time = time.time() - start
+
+    return {
+        'rows': fast_rows,
+        'fast_xml_seconds': fast_time,
+        'openpyxl_seconds': openpyxl_time,
+        'fast_xml_rows_per_sec': fast_rows / fast_time if fast_time > 0 else 0.0,
+        'openpyxl_rows_per_sec': openpyxl_rows / openpyxl_time if openpyxl_time > 0 else 0.0,
+        'speedup': openpyxl_time / fast_time if fast_time > 0 else 0.0,
+        'file_size_mb': os.path.getsize(file_path) / (1024 * 1024)
+    }
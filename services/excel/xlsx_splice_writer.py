@@ -0,0 +1,267 @@
+"""Zero-parse XML splice output for keylog insertion.
+
+Copies the original .xlsx package member by member and rewrites only the
+target sheet XML: ``<row>`` elements are streamed as raw bytes and only the
+keylog ``<c>`` is injected/replaced with an inline string. Untouched cells,
+shared strings, styles and other sheets are never turned into Python objects.
+"""
+import os
+import re
+import shutil
+import time
+import zipfile
+from typing import Dict, Iterable, Iterator, Optional
+
+from .xlsx_fast_reader import FastXlsxReader, column_index_from_ref, column_letter_from_index
+
+_READ_BLOCK = 1024 * 1024
+
+_SHEET_DATA_OPEN_RE = re.compile(rb'<((?:\w+:)?)sheetData\b[^>]*?(/?)>')
+_ROW_OPEN_RE = re.compile(rb'<(?:\w+:)?row\b([^>]*?)(/?)>')
+_CELL_RE = re.compile(rb'<(?:\w+:)?c\b([^>]*?)(?:/>|>.*?</(?:\w+:)?c>)', re.DOTALL)
+_ATTR_R_RE = re.compile(rb'\br="([A-Z]+)(\d*)"')
+_ROW_NUM_RE = re.compile(rb'\br="(\d+)"')
+_SPANS_RE = re.compile(rb'\bspans="(\d+):(\d+)"')
+_DIMENSION_RE = re.compile(rb'(<(?:\w+:)?dimension\b[^>]*?\bref=")([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?(")')
+_ILLEGAL_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+KEYLOG_FONT_XML = '<font><b/><sz val="11"/><color rgb="FF000000"/><name val="Flexio Fx799VN"/></font>'
+
+
+def _escape_xml(text: str) -> str:
+    text = _ILLEGAL_XML_RE.sub('', text)
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+class XlsxKeylogSplicer:
+    """Write a copy of `source_path` with one column replaced/added, streaming the sheet XML"""
+
+    def __init__(self, source_path: str, sheet_name: str = None):
+        self.source_path = source_path
+        with FastXlsxReader(source_path, sheet_name) as reader:
+            self.sheet_member = reader.sheet_member
+            self.header = reader.read_header()
+        self.style_id = None
+        self.rows_written = 0
+
+    # ---------- package-level patches ----------
+    def _patch_styles(self, styles_xml: bytes) -> bytes:
+        """Append the Flexio keylog font + one cellXfs entry; remember the new style id"""
+        text = styles_xml.decode('utf-8')
+        fonts_match = re.search(r'<fonts\b([^>]*)>(.*?)</fonts>', text, re.DOTALL)
+        xfs_match = re.search(r'<cellXfs\b([^>]*)>(.*?)</cellXfs>', text, re.DOTALL)
+        if not fonts_match or not xfs_match:
+            return styles_xml
+        font_id = len(re.findall(r'<font\b', fonts_match.group(2)))
+        xf_id = len(re.findall(r'<xf\b', xfs_match.group(2)))
+        xf_xml = f'<xf numFmtId="0" fontId="{font_id}" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        # Patch cellXfs first (it comes after fonts, so font offsets stay valid)
+        xfs_attrs = re.sub(r'count="\d+"', f'count="{xf_id + 1}"', xfs_match.group(1))
+        text = (text[:xfs_match.start()] + f'<cellXfs{xfs_attrs}>' + xfs_match.group(2) + xf_xml
+                + '</cellXfs>' + text[xfs_match.end():])
+        fonts_attrs = re.sub(r'count="\d+"', f'count="{font_id + 1}"', fonts_match.group(1))
+        text = (text[:fonts_match.start()] + f'<fonts{fonts_attrs}>' + fonts_match.group(2) + KEYLOG_FONT_XML
+                + '</fonts>' + text[fonts_match.end():])
+        self.style_id = xf_id
+        return text.encode('utf-8')
+
+    @staticmethod
+    def _drop_calc_chain(xml: bytes) -> bytes:
+        """Replaced formula cells would leave calcChain stale - let Excel rebuild it"""
+        return re.sub(rb'<(?:Override|Relationship)\b[^>]*calcChain[^>]*/>', b'', xml)
+
+    # ---------- cell / row rewriting ----------
+    def _cell_xml(self, prefix: bytes, col_letter: str, row_number: int, value: str) -> bytes:
+        p = prefix.decode()
+        style = f' s="{self.style_id}"' if self.style_id is not None else ''
+        return (f'<{p}c r="{col_letter}{row_number}" t="inlineStr"{style}><{p}is>'
+                f'<{p}t xml:space="preserve">{_escape_xml(value)}</{p}t></{p}is></{p}c>').encode('utf-8')
+
+    def _splice_row(self, row_xml: bytes, prefix: bytes, row_number: int, value: str) -> bytes:
+        open_match = _ROW_OPEN_RE.match(row_xml)
+        attrs = open_match.group(1)
+        spans = _SPANS_RE.search(attrs)
+        if spans and int(spans.group(2)) < self.target_col + 1:
+            attrs = attrs[:spans.start()] + b'spans="%s:%d"' % (spans.group(1), self.target_col + 1) + attrs[spans.end():]
+        new_cell = self._cell_xml(prefix, self.target_letter, row_number, value) if value else b''
+        if open_match.group(2) == b'/':
+            return b'<' + prefix + b'row' + attrs + b'>' + new_cell + b'</' + prefix + b'row>'
+        body_start = open_match.end()
+        body_end = row_xml.rindex(b'</')
+        body = row_xml[body_start:body_end]
+        # Fast paths: the target cell exists with an explicit ref, or every cell lies left of it
+        exact = body.find(b' r="%s%d"' % (self.target_letter.encode(), row_number))
+        if exact != -1:
+            cell = _CELL_RE.match(body, body.rfind(b'<', 0, exact))
+            if cell:
+                body = body[:cell.start()] + new_cell + body[cell.end():]
+                return b'<' + prefix + b'row' + attrs + b'>' + body + b'</' + prefix + b'row>'
+        last_cell = _CELL_RE.match(body, max(body.rfind(b'<' + prefix + b'c '), 0))
+        if last_cell:
+            ref = _ATTR_R_RE.search(last_cell.group(1))
+            if ref and column_index_from_ref(ref.group(1).decode()) < self.target_col:
+                return b'<' + prefix + b'row' + attrs + b'>' + body + new_cell + b'</' + prefix + b'row>'
+        position = 0
+        insert_at = len(body)
+        replace_end = None
+        for cell in _CELL_RE.finditer(body):
+            ref = _ATTR_R_RE.search(cell.group(1))
+            col = column_index_from_ref(ref.group(1).decode()) if ref else position
+            position = col + 1
+            if col >= self.target_col:
+                insert_at = cell.start()
+                if col == self.target_col:
+                    replace_end = cell.end()
+                break
+        body = body[:insert_at] + new_cell + body[replace_end if replace_end is not None else insert_at:]
+        return b'<' + prefix + b'row' + attrs + b'>' + body + b'</' + prefix + b'row>'
+
+    def _patch_dimension(self, head: bytes) -> bytes:
+        def widen(match):
+            last_col = match.group(4) or match.group(2)
+            last_row = match.group(5) or match.group(3)
+            if column_index_from_ref(last_col.decode()) < self.target_col:
+                last_col = self.target_letter.encode()
+            return (match.group(1) + match.group(2) + match.group(3) + b':' + last_col + last_row + match.group(6))
+        return _DIMENSION_RE.sub(widen, head, count=1)
+
+    def _iter_spliced_sheet(self, stream, results: Iterator[str], header_value: Optional[str]) -> Iterator[bytes]:
+        buffer = b''
+        eof = False
+
+        def fill():
+            nonlocal buffer, eof
+            block = stream.read(_READ_BLOCK)
+            if not block:
+                eof = True
+            buffer += block
+
+        # 1) Everything up to and including <sheetData>
+        while True:
+            match = _SHEET_DATA_OPEN_RE.search(buffer)
+            if match or eof:
+                break
+            fill()
+        if not match:
+            yield buffer
+            return
+        prefix = match.group(1)
+        yield self._patch_dimension(buffer[:match.start()])
+        if match.group(2) == b'/':
+            # Empty sheet - nothing to splice
+            yield buffer[match.start():]
+            while not eof:
+                buffer = b''
+                fill()
+                yield buffer
+            return
+        yield buffer[match.start():match.end()]
+        buffer = buffer[match.end():]
+
+        # 2) Rows, streamed one at a time; `pos` walks the buffer so rows are never re-copied
+        close_sheet_data = b'</' + prefix + b'sheetData>'
+        close_row = b'</' + prefix + b'row>'
+        expected_row = 1
+        pos = 0
+        while True:
+            row_match = _ROW_OPEN_RE.search(buffer, pos)
+            limit = row_match.start() if row_match else len(buffer)
+            if buffer.find(close_sheet_data, pos, limit) != -1:
+                break
+            if row_match is None:
+                if eof:
+                    break
+                buffer = buffer[pos:]
+                pos = 0
+                fill()
+                continue
+            if row_match.group(2) == b'/':
+                row_end = row_match.end()
+            else:
+                close_at = buffer.find(close_row, row_match.end())
+                if close_at == -1:
+                    if eof:
+                        break
+                    buffer = buffer[pos:]
+                    pos = 0
+                    fill()
+                    continue
+                row_end = close_at + len(close_row)
+            number_match = _ROW_NUM_RE.search(row_match.group(1))
+            row_number = int(number_match.group(1)) if number_match else expected_row
+            # Rows absent from the XML still consume a result (readers yield them as empty rows)
+            while expected_row < row_number:
+                value = next(results, '') if expected_row >= 2 else header_value
+                if value:
+                    yield (b'<' + prefix + b'row r="%d">' % expected_row
+                           + self._cell_xml(prefix, self.target_letter, expected_row, value) + close_row)
+                if expected_row >= 2:
+                    self.rows_written += 1
+                expected_row += 1
+            expected_row = row_number + 1
+            yield buffer[pos:row_match.start()]
+            row_xml = buffer[row_match.start():row_end]
+            if row_number == 1:
+                if header_value is not None:
+                    row_xml = self._splice_row(row_xml, prefix, 1, header_value)
+            else:
+                row_xml = self._splice_row(row_xml, prefix, row_number, next(results, ''))
+                self.rows_written += 1
+            yield row_xml
+            pos = row_end
+
+        # 3) Tail after </sheetData> passes through untouched
+        yield buffer[pos:]
+        while not eof:
+            buffer = b''
+            fill()
+            yield buffer
+
+    def write(self, output_path: str, results: Iterable[str], keylog_col_index: int = -1,
+              header: str = 'keylog', compresslevel: int = 6) -> Dict[str, float]:
+        """Copy the package to `output_path`, splicing `results` (one per data row) into the keylog column"""
+        start = time.time()
+        if keylog_col_index is not None and keylog_col_index >= 0:
+            self.target_col = keylog_col_index
+            header_value = None
+        else:
+            self.target_col = len(self.header)
+            header_value = header
+        self.target_letter = column_letter_from_index(self.target_col)
+        results_iter = iter(results)
+        self.rows_written = 0
+        tmp_path = f"{output_path}.splice_tmp"
+        try:
+            with zipfile.ZipFile(self.source_path) as zin:
+                names = zin.namelist()
+                with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED,
+                                     compresslevel=compresslevel, allowZip64=True) as zout:
+                    # styles first so the keylog style id is known before the sheet is written
+                    if 'xl/styles.xml' in names:
+                        zout.writestr('xl/styles.xml', self._patch_styles(zin.read('xl/styles.xml')))
+                    for info in zin.infolist():
+                        name = info.filename
+                        if name == 'xl/styles.xml' or name == 'xl/calcChain.xml':
+                            continue
+                        if name in ('[Content_Types].xml', 'xl/_rels/workbook.xml.rels'):
+                            zout.writestr(name, self._drop_calc_chain(zin.read(name)))
+                        elif name == self.sheet_member:
+                            with zin.open(info) as src, zout.open(name, 'w', force_zip64=True) as dst:
+                                for piece in self._iter_spliced_sheet(src, results_iter, header_value):
+                                    dst.write(piece)
+                        else:
+                            with zin.open(info) as src, zout.open(name, 'w', force_zip64=True) as dst:
+                                shutil.copyfileobj(src, dst, _READ_BLOCK)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            # No half-written package next to the output
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        elapsed = time.time() - start
+        return {
+            'rows_written': self.rows_written,
+            'seconds': elapsed,
+            'rows_per_sec': self.rows_written / elapsed if elapsed > 0 else 0.0,
+            'keylog_column': self.target_letter
+        }
@@ -0,0 +1,242 @@
+"""Minimal streaming .xlsx writer for result files.
+
+Result files are simple: a few sheets of strings (plus the odd number), one
+styled keylog column. ``StreamingXlsxWriter`` writes each sheet's XML straight
+into a ``zipfile`` member as rows arrive - inline strings (no shared-string
+table to build in memory), a fixed two-entry style table (default + Flexio
+keylog) and a configurable deflate level. The package parts (workbook,
+relationships, content types, styles) are written on ``save()``.
+
+It mirrors the small part of the openpyxl write-only API the exporters use
+(``create_sheet`` / ``append`` / ``save`` / ``close``), so callers can switch
+engines without other changes.
+"""
+import math
+import numbers
+import zipfile
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .output_styles import KEYLOG_FONT_SPEC, KEYLOG_STYLE
+from .xlsx_fast_reader import column_letter_from_index
+from .xlsx_splice_writer import _escape_xml
+
+XLSX_WRITER_ENGINES = ('stream', 'openpyxl')
+DEFAULT_COMPRESSION_LEVEL = 6
+
+_FLUSH_ROWS = 1000
+_KEYLOG_STYLE_ID = 1
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+
+def _escape_attr(text: str) -> str:
+    return _escape_xml(text).replace('"', '&quot;')
+
+
+def _is_missing(value) -> bool:
+    """pd.NA / NaT / other missing scalars (Arrow-string and nullable columns) - written like None"""
+    try:
+        return pd.api.types.is_scalar(value) and bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _styles_xml() -> str:
+    keylog = KEYLOG_FONT_SPEC
+    bold = '<b/>' if keylog.get('bold') else ''
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<styleSheet xmlns="{_MAIN_NS}">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+        f'<font>{bold}<sz val="{keylog["size"]}"/><color rgb="FF{keylog["color"]}"/>'
+        f'<name val="{keylog["name"]}"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" applyFont="1"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="1" applyFont="1"/></cellXfs>'
+        f'<cellStyles count="2"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+        f'<cellStyle name="{KEYLOG_STYLE}" xfId="1"/></cellStyles>'
+        '</styleSheet>'
+    )
+
+
+class StreamingSheet:
+    """One worksheet being streamed; rows are buffered as XML text and flushed in blocks"""
+
+    def __init__(self, writer: 'StreamingXlsxWriter', title: str, stream,
+                 styled_columns: Sequence[int] = ()):
+        self.writer = writer
+        self.title = title
+        self._stream = stream
+        self._styled = frozenset(styled_columns)
+        self._letters: List[str] = []
+        self._pending: List[str] = []
+        self.rows_written = 0
+        self.finished = False
+
+    def _letter(self, col: int) -> str:
+        letters = self._letters
+        while len(letters) <= col:
+            letters.append(column_letter_from_index(len(letters)))
+        return letters[col]
+
+    def _cell_xml(self, ref: str, value, style: str) -> str:
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, numbers.Integral):
+            return f'<c r="{ref}"{style}><v>{int(value)}</v></c>'
+        if isinstance(value, numbers.Real):
+            if not math.isfinite(value):
+                return f'<c r="{ref}"{style}/>' if style else ''
+            return f'<c r="{ref}"{style}><v>{float(value)!r}</v></c>'
+        if not isinstance(value, str) and _is_missing(value):
+            return f'<c r="{ref}"{style}/>' if style else ''
+        text = value if isinstance(value, str) else str(value)
+        if self.writer.strings_to_numbers and text and '_' not in text:
+            try:
+                number = float(text)
+            except ValueError:
+                number = None
+            if number is not None and math.isfinite(number):
+                return f'<c r="{ref}"{style}><v>{number!r}</v></c>'
+        space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ''
+        return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{_escape_xml(text)}</t></is></c>'
+
+    def append(self, values: Sequence):
+        self.rows_written += 1
+        row_number = self.rows_written
+        cells = []
+        for col, value in enumerate(values):
+            style = f' s="{_KEYLOG_STYLE_ID}"' if col in self._styled else ''
+            if value is None or (isinstance(value, str) and not value):
+                if style:
+                    cells.append(f'<c r="{self._letter(col)}{row_number}"{style}/>')
+                continue
+            cells.append(self._cell_xml(f'{self._letter(col)}{row_number}', value, style))
+        self._pending.append(f'<row r="{row_number}">{"".join(cells)}</row>')
+        if len(self._pending) >= _FLUSH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._stream.write(''.join(self._pending).encode('utf-8'))
+            self._pending = []
+
+    def _finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self._flush()
+        self._stream.write(b'</sheetData></worksheet>')
+        self._stream.close()
+
+
+class StreamingXlsxWriter:
+    """
+    Write-only workbook streamed into a zip. Sheets are written one after another:
+    create_sheet() finishes the previous sheet. save() writes the package parts.
+    `strings_to_numbers` stores numeric-looking strings as numbers (like xlsxwriter's option).
+    """
+
+    def __init__(self, output_path: str, compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                 strings_to_numbers: bool = False):
+        if not 0 <= compression_level <= 9:
+            raise Exception(f"compression_level phải trong khoảng 0..9 (nhận {compression_level})")
+        self.output_path = output_path
+        self.strings_to_numbers = strings_to_numbers
+        self._zip = zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED,
+                                    compresslevel=compression_level)
+        self.sheets: List[StreamingSheet] = []
+        self._saved = False
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return [sheet.title for sheet in self.sheets]
+
+    def create_sheet(self, title: str, column_widths: Optional[Dict[int, float]] = None,
+                     styled_columns: Sequence[int] = ()) -> StreamingSheet:
+        """Start a new sheet; widths go before <sheetData>, so they are fixed here"""
+        if self._saved:
+            raise Exception("Workbook đã được lưu - không thể thêm sheet")
+        if self.sheets:
+            self.sheets[-1]._finish()
+        stream = self._zip.open(f'xl/worksheets/sheet{len(self.sheets) + 1}.xml', 'w', force_zip64=True)
+        cols = ''.join(f'<col min="{i + 1}" max="{i + 1}" width="{width}" customWidth="1"/>'
+                       for i, width in sorted((column_widths or {}).items()))
+        stream.write((
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<worksheet xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+            + (f'<cols>{cols}</cols>' if cols else '') + '<sheetData>').encode('utf-8'))
+        sheet = StreamingSheet(self, title[:31], stream, styled_columns)
+        self.sheets.append(sheet)
+        return sheet
+
+    def _write_package_parts(self):
+        count = len(self.sheets)
+        overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, count + 1))
+        self._zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'))
+        self._zip.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'))
+        sheets = ''.join(f'<sheet name="{_escape_attr(sheet.title)}" sheetId="{i}" r:id="rId{i}"/>'
+                         for i, sheet in enumerate(self.sheets, start=1))
+        self._zip.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>{sheets}</sheets></workbook>'))
+        rels = ''.join(f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                       for i in range(1, count + 1))
+        self._zip.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{_PKG_REL_NS}">{rels}'
+            f'<Relationship Id="rId{count + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>'))
+        self._zip.writestr('xl/styles.xml', _styles_xml())
+
+    def save(self, filename: str = None):
+        """Finish the last sheet and write the package parts (`filename` must be the constructor path)"""
+        if filename is not None and filename != self.output_path:
+            raise Exception(f"StreamingXlsxWriter chỉ ghi vào {self.output_path}")
+        if self._saved:
+            return
+        if not self.sheets:
+            self.create_sheet('Sheet1')
+        self.sheets[-1]._finish()
+        self._write_package_parts()
+        self._zip.close()
+        self._saved = True
+
+    def close(self):
+        """Release the zip handle; without save() the file is incomplete"""
+        if not self._saved:
+            if self.sheets and not self.sheets[-1].finished:
+                self.sheets[-1].finished = True
+                self.sheets[-1]._stream.close()
+            self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
+        self.close()
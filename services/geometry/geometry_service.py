@@ -1,5 +1,6 @@
-from typing import Dict, Any, List, Tuple, Union, Optional
+from typing import Dict, Any, List, Tuple, Union, Optional, Iterable, Iterator, Mapping, Sequence
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import os
 
@@ -7,7 +8,21 @@ from .models import Point2D, Point3D, Line3D, Plane, Circle, Sphere, BaseGeometr
 from .mapping_adapter import GeometryMappingAdapter
 from .excel_loader import GeometryExcelLoader
 from services.excel.excel_processor import ExcelProcessor
+from services.excel.compact_frames import row_group_codes
+from services.excel.row_result_cache import RowResultCache
+from services.excel.row_config import (ROW_CONFIG_COLUMNS, row_config_columns, resolve_row_settings, row_settings_error,
+                                      fanout_operations, fanout_value_operation, fanout_versions,
+                                      fanout_keylog_columns)
 from utils.config_loader import config_loader
+from .numeric_engine import compute_answers
+
+
+def _cell_text(value: Any) -> str:
+    """Cell value as the encoders see it: stripped text, "" for missing (same as extract_shape_data)"""
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
 
 class GeometryService:
     """Main service for geometry operations - Enhanced with large file support"""
@@ -36,6 +51,15 @@ class GeometryService:
         self.raw_data_A = {}
         self.raw_data_B = {}
         
+        # Row-cache stats of the last process_records generator run
+        self.last_records_stats: Dict[str, Any] = {}
+        # Per-settings field lookups for mixed batches (see GeometryRowFormatter)
+        self._formatters: Dict[Tuple, GeometryRowFormatter] = {}
+        # Keylog prefix per calculator version (version fan-out)
+        self._version_prefixes: Dict[str, str] = {}
+        # Append vectorized answer_* columns (distance, intersection, area, volume) to batch outputs
+        self.numeric_answers = bool(self.config.get('numeric_answers', False))
+        
         # Current state
         self.current_shape_A = ""
         self.current_shape_B = ""
@@ -96,6 +120,25 @@ class GeometryService:
             print(f"Warning: Could not load version config: {e}")
         
         return {"version": "fx799", "prefix": "wj"}
+
+    def get_version_prefix(self, version: str) -> str:
+        """Keylog prefix of a calculator version (its version config 'prefix', else 'wj')"""
+        prefix = self._version_prefixes.get(version)
+        if prefix is None:
+            try:
+                prefix = config_loader.load_version_config(version).get("prefix", "wj")
+            except Exception:
+                prefix = "wj"
+            self._version_prefixes[version] = prefix
+        return prefix
+
+    def keylogs_for_versions(self, keylog: str, versions: Sequence[str]) -> List[str]:
+        """One keylog per version by swapping the prefix; errors and blanks are repeated as-is"""
+        current = self.current_version_config.get("prefix", "wj")
+        if not keylog.startswith(current) or keylog.startswith("LỖI"):
+            return [keylog] * len(versions)
+        body = keylog[len(current):]
+        return [self.get_version_prefix(version) + body for version in versions]
     
     def set_current_shapes(self, shape_A: str, shape_B: str = ""):
         """Set current selected shapes"""
@@ -281,6 +324,18 @@ class GeometryService:
         result_A = self.thuc_thi_A(data_dict_A)
         result_B = self.thuc_thi_B(data_dict_B)
         return result_A, result_B
+
+    def encode_operations(self, data_dict_A: Dict[str, str], data_dict_B: Dict[str, str],
+                          operations: Sequence[str]) -> List[str]:
+        """Keylogs of one row for several operations: values are encoded once, only the tail codes differ"""
+        operations = list(operations)
+        self.current_operation = fanout_value_operation(operations)
+        self.thuc_thi_tat_ca(data_dict_A, data_dict_B)
+        results = []
+        for operation in operations:
+            self.current_operation = operation
+            results.append(self.generate_final_result())
+        return results
     
     # ========== EXCEL INTEGRATION - ENHANCED FOR LARGE FILES ==========
     def process_excel_batch(self, file_path: str, shape_a: str, shape_b: str, 
@@ -318,6 +373,64 @@ class GeometryService:
         except Exception as e:
             raise Exception(f"Lỗi xử lý Excel: {str(e)}")
     
+    def process_excel_multi_sheet(self, file_path: str, shape_a: str, shape_b: str,
+                                  operation: str, dimension_a: str, dimension_b: str,
+                                  output_path: str = None, sheet_names: List[str] = None,
+                                  max_workers: int = None) -> Dict[str, Any]:
+        """Process every (or the selected) sheet in parallel; results are written back per sheet"""
+        try:
+            if not output_path:
+                original_name = os.path.splitext(os.path.basename(file_path))[0]
+                output_path = f"{original_name}_sheets_encoded_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                output_path = os.path.join(os.path.dirname(file_path), output_path)
+            return self.excel_processor.large_file_processor.process_large_excel_multi_sheet(
+                file_path, shape_a, shape_b, operation, dimension_a, dimension_b,
+                output_path, sheet_names, max_workers
+            )
+        except Exception as e:
+            raise Exception(f"Lỗi xử lý Excel nhiều sheet: {str(e)}")
+    
+    def process_excel_operations(self, file_path: str, shape_a: str, shape_b: str, operations: Sequence[str],
+                                 dimension_a: str, dimension_b: str, output_path: str = None,
+                                 progress_callback: callable = None,
+                                 versions: Sequence[str] = None) -> Tuple[str, int, int]:
+        """
+        Operation fan-out for a file: one keylog_<operation> column per requested operation
+        (and per version with `versions`), with each row's values encoded once.
+        Returns (output file, success rows, error rows).
+        """
+        try:
+            operations = fanout_operations(operations)
+            versions = fanout_versions(versions) if versions else None
+            if not output_path:
+                original_name = os.path.splitext(os.path.basename(file_path))[0]
+                output_path = f"{original_name}_operations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                output_path = os.path.join(os.path.dirname(file_path), output_path)
+
+            is_large, file_info = self.excel_processor.is_large_file(file_path)
+            if is_large:
+                print(f"🔥 LARGE FILE DETECTED: {file_info['file_size_mb']:.1f}MB, {file_info['estimated_rows']:,} rows")
+                success_count, error_count, output_file = \
+                    self.excel_processor.large_file_processor.process_large_excel_operations(
+                        file_path, shape_a, shape_b, operations, dimension_a, dimension_b,
+                        output_path, progress_callback, versions)
+                return output_file, success_count, error_count
+
+            df = self.excel_processor.read_excel_data(file_path)
+            keylogs = self.process_records_operations(df, shape_a, shape_b, operations, dimension_a, dimension_b,
+                                                      versions=versions)
+            failed = keylogs.apply(lambda column: column.str.startswith("LỖI:")).any(axis=1)
+            error_count = int(failed.sum())
+            if progress_callback:
+                progress_callback(100.0, len(df) - error_count, len(df), error_count)
+            print(f"🔀 Fan-out: {len(df):,} rows x {len(keylogs.columns)} keylog columns")
+            output_file = self.excel_processor.export_keylog_columns(
+                df, {name: keylogs[name].tolist() for name in keylogs.columns}, output_path)
+            return output_file, len(df) - error_count, error_count
+
+        except Exception as e:
+            raise Exception(f"Lỗi xử lý nhiều phép toán: {str(e)}")
+
     def _process_excel_normal(self, file_path: str, shape_a: str, shape_b: str,
                             operation: str, dimension_a: str, dimension_b: str,
                             output_path: str = None, progress_callback: callable = None) -> Tuple[List[str], str, int, int]:
@@ -325,6 +438,16 @@ class GeometryService:
         try:
             # Read and validate Excel file
             df = self.excel_processor.read_excel_data(file_path)
+            if row_config_columns(df.columns):
+                encoded_results, processed_count, error_count = self._encode_mixed_frame(
+                    df, (shape_a, shape_b or None, operation, dimension_a, dimension_b), progress_callback)
+                if not output_path:
+                    original_name = os.path.splitext(os.path.basename(file_path))[0]
+                    output_path = f"{original_name}_encoded_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                    output_path = os.path.join(os.path.dirname(file_path), output_path)
+                output_file = self.excel_processor.export_results(df, encoded_results, output_path)
+                return encoded_results, output_file, processed_count, error_count
+
             is_valid, missing_cols = self.excel_processor.validate_excel_structure(df, shape_a, shape_b)
 
             if not is_valid:
@@ -334,22 +457,15 @@ class GeometryService:
             processed_count = 0
             error_count = 0
             total_rows = len(df)
+            # Rows with identical input cells share a group code and are encoded once
+            row_codes = row_group_codes(df, self.excel_processor.input_columns(shape_a, shape_b), key=_cell_text)
+            row_cache = RowResultCache()
 
             # Process each row
-            for index, row in df.iterrows():
+            for (index, row), code in zip(df.iterrows(), row_codes):
                 try:
-                    # Set current state for this row
-                    self.set_current_shapes(shape_a, shape_b)
-                    self.set_kich_thuoc(dimension_a, dimension_b)
-                    self.current_operation = operation
-
-                    # Extract data for both groups
-                    data_a = self.excel_processor.extract_shape_data(row, shape_a, 'A')
-                    data_b = self.excel_processor.extract_shape_data(row, shape_b, 'B') if shape_b else {}
-
-                    # Process data
-                    self.thuc_thi_tat_ca(data_a, data_b)
-                    result = self.generate_final_result()
+                    result = row_cache.get_or_compute(int(code), lambda: self._encode_excel_row(
+                        row, shape_a, shape_b, operation, dimension_a, dimension_b))
 
                     encoded_results.append(result)
                     processed_count += 1
@@ -371,13 +487,165 @@ class GeometryService:
                 output_path = f"{original_name}_encoded_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
                 output_path = os.path.join(os.path.dirname(file_path), output_path)
 
+            if row_cache.hits:
+                print(row_cache.summary_line())
+
             # Export results
+            df = self._with_numeric_answers(df, shape_a, shape_b, operation, dimension_a, dimension_b)
             output_file = self.excel_processor.export_results(df, encoded_results, output_path)
 
             return encoded_results, output_file, processed_count, error_count
 
         except Exception as e:
             raise Exception(f"Lỗi xử lý file Excel thông thường: {str(e)}")
+
+    def _encode_mixed_frame(self, df: pd.DataFrame, defaults: Tuple,
+                            progress_callback: callable = None) -> Tuple[List[str], int, int]:
+        """Sheet with per-row config columns: one grouped pass, (results, success, errors)"""
+        encoded_results = self._process_record_frame(df, defaults).tolist()
+        error_count = sum(1 for result in encoded_results if result.startswith("LỖI:"))
+        processed_count = len(encoded_results) - error_count
+        print(f"🧩 Mixed batch: {len(df):,} rows encoded with per-row configuration columns")
+        if progress_callback:
+            progress_callback(100.0, processed_count, len(df), error_count)
+        return encoded_results, processed_count, error_count
+
+    def compute_numeric_answers(self, df: pd.DataFrame, shape_a: str, shape_b: Optional[str], operation: str,
+                                dimension_a: str = "3", dimension_b: str = "3") -> pd.DataFrame:
+        """
+        Numeric answers for a whole batch frame in one vectorized pass (see numeric_engine):
+        answer_* columns on df's index, none when the combination is not covered.
+        """
+        try:
+            return compute_answers(df, shape_a, shape_b or None, operation, dimension_a, dimension_b)
+        except Exception as e:
+            raise Exception(f"Lỗi tính đáp số: {str(e)}")
+
+    def _with_numeric_answers(self, df: pd.DataFrame, shape_a: str, shape_b: Optional[str], operation: str,
+                              dimension_a: str, dimension_b: str) -> pd.DataFrame:
+        """df with answer_* columns appended before export (numeric_answers config)"""
+        if not self.numeric_answers:
+            return df
+        answers = self.compute_numeric_answers(df, shape_a, shape_b, operation, dimension_a, dimension_b)
+        if answers.columns.empty:
+            print(f"ℹ️ Không có đáp số số học cho {operation}: {shape_a} - {shape_b or ''}")
+            return df
+        print(f"🧮 Numeric answers: {', '.join(answers.columns)} ({len(df):,} rows, vectorized)")
+        return df.drop(columns=[col for col in answers.columns if col in df.columns]).join(answers)
+
+    def _encode_excel_row(self, row: pd.Series, shape_a: str, shape_b: str, operation: str,
+                          dimension_a: str, dimension_b: str) -> str:
+        """Encode one DataFrame row with the batch settings (state is reset for every row)"""
+        self.set_current_shapes(shape_a, shape_b)
+        self.set_kich_thuoc(dimension_a, dimension_b)
+        self.current_operation = operation
+        data_a = self.excel_processor.extract_shape_data(row, shape_a, 'A')
+        data_b = self.excel_processor.extract_shape_data(row, shape_b, 'B') if shape_b else {}
+        self.thuc_thi_tat_ca(data_a, data_b)
+        return self.generate_final_result()
+    
+    # ========== IN-MEMORY BATCHES (no xlsx round-trip) ==========
+    def process_records(self, records: Union[pd.DataFrame, Iterable[Mapping[str, Any]]], shape_a: str,
+                        shape_b: Optional[str], operation: str, dimension_a: str, dimension_b: str,
+                        max_cached: int = 200_000) -> Union[pd.Series, Iterator[str]]:
+        """
+        Encode rows already in memory, keyed by the same Excel column names as the batch files
+        (data_A, P1_a, ...). A DataFrame returns a 'keylog' Series on its index (each distinct
+        input encoded once); any other iterable of mappings (dicts, pandas rows) returns a
+        generator yielding one keylog per record, with memory bounded by `max_cached` results.
+        Optional shape_A / shape_B / operation / dim columns override the given settings per row.
+        Rows that fail yield "LỖI: <message>" like the file paths.
+        """
+        defaults = (shape_a, shape_b or None, operation, dimension_a, dimension_b)
+        if isinstance(records, pd.DataFrame):
+            return pd.Series(self._process_record_frame(records, defaults), index=records.index, name='keylog')
+        return self._iter_record_keylogs(records, defaults, max_cached)
+
+    def process_records_operations(self, records: Union[pd.DataFrame, Iterable[Mapping[str, Any]]], shape_a: str,
+                                   shape_b: Optional[str], operations: Sequence[str], dimension_a: str,
+                                   dimension_b: str, max_cached: int = 200_000,
+                                   versions: Sequence[str] = None) -> Union[pd.DataFrame, Iterator[List[str]]]:
+        """
+        Operation fan-out of process_records: each row's values are encoded once and one keylog
+        per operation is emitted. A DataFrame returns a frame with one keylog_<operation> column
+        per operation; other iterables yield a list of keylogs per record. shape_A / shape_B / dim
+        columns still apply per row; an operation column is ignored (every row gets all operations).
+        `versions` also fans out over calculator versions (only the prefix differs); column names
+        come from fanout_keylog_columns (keylog_<version> for a single operation).
+        """
+        operations = fanout_operations(operations)
+        versions = fanout_versions(versions) if versions else None
+        defaults = (shape_a, shape_b or None, fanout_value_operation(operations), dimension_a, dimension_b)
+        if isinstance(records, pd.DataFrame):
+            return pd.DataFrame(self._process_record_frame(records, defaults, operations, versions),
+                                index=records.index, columns=fanout_keylog_columns(operations, versions))
+        return self._iter_record_keylogs(records, defaults, max_cached, operations, versions)
+
+    def _formatter(self, settings: Tuple) -> 'GeometryRowFormatter':
+        """Compiled field lookups per settings tuple, built once per service"""
+        formatter = self._formatters.get(settings)
+        if formatter is None:
+            formatter = self._formatters[settings] = GeometryRowFormatter(self, settings)
+        return formatter
+
+    def settings_error(self, settings: Tuple) -> Optional[str]:
+        """Unknown shape / operation / dimension in a settings tuple (per-row config cells are free text)"""
+        return row_settings_error(settings, self.geometry_data["default_group_a_tcodes"],
+                                  self.geometry_data["pheptoan_map"])
+
+    def _process_record_frame(self, df: pd.DataFrame, defaults: Tuple, operations: List[str] = None,
+                              versions: List[str] = None) -> np.ndarray:
+        """Positional results: one keylog per row, or rows x fan-out columns when fanning out"""
+        config_columns = [name for name in row_config_columns(df.columns) if not (operations and name == 'operation')]
+        if not config_columns:
+            return self._encode_frame_group(df, self._formatter(defaults), strict=True, operations=operations,
+                                            versions=versions)
+        # Group rows by resolved settings, encode each group, scatter results back in row order
+        keys = list(zip(*(df[name].map(_cell_text) for name in config_columns)))
+        resolved = {key: resolve_row_settings(dict(zip(config_columns, key)), defaults) for key in dict.fromkeys(keys)}
+        groups: Dict[Tuple, List[int]] = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(resolved[key], []).append(position)
+        results = np.empty(_fanout_shape(len(df), operations, versions), dtype=object)
+        for group_settings, positions in groups.items():
+            group = df.iloc[positions]
+            results[positions] = self._encode_frame_group(group, self._formatter(group_settings),
+                                                          operations=operations, versions=versions)
+        return results
+
+    def _encode_frame_group(self, df: pd.DataFrame, formatter: 'GeometryRowFormatter', strict: bool = False,
+                            operations: List[str] = None, versions: List[str] = None) -> np.ndarray:
+        shape = _fanout_shape(len(df), operations, versions)
+        if formatter.error:
+            return np.full(shape, f"LỖI: {formatter.error}", dtype=object)
+        missing = [column for column in formatter.columns if column not in df.columns]
+        if missing:
+            message = f"Thiếu các cột: {', '.join(missing)}"
+            if strict:
+                raise Exception(message)
+            return np.full(shape, f"LỖI: {message}", dtype=object)
+        # Encode one representative row per distinct input combination, then broadcast
+        # Grouped on the cell texts the encoder sees (1 / 1.0 / True are equal but encode differently)
+        codes = row_group_codes(df, formatter.columns, key=_cell_text)
+        _, first_positions, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        distinct = df.iloc[first_positions][formatter.columns]
+        results = np.empty(_fanout_shape(len(distinct), operations, versions), dtype=object)
+        for position, values in enumerate(distinct.itertuples(index=False, name=None)):
+            results[position] = formatter.encode(dict(zip(formatter.columns, map(_cell_text, values))),
+                                                 operations, versions)
+        return results[inverse.ravel()]
+
+    def _iter_record_keylogs(self, records: Iterable[Mapping[str, Any]], defaults: Tuple, max_cached: int,
+                             operations: List[str] = None, versions: List[str] = None) -> Iterator[Union[str, List[str]]]:
+        row_cache = RowResultCache(max_cached)
+        config_names = [name for name in ROW_CONFIG_COLUMNS if not (operations and name == 'operation')]
+        for record in records:
+            settings = resolve_row_settings({name: _cell_text(record.get(name)) for name in config_names}, defaults)
+            formatter = self._formatter(settings)
+            values = tuple(_cell_text(record.get(column)) for column in formatter.columns)
+            yield row_cache.get_or_compute((settings, values), lambda: formatter.encode(
+                dict(zip(formatter.columns, values)), operations, versions))
+        self.last_records_stats = row_cache.stats()
     
     def process_excel_batch_chunked(self, file_path: str, shape_a: str, shape_b: str,
                                   operation: str, dimension_a: str, dimension_b: str,
@@ -414,40 +682,42 @@ class GeometryService:
     def _process_excel_chunked_normal(self, file_path: str, shape_a: str, shape_b: str,
                                     operation: str, dimension_a: str, dimension_b: str,
                                     chunksize: int, progress_callback: callable = None) -> Tuple[List[str], str, int, int]:
-        """Normal chunked processing for medium files"""
+        """Normal chunked processing for medium files - the workbook is parsed exactly once"""
         try:
-            # Get total rows for progress calculation
-            total_rows = self.excel_processor.get_total_rows(file_path)
+            # Single parse: the same frame drives validation, row count, chunking and export
+            df = self.excel_processor.read_excel_data(file_path)
+            original_name = os.path.splitext(os.path.basename(file_path))[0]
+            if row_config_columns(df.columns):
+                all_results, processed_count, error_count = self._encode_mixed_frame(
+                    df, (shape_a, shape_b or None, operation, dimension_a, dimension_b), progress_callback)
+                output_path = f"{original_name}_chunked_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                output_path = os.path.join(os.path.dirname(file_path), output_path)
+                output_file = self.excel_processor.export_results(df, all_results, output_path)
+                return all_results, output_file, processed_count, error_count
+
+            is_valid, missing_cols = self.excel_processor.validate_excel_structure(df, shape_a, shape_b)
+            if not is_valid:
+                raise Exception(f"Thiếu các cột: {', '.join(missing_cols)}")
+
+            total_rows = len(df)
             processed_count = 0
             error_count = 0
             all_results = []
-            
-            # Validate structure first
-            df_sample = self.excel_processor.read_excel_data(file_path)
-            is_valid, missing_cols = self.excel_processor.validate_excel_structure(df_sample, shape_a, shape_b)
-            if not is_valid:
-                raise Exception(f"Thiếu các cột: {', '.join(missing_cols)}")
+            row_codes = row_group_codes(df, self.excel_processor.input_columns(shape_a, shape_b), key=_cell_text)
+            row_cache = RowResultCache()
+            position = 0
 
-            # Process in chunks
-            chunk_iterator = self.excel_processor.read_excel_data_chunked(file_path, chunksize)
+            # Process in chunks (slices of the loaded frame, no re-read)
+            chunk_iterator = self.excel_processor.read_excel_data_chunked(file_path, chunksize, df=df)
 
             for chunk_idx, chunk_df in enumerate(chunk_iterator):
                 chunk_results = []
 
-                # Process each row in chunk
-                for index, row in chunk_df.iterrows():
+                # Process each row in chunk (codes are positional over the whole frame)
+                for (index, row), code in zip(chunk_df.iterrows(), row_codes[position:position + len(chunk_df)]):
                     try:
-                        # Set current state
-                        self.set_current_shapes(shape_a, shape_b)
-                        self.set_kich_thuoc(dimension_a, dimension_b)
-                        self.current_operation = operation
-
-                        # Extract and process data
-                        data_a = self.excel_processor.extract_shape_data(row, shape_a, 'A')
-                        data_b = self.excel_processor.extract_shape_data(row, shape_b, 'B') if shape_b else {}
-
-                        self.thuc_thi_tat_ca(data_a, data_b)
-                        result = self.generate_final_result()
+                        result = row_cache.get_or_compute(int(code), lambda: self._encode_excel_row(
+                            row, shape_a, shape_b, operation, dimension_a, dimension_b))
 
                         chunk_results.append(result)
                         processed_count += 1
@@ -462,19 +732,17 @@ class GeometryService:
                         progress_callback(progress, processed_count, total_rows, error_count)
 
                 all_results.extend(chunk_results)
+                position += len(chunk_df)
 
-                # Memory cleanup after each chunk
-                del chunk_df
-                import gc
-                gc.collect()
+            if row_cache.hits:
+                print(row_cache.summary_line())
 
-            # Export final results
-            original_name = os.path.splitext(os.path.basename(file_path))[0]
+            # Export final results from the frame already in memory
             output_path = f"{original_name}_chunked_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             output_path = os.path.join(os.path.dirname(file_path), output_path)
 
-            final_df = self.excel_processor.read_excel_data(file_path)
-            output_file = self.excel_processor.export_results(final_df, all_results, output_path)
+            df = self._with_numeric_answers(df, shape_a, shape_b, operation, dimension_a, dimension_b)
+            output_file = self.excel_processor.export_results(df, all_results, output_path)
 
             return all_results, output_file, processed_count, error_count
 
@@ -496,6 +764,9 @@ class GeometryService:
                 
                 # Use large file validation
                 validation_result = self.excel_processor.validate_large_file_structure(file_path, shape_a, shape_b)
+                # Full-file vectorized data checks: bad rows are known before encoding starts
+                quality_info = (self.excel_processor.validate_large_file_data(file_path, shape_a, shape_b)
+                                if validation_result['valid'] else {'note': 'Structure invalid - data not checked'})
                 
                 return {
                     'valid': validation_result['valid'],
@@ -507,7 +778,7 @@ class GeometryService:
                         'recommended_chunk_size': large_file_info['recommended_chunk_size']
                     },
                     'structure_issues': validation_result.get('missing_columns', []),
-                    'quality_issues': {'note': 'Large file - quality check limited to structure only'},
+                    'quality_issues': quality_info,
                     'ready_for_processing': validation_result['valid'],
                     'processing_recommendation': 'Use large file processor with chunking'
                 }
@@ -543,8 +814,9 @@ class GeometryService:
             df = pd.DataFrame(data)
 
             # Create Excel with multiple sheets
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Geometry Data', index=False)
+            with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+                # Main sheet is written already formatted (column formats)
+                self.excel_processor._write_results_sheet(writer.book, 'Geometry Data', df)
 
                 # Add summary sheet
                 summary_data = self._prepare_summary_data()
@@ -557,7 +829,7 @@ class GeometryService:
             return output_path
 
         except ImportError:
-            raise Exception("Thư viện openpyxl chưa được cài đặt. Vui lòng cài đặt bằng lệnh: pip install openpyxl")
+            raise Exception("Thư viện xlsxwriter chưa được cài đặt. Vui lòng cài đặt bằng lệnh: pip install xlsxwriter")
         except Exception as e:
             raise Exception(f"Lỗi xuất Excel: {str(e)}")
     
@@ -643,22 +915,13 @@ class GeometryService:
         return summary
     
     def _format_export_worksheets(self, writer, main_df, summary_df):
-        """Format export worksheets"""
+        """Format export worksheets (the main sheet is formatted as it is written)"""
         try:
-            # Format main sheet
-            main_ws = writer.sheets['Geometry Data']
-            self.excel_processor._format_results_worksheet(main_ws, main_df)
-            
-            # Format summary sheet
+            # Format summary sheet header
             summary_ws = writer.sheets['Summary']
-            from openpyxl.styles import Font, PatternFill
-            header_font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-            header_fill = PatternFill(start_color='4CAF50', end_color='4CAF50', fill_type='solid')
-            
-            for col in range(1, len(summary_df.columns) + 1):
-                cell = summary_ws.cell(row=1, column=col)
-                cell.font = header_font
-                cell.fill = header_fill
+            header_format = writer.book.add_format({'font_name': 'Arial', 'font_size': 12, 'bold': True,
+                                                    'font_color': '#FFFFFF', 'bg_color': '#4CAF50'})
+            summary_ws.write_row(0, 0, [str(col) for col in summary_df.columns], header_format)
                 
         except Exception as e:
             print(f"Warning: Could not format export worksheets: {e}")
@@ -892,6 +1155,10 @@ class GeometryService:
         """Get comprehensive Excel file information - Enhanced with large file detection"""
         return self.excel_processor.get_file_info(file_path)
     
+    def preview_excel_file(self, file_path: str, rows: int = 5) -> Dict[str, Any]:
+        """Header, first rows, row estimate and detected shapes - bounded time for the import button"""
+        return self.excel_processor.preview_file(file_path, rows)
+    
     def validate_excel_file_for_geometry(self, file_path: str, shape_a: str, shape_b: str = None) -> Dict[str, Any]:
         """Validate Excel file for geometry processing - Enhanced for large files"""
         return self.validate_excel_file(file_path, shape_a, shape_b)
@@ -915,3 +1182,53 @@ class GeometryService:
             }
         except Exception as e:
             return {'error': f'Không thể phân tích file: {str(e)}'}
+
+
+def _fanout_shape(rows: int, operations: Optional[List[str]], versions: Optional[List[str]]):
+    """Result array shape: rows, or rows x (operations x versions) when fanning out"""
+    if not operations:
+        return rows
+    return rows, len(operations) * len(versions or [None])
+
+
+class GeometryRowFormatter:
+    """One batch configuration compiled once: settings plus field -> Excel column lookups"""
+
+    def __init__(self, service: GeometryService, settings: Tuple):
+        self.service = service
+        self.settings = settings
+        self.error = service.settings_error(settings)
+        shape_a, shape_b = settings[0], settings[1]
+        self.fields_a = service.excel_processor.shape_fields(shape_a, 'A') if not self.error else {}
+        self.fields_b = service.excel_processor.shape_fields(shape_b, 'B') if shape_b and not self.error else {}
+        self.columns = list(dict.fromkeys(list(self.fields_a.values()) + list(self.fields_b.values())))
+
+    def encode(self, values: Mapping[str, str], operations: List[str] = None,
+               versions: List[str] = None) -> Union[str, List[str]]:
+        """
+        Keylog for one row's stripped cell texts (by column), or one keylog per operation when
+        `operations` is given (values encoded once), times each of `versions` (prefix swapped).
+        Errors become "LỖI: ..."
+        """
+        service = self.service
+        shape_a, shape_b, operation, dimension_a, dimension_b = self.settings
+        data_a = {field: values[column] for field, column in self.fields_a.items()}
+        data_b = {field: values[column] for field, column in self.fields_b.items()}
+        try:
+            if self.error:
+                raise Exception(self.error)
+            service.set_current_shapes(shape_a, shape_b)
+            service.set_kich_thuoc(dimension_a, dimension_b)
+            if operations:
+                keylogs = service.encode_operations(data_a, data_b, operations)
+                if versions:
+                    return [keylog for per_operation in keylogs
+                            for keylog in service.keylogs_for_versions(per_operation, versions)]
+                return keylogs
+            service.current_operation = operation
+            service.thuc_thi_tat_ca(data_a, data_b)
+            return service.generate_final_result()
+        except Exception as e:
+            if operations:
+                return [f"LỖI: {str(e)}"] * (len(operations) * len(versions or [None]))
+            return f"LỖI: {str(e)}"
@@ -0,0 +1,205 @@
+"""Vectorized numeric answers for geometry batches.
+
+``GeometryService`` only encodes keylogs; answer keys need the actual values.
+This engine parses the same input columns (``SHAPE_FIELDS``) into float
+arrays once per batch / chunk and evaluates an operation over whole columns
+with NumPy - no per-row Python loop:
+
+- Khoảng cách: point-point, point-line, point-plane
+- Tương giao: line-plane (point), plane-plane (line: point + direction),
+  sphere-plane (circle: center + radius)
+- Diện tích: circle area, sphere surface; Thể tích: sphere volume
+
+Results come back as ``answer_*`` columns. Cells that are blank or not plain
+numbers (expressions such as ``sqrt(2)`` are left to the keylog encoder) and
+degenerate cases (parallel line/plane, parallel planes, plane missing the
+sphere) give NaN, written as empty cells.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.excel.large_file_processor import SHAPE_FIELDS
+
+ANSWER_PREFIX = "answer_"
+ANSWER_DECIMALS = 10
+_EPS = 1e-12
+
+Group = Dict[str, np.ndarray]
+
+
+def parse_components(values: pd.Series, count: int) -> np.ndarray:
+    """
+    (n, count) floats from "x,y,z" cells: spaces removed, extra parts dropped and missing ones
+    padded with 0 (as cap_nhat_ket_qua does). Blank or non-numeric cells give NaN.
+    """
+    text = values.astype("string").fillna("").str.replace(" ", "", regex=False)
+    result = np.full((len(text), count), np.nan)
+    if len(text) == 0:
+        return result
+    parts = text.str.split(",", expand=True).reindex(columns=range(count))
+    for position in range(count):
+        column = parts[position].fillna("0")
+        result[:, position] = pd.to_numeric(column, errors="coerce").to_numpy(float)
+    result[(text == "").to_numpy(bool)] = np.nan
+    return result
+
+
+def parse_scalar(values: pd.Series) -> np.ndarray:
+    text = values.astype("string").fillna("").str.strip()
+    return pd.to_numeric(text.where(text != ""), errors="coerce").to_numpy(float)
+
+
+def _pad3(points: np.ndarray) -> np.ndarray:
+    if points.shape[1] >= 3:
+        return points[:, :3]
+    return np.hstack([points, np.zeros((len(points), 3 - points.shape[1]))])
+
+
+def _dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", a, b)
+
+
+def read_group(df: pd.DataFrame, shape: str, group: str, dimension: str = "3") -> Group:
+    """Float arrays of one shape group ('A' / 'B') from its Excel columns (absent columns read blank)"""
+    fields = dict(SHAPE_FIELDS.get((group, shape), []))
+
+    def cells(field: str) -> pd.Series:
+        column = fields.get(field)
+        if column is None or column not in df.columns:
+            return pd.Series("", index=df.index, dtype="string")
+        return df[column]
+
+    suffix = "1" if group == "A" else "2"
+    if shape == "Điểm":
+        return {"point": _pad3(parse_components(cells("point_input"), 2 if str(dimension) == "2" else 3))}
+    if shape == "Đường thẳng":
+        return {"point": parse_components(cells(f"line_A{suffix}"), 3),
+                "direction": parse_components(cells(f"line_X{suffix}"), 3)}
+    if shape == "Mặt phẳng":
+        coefficients = np.column_stack([parse_scalar(cells(f"plane_{name}")) for name in "abcd"])
+        return {"normal": coefficients[:, :3], "d": coefficients[:, 3]}
+    if shape == "Đường tròn":
+        return {"center": _pad3(parse_components(cells("circle_center"), 2)), "radius": parse_scalar(cells("circle_radius"))}
+    if shape == "Mặt cầu":
+        return {"center": parse_components(cells("sphere_center"), 3), "radius": parse_scalar(cells("sphere_radius"))}
+    return {}
+
+
+# ---------- operations: (group 1, group 2) -> named result columns ----------
+def _distance_point_point(first: Group, second: Group) -> Dict[str, np.ndarray]:
+    return {"distance": np.linalg.norm(first["point"] - second["point"], axis=1)}
+
+
+def _distance_point_line(point: Group, line: Group) -> Dict[str, np.ndarray]:
+    direction = line["direction"]
+    cross = np.cross(point["point"] - line["point"], direction)
+    length = np.linalg.norm(direction, axis=1)
+    return {"distance": np.where(length > _EPS, np.linalg.norm(cross, axis=1) / length, np.nan)}
+
+
+def _distance_point_plane(point: Group, plane: Group) -> Dict[str, np.ndarray]:
+    length = np.linalg.norm(plane["normal"], axis=1)
+    value = np.abs(_dot(plane["normal"], point["point"]) + plane["d"])
+    return {"distance": np.where(length > _EPS, value / length, np.nan)}
+
+
+def _intersect_line_plane(line: Group, plane: Group) -> Dict[str, np.ndarray]:
+    normal, direction = plane["normal"], line["direction"]
+    denominator = _dot(normal, direction)
+    t = -(_dot(normal, line["point"]) + plane["d"]) / np.where(np.abs(denominator) > _EPS, denominator, np.nan)
+    point = line["point"] + t[:, None] * direction
+    return {"x": point[:, 0], "y": point[:, 1], "z": point[:, 2]}
+
+
+def _intersect_plane_plane(first: Group, second: Group) -> Dict[str, np.ndarray]:
+    n1, n2 = first["normal"], second["normal"]
+    direction = np.cross(n1, n2)
+    length2 = _dot(direction, direction)
+    # Point on both planes: (c1 (n2 x u) + c2 (u x n1)) / |u|^2 with n.x = c = -d
+    point = ((-first["d"])[:, None] * np.cross(n2, direction) + (-second["d"])[:, None] * np.cross(direction, n1))
+    point = point / np.where(length2 > _EPS, length2, np.nan)[:, None]
+    direction = np.where((length2 > _EPS)[:, None], direction, np.nan)
+    return {"x": point[:, 0], "y": point[:, 1], "z": point[:, 2],
+            "ux": direction[:, 0], "uy": direction[:, 1], "uz": direction[:, 2]}
+
+
+def _intersect_sphere_plane(sphere: Group, plane: Group) -> Dict[str, np.ndarray]:
+    length = np.linalg.norm(plane["normal"], axis=1)
+    length = np.where(length > _EPS, length, np.nan)
+    unit = plane["normal"] / length[:, None]
+    signed = (_dot(plane["normal"], sphere["center"]) + plane["d"]) / length
+    center = sphere["center"] - signed[:, None] * unit
+    radius2 = sphere["radius"] ** 2 - signed ** 2
+    radius = np.sqrt(np.where(radius2 > -_EPS, np.maximum(radius2, 0.0), np.nan))
+    return {"x": center[:, 0], "y": center[:, 1], "z": center[:, 2], "r": radius}
+
+
+def _positive(radius: np.ndarray) -> np.ndarray:
+    return np.where(radius > 0, radius, np.nan)
+
+
+def _circle_area(circle: Group, _: Group) -> Dict[str, np.ndarray]:
+    return {"area": np.pi * _positive(circle["radius"]) ** 2}
+
+
+def _sphere_area(sphere: Group, _: Group) -> Dict[str, np.ndarray]:
+    return {"area": 4 * np.pi * _positive(sphere["radius"]) ** 2}
+
+
+def _sphere_volume(sphere: Group, _: Group) -> Dict[str, np.ndarray]:
+    return {"volume": 4 / 3 * np.pi * _positive(sphere["radius"]) ** 3}
+
+
+# (operation, shape of group 1, shape of group 2 or None) -> (function, result names)
+NUMERIC_OPERATIONS: Dict[Tuple[str, str, Optional[str]], Tuple[Callable, Tuple[str, ...]]] = {
+    ("Khoảng cách", "Điểm", "Điểm"): (_distance_point_point, ("distance",)),
+    ("Khoảng cách", "Điểm", "Đường thẳng"): (_distance_point_line, ("distance",)),
+    ("Khoảng cách", "Điểm", "Mặt phẳng"): (_distance_point_plane, ("distance",)),
+    ("Tương giao", "Đường thẳng", "Mặt phẳng"): (_intersect_line_plane, ("x", "y", "z")),
+    ("Tương giao", "Mặt phẳng", "Mặt phẳng"): (_intersect_plane_plane, ("x", "y", "z", "ux", "uy", "uz")),
+    ("Tương giao", "Mặt cầu", "Mặt phẳng"): (_intersect_sphere_plane, ("x", "y", "z", "r")),
+    ("Diện tích", "Đường tròn", None): (_circle_area, ("area",)),
+    ("Diện tích", "Mặt cầu", None): (_sphere_area, ("area",)),
+    ("Thể tích", "Mặt cầu", None): (_sphere_volume, ("volume",)),
+}
+_SINGLE_SHAPE = {operation for operation, _, second in NUMERIC_OPERATIONS if second is None}
+
+
+def _lookup(operation: str, shape_a: str, shape_b: Optional[str]):
+    """(function, names, swapped) for a batch combination, or None"""
+    if operation in _SINGLE_SHAPE:
+        entry = NUMERIC_OPERATIONS.get((operation, shape_a, None))
+        return (*entry, False) if entry else None
+    entry = NUMERIC_OPERATIONS.get((operation, shape_a, shape_b))
+    if entry:
+        return (*entry, False)
+    entry = NUMERIC_OPERATIONS.get((operation, shape_b, shape_a))
+    return (*entry, True) if entry else None
+
+
+def answer_columns(operation: str, shape_a: str, shape_b: Optional[str] = None) -> List[str]:
+    """answer_* column names for a combination ([] when the engine does not cover it)"""
+    entry = _lookup(operation, shape_a, shape_b)
+    return [f"{ANSWER_PREFIX}{name}" for name in entry[1]] if entry else []
+
+
+def compute_answers(df: pd.DataFrame, shape_a: str, shape_b: Optional[str], operation: str,
+                    dimension_a: str = "3", dimension_b: str = "3") -> pd.DataFrame:
+    """answer_* columns for every row of a batch frame (no columns when the combination is not covered)"""
+    entry = _lookup(operation, shape_a, shape_b)
+    if entry is None:
+        return pd.DataFrame(index=df.index)
+    function, names, swapped = entry
+    group_a = read_group(df, shape_a, "A", dimension_a)
+    group_b = read_group(df, shape_b, "B", dimension_b) if shape_b and operation not in _SINGLE_SHAPE else {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results = function(group_b, group_a) if swapped else function(group_a, group_b)
+    return pd.DataFrame({f"{ANSWER_PREFIX}{name}": np.round(results[name], ANSWER_DECIMALS) for name in names},
+                        index=df.index)
+
+
+def answer_texts(values: np.ndarray) -> List[str]:
+    """Cell text for streamed outputs: shortest float repr, "" for NaN"""
+    return ["" if np.isnan(value) else repr(float(value)) for value in values]
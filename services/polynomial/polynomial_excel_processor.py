@@ -2,13 +2,25 @@ from typing import List, Dict, Any
 import pandas as pd
 from datetime import datetime
 import os
+import time
+
+from services.excel.multi_sheet_runner import run_sheet_tasks, sheet_throughput, print_sheet_summary
+from services.excel.csv_io import is_delimited_path, read_delimited, write_dataframe_delimited, open_tabular_reader
+from services.excel.file_preview import preview_file, PREVIEW_ROWS
+from services.excel.row_result_cache import RowResultCache
+from services.excel.compact_frames import compact_string_columns, row_group_codes
+from services.excel.fingerprint_index import config_fingerprint
+from services.excel.persistent_keylog_cache import PersistentKeylogCache, mapping_files_fingerprint
+from services.excel.xlsx_stream_writer import StreamingXlsxWriter
+from services.excel.row_config import fanout_versions, version_keylog_columns
 
 from .polynomial_service import PolynomialService
 from .polynomial_excel_config_loader import get_required_columns_for_degree
 from .roots_formatting import simplify_roots_text
 
 class PolynomialExcelProcessor:
-    def __init__(self, degree: int, default_version: str = "fx799"):
+    def __init__(self, degree: int, default_version: str = "fx799", keylog_cache_path: str | None = None,
+                 versions: List[str] | None = None):
         if degree not in [2,3,4]:
             raise ValueError("Degree must be 2, 3, or 4")
         self.degree = degree
@@ -16,58 +28,221 @@ class PolynomialExcelProcessor:
         self.service = PolynomialService()
         self.service.set_degree(degree)
         self.service.set_version(default_version)
+        self.last_dedup_stats: Dict[str, Any] = {}
+        # Optional sqlite cache of solved rows shared across runs (see PersistentKeylogCache)
+        self.keylog_cache_path = keylog_cache_path
+        self.last_cache_stats: Dict[str, Any] = {}
+        # Version fan-out: one keylog_<version> column per version instead of 'keylog'
+        self.versions = fanout_versions(versions) if versions else []
+        self.keylog_columns = version_keylog_columns(self.versions) if self.versions else ["keylog"]
 
     def _resolve_input_sheet(self, xl: pd.ExcelFile) -> str:
+        return self._pick_input_sheet(xl.sheet_names)
+
+    @staticmethod
+    def _pick_input_sheet(sheet_names: List[str]) -> str:
         candidates = ["Input", "input", "INPUT", "Sheet1", "Data", "Sheet"]
-        sheets_lower = {s.lower(): s for s in xl.sheet_names}
+        sheets_lower = {s.lower(): s for s in sheet_names}
         for name in candidates:
             if name.lower() in sheets_lower:
                 return sheets_lower[name.lower()]
-        return xl.sheet_names[0]
+        return sheet_names[0]
 
-    def read_input(self, file_path: str) -> pd.DataFrame:
-        xl = pd.ExcelFile(file_path)
-        sheet_name = self._resolve_input_sheet(xl)
-        df = xl.parse(sheet_name)
+    def preview_file(self, file_path: str, rows: int = PREVIEW_ROWS) -> Dict[str, Any]:
+        """First rows of the input sheet + row estimate + required/missing coefficient columns (bounded time)"""
+        sheet_name = None
+        if not is_delimited_path(file_path):
+            with open_tabular_reader(file_path) as reader:
+                sheet_name = self._pick_input_sheet(reader.get_sheet_names())
+        preview = preview_file(file_path, rows, sheet_name)
+        columns = {c.lower() for c in preview['columns']}
+        required = get_required_columns_for_degree(self.degree)
+        preview['detected_mapping'] = {
+            'degree': self.degree,
+            'required_columns': required,
+            'missing_columns': [c for c in required if c not in columns],
+        }
+        return preview
+
+    def read_input(self, file_path: str, sheet_name: str = None) -> pd.DataFrame:
+        if is_delimited_path(file_path):
+            df = read_delimited(file_path)
+        else:
+            xl = pd.ExcelFile(file_path)
+            if sheet_name is None:
+                sheet_name = self._resolve_input_sheet(xl)
+            df = xl.parse(sheet_name)
         df.columns = [str(c).strip().lower() for c in df.columns]
         required = get_required_columns_for_degree(self.degree)
         missing = [c for c in required if c not in df.columns]
         if missing:
             raise ValueError(f"Input sheet missing required columns for degree {self.degree}: {missing}")
+        compact_string_columns(df, required)
         return df
 
     def process_batch(self, file_path: str) -> pd.DataFrame:
-        df = self.read_input(file_path).copy()
+        return self.process_dataframe(self.read_input(file_path))
+
+    def process_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
         required = get_required_columns_for_degree(self.degree)
-        for col in ["keylog", "roots", "real_roots_count", "status", "message"]:
+        for col in self.keylog_columns + ["roots", "real_roots_count", "status", "message"]:
             if col not in df.columns:
-                df[col] = ""
-        for idx, row in df.iterrows():
-            try:
-                coeffs = [str(row[c]) if pd.notna(row[c]) else "" for c in required]
-                is_valid, msg = self.service.validate_input(coeffs)
-                if not is_valid:
-                    df.at[idx, "status"] = "invalid"; df.at[idx, "message"] = msg
-                    df.at[idx, "keylog"] = ""; df.at[idx, "roots"] = ""; df.at[idx, "real_roots_count"] = 0
-                    continue
-                success, status_msg, roots_display, final_keylog = self.service.process_complete_workflow(coeffs)
-                if success:
-                    df.at[idx, "keylog"] = final_keylog
-                    df.at[idx, "roots"] = simplify_roots_text(roots_display)
-                    df.at[idx, "real_roots_count"] = len(self.service.get_real_roots_only())
-                    df.at[idx, "status"] = "ok"; df.at[idx, "message"] = status_msg or ""
-                else:
-                    df.at[idx, "status"] = "error"; df.at[idx, "message"] = status_msg
-            except Exception as e:
-                df.at[idx, "status"] = "error"; df.at[idx, "message"] = str(e)
+                df[col] = pd.Series("", index=df.index, dtype=object)  # object: mixed str/int writes via df.at
+        # Identical coefficient rows are solved once per sheet
+        row_cache = RowResultCache()
+        cache = PersistentKeylogCache(self.keylog_cache_path) if self.keylog_cache_path else None
+        config_hash = self._cache_config_hash() if cache is not None else ""
+
+        def cell_text(value) -> str:
+            return str(value) if pd.notna(value) else ""
+
+        def solve(row):
+            coeffs = [cell_text(row[c]) for c in required]
+            if cache is not None:
+                return cache.get_or_compute('polynomial', config_hash, coeffs, lambda: self._solve_row(coeffs))
+            return self._solve_row(coeffs)
+
+        # Identical coefficient texts share a group code (0.0 / -0.0 are equal but encode differently)
+        row_codes = row_group_codes(df, required, key=cell_text)
+        try:
+            for (idx, row), code in zip(df.iterrows(), row_codes):
+                try:
+                    for col, value in row_cache.get_or_compute(int(code), lambda: solve(row)).items():
+                        df.at[idx, col] = value
+                except Exception as e:
+                    df.at[idx, "status"] = "error"; df.at[idx, "message"] = str(e)
+        finally:
+            if cache is not None:
+                cache.close()
+                self.last_cache_stats = cache.stats()
+                print(cache.summary_line())
+        self.last_dedup_stats = row_cache.stats()
+        if row_cache.hits:
+            print(row_cache.summary_line())
         return df
 
+    def _cache_config_hash(self) -> str:
+        return config_fingerprint(self.degree, self.service.version, self.service.config,
+                                  mapping_files_fingerprint('polynomial_mode', 'polynomial'), *self.versions).hex()
+
+    def _solve_row(self, coeffs: List[str]) -> Dict[str, Any]:
+        """Result cells for one coefficient row"""
+        is_valid, msg = self.service.validate_input(coeffs)
+        if not is_valid:
+            return {"status": "invalid", "message": msg, **dict.fromkeys(self.keylog_columns, ""),
+                    "roots": "", "real_roots_count": 0}
+        success, status_msg, roots_display, final_keylog = self.service.process_complete_workflow(coeffs)
+        if success:
+            keylogs = self.service.keylogs_for_versions(self.versions) if self.versions else [final_keylog]
+            return {**dict(zip(self.keylog_columns, keylogs)), "roots": simplify_roots_text(roots_display),
+                    "real_roots_count": len(self.service.get_real_roots_only()),
+                    "status": "ok", "message": status_msg or ""}
+        return {"status": "error", "message": status_msg}
+
     def export_results(self, updated_df: pd.DataFrame, output_path: str, meta: Dict[str, Any] | None = None) -> str:
+        meta = meta or {}
+        if is_delimited_path(output_path):
+            # Single table: results only (no Metadata sheet in CSV/TSV)
+            return write_dataframe_delimited(updated_df, output_path)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        # Rows stream straight into the zip (inline strings, keylog column styled once per cell)
+        columns = [str(c) for c in updated_df.columns]
+        with StreamingXlsxWriter(output_path) as writer:
+            sheet = writer.create_sheet('Input', styled_columns=[columns.index(c) for c in self.keylog_columns
+                                                                 if c in columns])
+            sheet.append(columns)
+            for values in updated_df.itertuples(index=False, name=None):
+                sheet.append(values)
+            md = {'degree':[self.degree], 'default_version':[self.default_version], 'timestamp':[datetime.now().strftime('%Y-%m-%d %H:%M:%S')]}
+            if self.versions:
+                md['versions'] = [", ".join(self.versions)]
+            for k,v in meta.items(): md[k] = [v]
+            metadata = writer.create_sheet('Metadata')
+            metadata.append(list(md))
+            metadata.append([v[0] for v in md.values()])
+        return output_path
+
+    def find_input_sheets(self, file_path: str) -> List[str]:
+        """Sheets whose header has every required coefficient column (template helper sheets excluded)"""
+        if is_delimited_path(file_path):
+            return []  # one table per CSV/TSV file
+        xl = pd.ExcelFile(file_path)
+        required = get_required_columns_for_degree(self.degree)
+        sheets = []
+        for name in xl.sheet_names:
+            if name.lower() in ("examples", "instructions", "metadata", "sheet_stats"):
+                continue
+            columns = [str(c).strip().lower() for c in xl.parse(name, nrows=0).columns]
+            if all(c in columns for c in required):
+                sheets.append(name)
+        return sheets
+
+    def process_workbook_sheets(self, file_path: str, sheet_names: List[str] | None = None,
+                                max_workers: int | None = None) -> Dict[str, Any]:
+        """
+        Process every (or the selected) sheet in parallel worker processes, one sheet per task.
+        Sheets missing the required columns (e.g. a Metadata sheet) are reported as skipped.
+        Returns {'sheets': {name: DataFrame}, 'stats': [per-sheet throughput dicts]}.
+        """
+        available = pd.ExcelFile(file_path).sheet_names
+        selected = list(sheet_names) if sheet_names else available
+        unknown = [name for name in selected if name not in available]
+        if unknown:
+            raise ValueError(f"Sheets not found in workbook: {unknown}")
+        tasks = [(file_path, name) for name in selected]
+        results = run_sheet_tasks(_process_polynomial_sheet, tasks,
+                                  initializer=_init_polynomial_sheet_worker,
+                                  initargs=(self.degree, self.default_version, self.keylog_cache_path,
+                                            self.versions or None),
+                                  max_workers=max_workers)
+        sheets = {}
+        stats = []
+        for result in results:
+            frame = result.pop('frame', None)
+            if frame is not None:
+                sheets[result['sheet']] = frame
+            stats.append(result)
+        print_sheet_summary(stats)
+        return {'sheets': sheets, 'stats': stats}
+
+    def export_results_multi(self, sheet_results: Dict[str, Any], output_path: str,
+                             meta: Dict[str, Any] | None = None) -> str:
+        """Write each processed sheet back under its own name plus a Metadata sheet with per-sheet throughput"""
         meta = meta or {}
         os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
         with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            updated_df.to_excel(writer, sheet_name='Input', index=False)
+            for name, frame in sheet_results['sheets'].items():
+                frame.to_excel(writer, sheet_name=name, index=False)
             md = {'degree':[self.degree], 'default_version':[self.default_version], 'timestamp':[datetime.now().strftime('%Y-%m-%d %H:%M:%S')]}
             for k,v in meta.items(): md[k] = [v]
             pd.DataFrame(md).to_excel(writer, sheet_name='Metadata', index=False)
+            stats_columns = ['sheet', 'rows', 'seconds', 'rows_per_sec', 'success', 'errors', 'skipped', 'reason']
+            pd.DataFrame(sheet_results['stats']).reindex(columns=stats_columns).to_excel(
+                writer, sheet_name='Sheet_Stats', index=False)
         return output_path
+
+
+# Module-level worker state: one configured processor per worker process
+_SHEET_PROCESSOR: Dict[str, PolynomialExcelProcessor] = {}
+
+
+def _init_polynomial_sheet_worker(degree: int, default_version: str, keylog_cache_path: str | None = None,
+                                  versions: List[str] | None = None):
+    _SHEET_PROCESSOR['processor'] = PolynomialExcelProcessor(degree, default_version, keylog_cache_path, versions)
+
+
+def _process_polynomial_sheet(task) -> Dict[str, Any]:
+    file_path, sheet_name = task
+    started = time.time()
+    processor = _SHEET_PROCESSOR['processor']
+    try:
+        df = processor.read_input(file_path, sheet_name)
+    except ValueError as e:
+        return sheet_throughput(sheet_name, 0, started, skipped=True, reason=str(e))
+    try:
+        frame = processor.process_dataframe(df)
+    except Exception as e:
+        return sheet_throughput(sheet_name, len(df), started, skipped=True, reason=str(e))
+    ok = int((frame['status'] == 'ok').sum())
+    return sheet_throughput(sheet_name, len(frame), started, success=ok, errors=len(frame) - ok, frame=frame)
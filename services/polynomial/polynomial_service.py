@@ -196,6 +196,13 @@ class PolynomialService:
             # Fallback to simple format
             return f"P{self.degree}=" + "=".join(encoded_coeffs) + "=" * self.degree
     
+    def keylogs_for_versions(self, versions: List[str]) -> List[str]:
+        """Keylog of the last encoded coefficients for each version (prefix/suffix differ, no re-encoding)"""
+        if not self.last_final_keylog:
+            return ["" for _ in versions]
+        return [self.prefix_resolver.get_complete_keylog_format(version, self.degree, self.last_encoded_coefficients)
+                for version in versions]
+    
     # ========== DEPRECATED - Now handled by prefix_resolver ==========
     def _get_polynomial_prefix(self) -> str:
         """DEPRECATED: Use prefix_resolver instead"""
@@ -342,7 +342,16 @@ class VectorService:
         except Exception as e:
             print(f"Error generating keylog: {e}")
             return f"ERROR: {str(e)}"
-    
+
+    def generate_final_keylogs(self, versions: List[str]) -> Dict[str, str]:
+        """Keylog for each version from the current encoded vectors (only the prefix differs)"""
+        keylog = self.generate_final_keylog()
+        current = self.get_vector_prefix(self.current_version)
+        if not keylog.startswith(current):
+            return {version: keylog for version in versions}
+        body = keylog[len(current):]
+        return {version: self.get_vector_prefix(version) + body for version in versions}
+
     # ========== MAIN WORKFLOW ==========
     def process_complete_workflow(self) -> Tuple[bool, str, Dict[str, Any]]:
         """Complete workflow: validate -> calculate -> encode -> generate keylog"""
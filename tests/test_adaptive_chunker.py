@@ -0,0 +1,47 @@
+"""Test AdaptiveChunkSizer - tăng chunk khi nhanh hơn, dừng khi hội tụ / gần giới hạn RAM"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from services.excel.adaptive_chunker import AdaptiveChunkSizer
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def test_grows_then_converges_on_best_size():
+    sizer = AdaptiveChunkSizer(max_memory_mb=1000, initial_size=500)
+    # Throughput peaks at 2000 rows/chunk, then drops
+    rates = {500: 1000.0, 1000: 1500.0, 2000: 1800.0, 4000: 1700.0}
+    for _ in range(6):
+        size = sizer.next_size()
+        sizer.record(size, size / rates[size], 100.0, 100.0)
+    assert sizer.phase == 'settled' and sizer.next_size() == 2000
+    assert [h['reason'] for h in sizer.history[:4]] == ['faster', 'faster', 'faster', 'converged']
+    assert sizer.summary()['sizes_used'] == [500, 1000, 2000, 4000]
+
+
+def test_memory_pressure_caps_and_halves():
+    sizer = AdaptiveChunkSizer(max_memory_mb=1000, initial_size=1000)
+    # 0.1MB per row with 200MB free and 50% headroom -> at most 1000 rows
+    sizer.record(1000, 1.0, 700.0, 800.0)
+    assert sizer.next_size() == 1000
+    sizer.record(1000, 0.5, 800.0, 950.0)
+    assert sizer.next_size() == 500 and sizer.history[-1]['reason'] == 'memory'
+
+
+def test_processor_reports_chunk_sizes(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(700):
+        wb.active.append([f'{j % 9},1', f'{j % 7},2'])
+    wb.save(path)
+    processor = LargeFileProcessor({'fast_xml_reader': True})
+    success, errors, _ = processor.process_large_excel_fast(
+        path, "Điểm", "Điểm", "Khoảng cách", "2", "2", str(tmp_path / "out.xlsx"))
+    assert (success, errors) == (700, 0)
+    sizing = processor.get_processing_statistics()['chunk_sizing']
+    assert sizing['chunks'] >= 2 and sum(h['rows'] for h in sizing['history']) == 700
+    assert sizing['history'][0]['rows'] == 500
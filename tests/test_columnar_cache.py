@@ -0,0 +1,83 @@
+"""Test ColumnarInputCache - Arrow sidecar theo content hash, đọc lại chỉ cột cần"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import openpyxl
+
+pytest.importorskip("pyarrow")
+
+from services.excel.columnar_cache import ColumnarInputCache
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def _create_input(path, rows, offset=0):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['data_A', 'data_B', 'note'])
+    for j in range(rows):
+        ws.append([f'{j + offset},1', f'{j},2', f'n{j}'])
+    wb.save(path)
+    return path
+
+
+def test_sidecar_build_then_projected_hit(tmp_path):
+    path = _create_input(str(tmp_path / "in.xlsx"), 25)
+    cache = ColumnarInputCache()
+    built = list(cache.iter_cached(path, 10, columns=['data_A']))
+    assert cache.last_event == 'build' and [len(c) for c in built] == [10, 10, 5]
+    assert cache.has_sidecar(path)
+
+    hit = list(cache.iter_cached(path, 10, columns=['note', 'data_A']))
+    assert cache.last_event == 'hit'
+    assert list(hit[0].columns) == ['note', 'data_A']
+    assert hit[2]['data_A'].tolist() == [f'{j},1' for j in range(20, 25)]
+
+    # New content -> new key; the stale sidecar is replaced on the next build
+    old_sidecar = cache.sidecar_path(path)
+    _create_input(path, 3, offset=100)
+    assert not cache.has_sidecar(path)
+    list(cache.iter_cached(path, 10))
+    assert not os.path.exists(old_sidecar)
+    assert [p for p in os.listdir(tmp_path) if p.endswith('.arrow')] == [os.path.basename(cache.sidecar_path(path))]
+
+
+
+def test_sheet_sidecars_do_not_evict_each_other(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.title = 'A'
+    wb.active.append(['data_A'])
+    wb.active.append(['1,1'])
+    wb.create_sheet('B').append(['data_A'])
+    wb['B'].append(['2,2'])
+    wb.save(path)
+    cache = ColumnarInputCache()
+    list(cache.iter_cached(path, 10, sheet_name='A'))
+    list(cache.iter_cached(path, 10, sheet_name='B'))
+    assert cache.has_sidecar(path, 'A') and cache.has_sidecar(path, 'B')
+    assert next(cache.iter_cached(path, 10, sheet_name='A'))['data_A'].tolist() == ['1,1']
+    assert cache.last_event == 'hit'
+
+    # New content: rebuilding sheet A drops only A's old sidecar
+    old_b = cache.sidecar_path(path, 'B')
+    wb['A'].append(['3,3'])
+    wb.save(path)
+    list(cache.iter_cached(path, 10, sheet_name='A'))
+    sidecars = sorted(p for p in os.listdir(tmp_path) if p.endswith('.arrow'))
+    assert sidecars == sorted([os.path.basename(cache.sidecar_path(path, 'A')), os.path.basename(old_b)])
+
+def test_processor_reuses_sidecar_across_operations(tmp_path):
+    path = _create_input(str(tmp_path / "in.xlsx"), 12)
+    first = LargeFileProcessor({'columnar_cache': True})
+    assert first.process_large_excel_fast(path, "Điểm", "Điểm", "Khoảng cách", "2", "2",
+                                          str(tmp_path / "out1.xlsx"))[:2] == (12, 0)
+    assert first.get_processing_statistics()['columnar_cache'] == 'build'
+
+    second = LargeFileProcessor({'columnar_cache': True})
+    assert second.process_large_excel_fast(path, "Điểm", "Điểm", "Tương giao", "2", "2",
+                                           str(tmp_path / "out2.xlsx"))[:2] == (12, 0)
+    assert second.get_processing_statistics()['columnar_cache'] == 'hit'
@@ -0,0 +1,80 @@
+"""Test compact_frames - dtype category/Arrow giảm bộ nhớ, mã nhóm dòng dùng cho encoder"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from services.excel.compact_frames import compact_string_columns, row_group_codes
+from services.geometry.geometry_service import GeometryService
+from services.equation.equation_batch_processor import EquationBatchProcessor
+from services.polynomial.polynomial_excel_processor import PolynomialExcelProcessor
+
+
+def test_compact_reduces_memory_and_keeps_values():
+    rows = 20000
+    df = pd.DataFrame({
+        'data_A': pd.Series([f'{j % 10},1,2' for j in range(rows)], dtype=object),
+        'note': pd.Series([f'unique {j}' for j in range(rows)], dtype=object),
+        'mixed': pd.Series([j if j % 2 else str(j) for j in range(rows)], dtype=object),
+    })
+    original = df.copy()
+    stats = compact_string_columns(df)
+    assert stats['categorical_columns'] == ['data_A']
+    assert 'mixed' not in stats['categorical_columns'] + stats['arrow_columns']
+    assert stats['after_mb'] < stats['before_mb'] / 2
+    assert df['data_A'].astype(str).tolist() == original['data_A'].tolist()
+    assert df['mixed'].tolist() == original['mixed'].tolist()
+
+
+def test_row_group_codes_match_identical_rows():
+    df = pd.DataFrame({'a': ['1', '2', '1', None, None], 'b': ['x', 'x', 'x', 'y', 'y'], 'c': [1, 2, 3, 4, 5]})
+    compact_string_columns(df)
+    codes = row_group_codes(df, ['a', 'b'])
+    assert codes[0] == codes[2] and codes[3] == codes[4]
+    assert len(set(codes.tolist())) == 3
+    assert np.array_equal(row_group_codes(df, ['a', 'b', 'missing']), codes)
+    # key: group on the text an encoder sees (' 1' == '1', missing == '')
+    df = pd.DataFrame({'a': pd.Categorical([' 1', '1', None, '', '2'])})
+    keyed = row_group_codes(df, ['a'], key=lambda value: '' if pd.isna(value) else str(value).strip())
+    assert keyed[0] == keyed[1] and keyed[2] == keyed[3] and len(set(keyed.tolist())) == 3
+    mixed = pd.DataFrame({'a': pd.Series([1, 1.0, True, 0.0, -0.0], dtype=object)})
+    assert len(set(row_group_codes(mixed, ['a']).tolist())) == 2
+    assert len(set(row_group_codes(mixed, ['a'], key=str).tolist())) == 5
+
+
+def test_geometry_normal_path_same_results_with_compact_frames(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(60):
+        wb.active.append([f'{j % 6},1', f'{j % 4},2'])
+    wb.save(path)
+    results = []
+    for compact in (True, False):
+        service = GeometryService({'compact_frames': compact})
+        encoded, _, processed, errors = service._process_excel_normal(
+            path, "Điểm", "Điểm", "Khoảng cách", "2", "2", str(tmp_path / f"out_{compact}.xlsx"))
+        assert (processed, errors) == (60, 0)
+        results.append(encoded)
+    assert results[0] == results[1]
+    assert service.excel_processor.last_frame_stats == {}
+
+
+def test_equation_and_polynomial_group_on_encoded_text():
+    # 1 == 1.0 == True and 0.0 == -0.0, but the solvers see different cell texts
+    equations = pd.DataFrame({'Phương trình 1': pd.Series([1, 1.0, True, 1], dtype=object),
+                              'Phương trình 2': ['2,3,4'] * 4})
+    batch = EquationBatchProcessor().process_dataframe(equations, 2, "fx799")['keylog'].tolist()
+    single = [EquationBatchProcessor().process_dataframe(equations.iloc[[j]], 2, "fx799")['keylog'][0]
+              for j in range(4)]
+    assert batch == single and len(set(batch)) == 3
+
+    coefficients = pd.DataFrame({'a': [1.0, 1.0, 1.0], 'b': [0.0, -0.0, 0.0], 'c': [-4.0, -4.0, -4.0]})
+    batch = PolynomialExcelProcessor(2).process_dataframe(coefficients)['keylog'].tolist()
+    single = [PolynomialExcelProcessor(2).process_dataframe(coefficients.iloc[[j]])['keylog'].iloc[0]
+              for j in range(3)]
+    assert batch == single and batch[0] != batch[1] and batch[0] == batch[2]
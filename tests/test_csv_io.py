@@ -0,0 +1,73 @@
+"""Test CSV/TSV fast path - cùng cột, cùng keylog như xlsx"""
+import sys
+import os
+import csv
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.excel.csv_io import DelimitedReader, DelimitedWriter
+from services.excel.large_file_processor import LargeFileProcessor
+from services.equation.equation_batch_processor import EquationBatchProcessor
+from services.polynomial.polynomial_excel_processor import PolynomialExcelProcessor
+
+
+def _read_csv(path, delimiter=','):
+    with open(path, encoding='utf-8-sig', newline='') as handle:
+        return list(csv.reader(handle, delimiter=delimiter))
+
+
+def test_reader_writer_roundtrip(tmp_path):
+    path = str(tmp_path / "in.tsv")
+    with DelimitedWriter(path, ['data_A', 'ghi chú']) as writer:
+        writer.append(['1,2', 'dòng\nhai'])
+        writer.append(['3,4', ''])
+    reader = DelimitedReader(path)
+    assert reader.read_header() == ('data_A', 'ghi chú')
+    assert list(reader.iter_rows(columns=[1, 5], min_row=2)) == [('dòng\nhai', ''), ('', '')]
+    assert reader.count_rows() == 3
+
+
+def test_geometry_csv_matches_xlsx(tmp_path):
+    rows = [[f'{j},1', f'{j},3'] for j in range(6)]
+    csv_input = str(tmp_path / "in.csv")
+    with DelimitedWriter(csv_input, ['data_A', 'data_B']) as writer:
+        writer.append_many(rows)
+    xlsx_input = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for row in rows:
+        wb.active.append(row)
+    wb.save(xlsx_input)
+
+    args = ("Điểm", "Điểm", "Khoảng cách", "2", "2")
+    csv_output = str(tmp_path / "out.csv")
+    assert LargeFileProcessor().process_large_excel_fast(csv_input, *args, csv_output)[:2] == (6, 0)
+    xlsx_output = str(tmp_path / "out.xlsx")
+    LargeFileProcessor().process_large_excel_fast(xlsx_input, *args, xlsx_output)
+
+    csv_rows = _read_csv(csv_output)
+    ws = openpyxl.load_workbook(xlsx_output)['Results']
+    xlsx_rows = [[c if c is not None else "" for c in r] for r in ws.iter_rows(values_only=True)]
+    assert csv_rows == xlsx_rows
+    assert csv_rows[0] == ['data_A', 'data_B', 'keylog']
+
+
+def test_equation_and_polynomial_csv(tmp_path):
+    eq_input = str(tmp_path / "eq.csv")
+    pd.DataFrame({'Phương trình 1': ['1,1,3'], 'Phương trình 2': ['1,-1,1']}).to_csv(eq_input, index=False)
+    processor = EquationBatchProcessor()
+    out = processor.process_file(eq_input, 2, 'fx799')
+    assert out.endswith('eq_output.csv')
+    assert pd.read_csv(out, encoding='utf-8-sig')['status'].tolist() == ['Thành công']
+    processor.chunk_size = 1
+    chunked = processor.process_file_chunked(eq_input, 2, 'fx799', str(tmp_path / "eq_chunked.tsv"))
+    assert _read_csv(chunked, '\t')[1][-3] == pd.read_csv(out, encoding='utf-8-sig')['keylog'][0]
+
+    poly_input = str(tmp_path / "poly.tsv")
+    pd.DataFrame({'a': ['1'], 'b': ['-3'], 'c': ['2']}).to_csv(poly_input, sep='\t', index=False)
+    poly = PolynomialExcelProcessor(2)
+    result = poly.export_results(poly.process_batch(poly_input), str(tmp_path / "poly_out.csv"))
+    assert pd.read_csv(result, encoding='utf-8-sig')['status'].tolist() == ['ok']
@@ -0,0 +1,58 @@
+"""Test data_validation - kiểm tra chất lượng dữ liệu dạng vector trên toàn bộ file, chỉ mục dòng lỗi đầy đủ"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.excel.excel_processor import ExcelProcessor
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def test_vectorized_checks_match_row_rules():
+    df = pd.DataFrame({
+        'data_A': ['1,2', '5', '', None, '1,2,3', 7],
+        'C_data_I2': ['0,0', '0,0', '0,0', '', '1,1', '1,1'],
+        'C_data_R2': ['2', '-1', 'abc', '', 0, '3'],
+    })
+    processor = ExcelProcessor()
+    info = processor.validate_data_quality(df, "Điểm", "Đường tròn")
+    assert info['total_rows'] == 6 and info['rows_with_data'] == 5
+    # Same verdicts as the per-row _validate_shape_data rules
+    expected = []
+    for i, row in df.iterrows():
+        issues = []
+        for group, shape, name in (('A', "Điểm", "Nhóm A"), ('B', "Đường tròn", "Nhóm B")):
+            data = processor.extract_shape_data(row, shape, group)
+            if any(str(v).strip() for v in data.values()):
+                issues += processor._validate_shape_data(data, shape, name)
+        if issues:
+            expected.append(i + 2)
+    assert info['error_rows'] == expected == [3, 6, 7]
+    assert info['issue_counts'] == {"Nhóm A: Điểm cần ít nhất 2 tọa độ": 2, "Nhóm B: Bán kính phải > 0": 2}
+    assert info['data_issues'][0] == {'row': 3, 'issues': ["Nhóm A: Điểm cần ít nhất 2 tọa độ",
+                                                          "Nhóm B: Bán kính phải > 0"]}
+
+
+def test_empty_plane_flagged_when_other_group_has_data():
+    df = pd.DataFrame({'P1_a': ['1', '', ''], 'P1_b': ['', '', ''], 'P1_c': ['', '', ''], 'P1_d': ['', '', ''],
+                       'data_B': ['1,2', '1,2', '']})
+    info = ExcelProcessor().validate_data_quality(df, "Mặt phẳng", "Điểm")
+    assert info['error_rows'] == [3] and info['rows_with_data'] == 2
+
+
+def test_large_file_streams_whole_file(tmp_path):
+    path = str(tmp_path / "big.xlsx")
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(['data_A', 'd_P_data_B', 'd_V_data_B'])
+    for j in range(3000):
+        ws.append([f'{j},1' if j != 2500 else 'x', '1,2,3' if j != 10 else '1,2', '1,1,1'])
+    wb.save(path)
+    for fast in (True, False):
+        info = LargeFileProcessor({'fast_xml_reader': fast}).validate_large_file_data(
+            path, "Điểm", "Đường thẳng", chunksize=700)
+        assert info['total_rows'] == 3000
+        assert info['error_rows'] == [12, 2502]
@@ -0,0 +1,65 @@
+"""Test file_preview - xem trước vài dòng đầu, ước lượng số dòng trong thời gian giới hạn"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import services.excel.excel_processor as excel_processor_module
+from services.excel.file_preview import preview_file
+from services.excel.file_probe import quick_row_estimate
+from services.excel.xlsx_stream_writer import StreamingXlsxWriter
+from services.excel.excel_processor import ExcelProcessor
+from services.equation.equation_batch_processor import EquationBatchProcessor
+
+
+def _write_without_dimension(path, rows):
+    with StreamingXlsxWriter(path) as writer:
+        sheet = writer.create_sheet('Sheet1')
+        sheet.append([' data_A', 'data_B', 'keylog', ''])
+        for j in range(rows):
+            sheet.append([f'{j},1', f'{j % 3},2', ''])
+
+
+def test_preview_streams_head_and_estimates_rows(tmp_path):
+    path = str(tmp_path / "big.xlsx")
+    _write_without_dimension(path, 40000)
+    preview = preview_file(path, rows=3)
+    assert preview['columns'] == ['data_A', 'data_B', 'keylog']
+    assert preview['rows'] == [('0,1', '0,2', ''), ('1,1', '1,2', ''), ('2,1', '2,2', '')]
+    assert preview['keylog_column'] == 2 and preview['row_estimate_source'] == 'sampled'
+    assert abs(preview['estimated_rows'] - 40000) < 4000
+    small = str(tmp_path / "small.xlsx")
+    _write_without_dimension(small, 10)
+    assert quick_row_estimate(small) == (10, 'exact')
+
+
+def test_preview_csv_and_equation_detection(tmp_path):
+    path = str(tmp_path / "eq.csv")
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write("Phương trình 1,Phương trình 2,note\n")
+        handle.writelines(f"1,{j},x\n" for j in range(50))
+    preview = EquationBatchProcessor().preview_file(path, rows=2)
+    assert preview['estimated_rows'] == 50 and preview['row_estimate_source'] == 'exact'
+    assert preview['rows'] == [('1', '0', 'x'), ('1', '1', 'x')]
+    assert preview['detected_mapping']['variables'] == 2
+
+
+def test_geometry_preview_and_file_info_do_not_parse_workbook(tmp_path, monkeypatch):
+    path = str(tmp_path / "geo.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(20):
+        wb.active.append([f'{j},1', '1,2'])
+    wb.save(path)
+
+    def no_full_read(*args, **kwargs):
+        raise AssertionError("full read")
+    monkeypatch.setattr(excel_processor_module, 'read_table', no_full_read)
+    processor = ExcelProcessor()
+    preview = processor.preview_file(path)
+    assert preview['detected_mapping'] == {'A': ['Điểm'], 'B': ['Điểm']}
+    assert preview['estimated_rows'] == 20 and len(preview['rows']) == 5
+    info = processor.get_file_info(path)
+    assert info['total_rows'] == 20 and info['first_few_rows'][0] == {'data_A': '0,1', 'data_B': '1,2'}
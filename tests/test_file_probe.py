@@ -0,0 +1,64 @@
+"""Test file_probe - đọc <dimension> / đếm <row> thay vì load workbook"""
+import sys
+import os
+import re
+import zipfile
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from services.excel.file_probe import probe_xlsx, clear_probe_cache
+from services.excel.excel_processor import ExcelProcessor
+
+
+def _create_workbook(path, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['data_A', 'data_B', 'keylog'])
+    for j in range(rows):
+        ws.append([f'{j},1', f'{j},2', ''])
+    wb.save(path)
+    return path
+
+
+def _strip_dimension(source, target):
+    """Rewrite the package without <dimension>, like some third-party writers"""
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename.startswith('xl/worksheets/sheet'):
+                data = re.sub(rb'<dimension[^>]*/>', b'', data)
+            zout.writestr(item, data)
+    return target
+
+
+def test_probe_reads_dimension_and_caches(tmp_path):
+    clear_probe_cache()
+    path = _create_workbook(str(tmp_path / "dim.xlsx"), 120)
+    first = probe_xlsx(path)
+    assert (first['source'], first['estimated_rows'], first['max_column']) == ('dimension', 120, 3)
+    assert not first['cached']
+    assert probe_xlsx(path)['cached']
+
+    # Rewriting the file invalidates the cache entry (size/mtime change)
+    _create_workbook(path, 30)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    again = probe_xlsx(path)
+    assert not again['cached'] and again['estimated_rows'] == 30
+
+
+def test_probe_counts_rows_without_dimension(tmp_path):
+    clear_probe_cache()
+    source = _create_workbook(str(tmp_path / "src.xlsx"), 75)
+    path = _strip_dimension(source, str(tmp_path / "nodim.xlsx"))
+    probe = probe_xlsx(path)
+    assert probe['source'] == 'row_scan'
+    assert probe['estimated_rows'] == 75
+
+    wb = openpyxl.load_workbook(source, read_only=True)
+    assert probe['estimated_rows'] == wb.active.max_row - 1
+    wb.close()
+
+    is_large, info = ExcelProcessor().is_large_file(path)
+    assert not is_large and info['estimated_rows'] == 75
@@ -0,0 +1,64 @@
+"""Test incremental mode - chỉ tính lại dòng bị sửa, giữ nguyên keylog của dòng không đổi"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from services.excel.fingerprint_index import FingerprintIndex, config_fingerprint, sidecar_path
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def test_index_roundtrip_and_pairing(tmp_path):
+    index = FingerprintIndex(config_fingerprint({'a': 1}, "Điểm"))
+    index.add(index.row_digest(("1,2", "3,4"), "KEY1"))
+    path = index.save(str(tmp_path / "x.keylog_index"))
+    loaded = FingerprintIndex.load(path)
+    assert loaded.config_hash == index.config_hash and len(loaded) == 1
+    assert loaded.row_digest(("1,2", "3,4"), "KEY1") in loaded
+    # Same inputs with another keylog, or another config, do not match
+    assert loaded.row_digest(("1,2", "3,4"), "KEY2") not in loaded
+    assert FingerprintIndex(config_fingerprint({'a': 2}, "Điểm")).row_digest(("1,2", "3,4"), "KEY1") not in loaded
+    assert FingerprintIndex.load(str(tmp_path / "missing")) is None
+
+
+def _run(path, out, config=None, dimension="2"):
+    processor = LargeFileProcessor(dict({'fast_xml_reader': True, 'incremental': True}, **(config or {})))
+    processor.process_large_excel_fast(path, "Điểm", "Điểm", "Khoảng cách", dimension, dimension, out)
+    rows = list(openpyxl.load_workbook(out).active.iter_rows(values_only=True))
+    return processor.get_processing_statistics()['incremental'], rows
+
+
+def test_reprocess_only_edited_rows(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(120):
+        wb.active.append([f'{j},1', f'{j % 7},2'])
+    wb.save(path)
+
+    first = str(tmp_path / "first.xlsx")
+    stats, _ = _run(path, first)
+    assert stats['status'] == 'no_index' and stats['rows_reused'] == 0
+    assert os.path.exists(sidecar_path(first))
+
+    # User edits the inputs of two rows in the encoded workbook
+    wb = openpyxl.load_workbook(first)
+    wb.active['A5'] = '99,1'
+    wb.active['B40'] = '5,5'
+    wb.save(first)
+
+    second = str(tmp_path / "second.xlsx")
+    stats, rows = _run(first, second)
+    assert stats['status'] == 'reuse'
+    assert (stats['rows_reused'], stats['rows_recomputed']) == (118, 2)
+    # Same output as a full recompute of the edited workbook
+    full = str(tmp_path / "full.xlsx")
+    processor = LargeFileProcessor({'fast_xml_reader': True})
+    processor.process_large_excel_fast(first, "Điểm", "Điểm", "Khoảng cách", "2", "2", full)
+    assert rows == list(openpyxl.load_workbook(full).active.iter_rows(values_only=True))
+
+    # Different run settings invalidate every stored fingerprint
+    stats, _ = _run(second, str(tmp_path / "third.xlsx"), dimension="3")
+    assert stats['status'] == 'config_changed' and stats['rows_reused'] == 0
@@ -0,0 +1,53 @@
+"""Test chunked path cho file vừa - đọc workbook đúng một lần, generator chunk hoạt động"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import services.excel.excel_processor as excel_processor_module
+from services.geometry.geometry_service import GeometryService
+
+
+def _make_input(path, rows=45):
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A ', 'data_B'])
+    for j in range(rows):
+        wb.active.append([f'{j},1', f'{j % 4},2'])
+    wb.save(path)
+
+
+def test_chunked_reads_once_and_matches_normal(tmp_path, monkeypatch):
+    path = str(tmp_path / "in.xlsx")
+    _make_input(path)
+    calls = []
+    real_read_table = excel_processor_module.read_table
+
+    def counting_read_table(*args, **kwargs):
+        calls.append(args)
+        return real_read_table(*args, **kwargs)
+    monkeypatch.setattr(excel_processor_module, 'read_table', counting_read_table)
+
+    service = GeometryService()
+    results, output_file, processed, errors = service.process_excel_batch_chunked(
+        path, "Điểm", "Điểm", "Khoảng cách", "2", "2", chunksize=10)
+    assert len(calls) == 1
+    assert (processed, errors, len(results)) == (45, 0, 45)
+    normal, _, _, _ = GeometryService()._process_excel_normal(
+        path, "Điểm", "Điểm", "Khoảng cách", "2", "2", str(tmp_path / "normal.xlsx"))
+    assert results == normal
+    exported = [row[-1] for row in openpyxl.load_workbook(output_file).active.iter_rows(min_row=2, values_only=True)]
+    assert exported == results
+
+
+def test_read_excel_data_chunked_streams_large_files(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    _make_input(path)
+    processor = GeometryService().excel_processor
+    processor.large_file_threshold_rows = 10
+    chunks = list(processor.read_excel_data_chunked(path, 20))
+    assert sum(len(chunk) for chunk in chunks) == 45
+    processor.large_file_threshold_rows = 10 ** 9
+    chunks = list(processor.read_excel_data_chunked(path, 20))
+    assert [len(chunk) for chunk in chunks] == [20, 20, 5] and 'data_A' in chunks[0].columns
@@ -0,0 +1,61 @@
+"""Test GeometryService.process_records - xử lý DataFrame/iterable trong bộ nhớ, không qua file xlsx"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.geometry.geometry_service import GeometryService
+
+
+def test_records_match_file_batch(tmp_path):
+    rows = [{'data_A': f'{j % 7},1', 'data_B': f'{j % 3},2'} for j in range(40)]
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for row in rows:
+        wb.active.append([row['data_A'], row['data_B']])
+    wb.save(path)
+    expected, _, _, _ = GeometryService()._process_excel_normal(
+        path, "Điểm", "Điểm", "Khoảng cách", "2", "2", str(tmp_path / "out.xlsx"))
+
+    service = GeometryService()
+    frame = pd.DataFrame(rows, index=range(100, 140))
+    series = service.process_records(frame, "Điểm", "Điểm", "Khoảng cách", "2", "2")
+    assert series.name == 'keylog' and list(series.index) == list(frame.index)
+    assert series.tolist() == expected
+
+    keylogs = service.process_records(iter(rows), "Điểm", "Điểm", "Khoảng cách", "2", "2", max_cached=5)
+    assert not isinstance(keylogs, (list, pd.Series))
+    assert list(keylogs) == expected
+    assert service.last_records_stats['rows'] == 40
+
+
+def test_records_missing_columns_and_bad_rows():
+    service = GeometryService()
+    try:
+        service.process_records(pd.DataFrame({'data_A': ['1,2']}), "Điểm", "Điểm", "Khoảng cách", "2", "2")
+        assert False, "expected missing column error"
+    except Exception as e:
+        assert 'data_B' in str(e)
+    results = list(service.process_records([{'C_data_I1': '1,2', 'C_data_R1': None}, {}],
+                                           "Đường tròn", None, "Diện tích", "2", "2"))
+    assert len(results) == 2 and all(isinstance(r, str) for r in results)
+
+
+def test_equal_but_differently_printed_values_are_not_grouped(tmp_path):
+    # 1 == 1.0 == True and 0.0 == -0.0, but the encoder sees different cell texts
+    frame = pd.DataFrame({'data_A': pd.Series([1, 1.0, True, 0.0, -0.0, 1], dtype=object),
+                          'data_B': ['1,2'] * 6})
+    service = GeometryService()
+    expected = list(service.process_records(frame.to_dict('records'), "Điểm", "Điểm", "Khoảng cách", "2", "2"))
+    assert len(set(expected)) == 5 and expected[0] == expected[5]
+    assert service.process_records(frame, "Điểm", "Điểm", "Khoảng cách", "2", "2").tolist() == expected
+
+    # Row-by-row file path keys its result cache the same way
+    service.excel_processor.read_excel_data = lambda path: frame.copy()
+    results, _, _, _ = service._process_excel_normal("in.xlsx", "Điểm", "Điểm", "Khoảng cách", "2", "2",
+                                                     str(tmp_path / "out.xlsx"))
+    assert results == expected
@@ -0,0 +1,93 @@
+"""Test MemoryGovernor - giảm chunk, flush sớm, chỉ gc khi có ích, thống kê quyết định"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import openpyxl
+from services.excel.memory_governor import MemoryGovernor
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def _governor_at(rss_values, **kwargs):
+    """Governor whose RSS samples come from rss_values (last value repeats)"""
+    governor = MemoryGovernor(1000, interval=0.01, **kwargs)
+    values = list(rss_values)
+
+    def fake_sample():
+        governor._rss_mb = values.pop(0) if len(values) > 1 else values[0]
+        governor._peak_rss_mb = max(governor._peak_rss_mb, governor._rss_mb)
+        governor._samples += 1
+        return governor._rss_mb
+    governor.sample = fake_sample
+    return governor
+
+
+def test_levels_cap_chunks_and_flush():
+    governor = _governor_at([500])
+    assert governor.level() == 'ok'
+    assert governor.cap_chunk_size(4000) == 4000 and not governor.should_flush(10)
+    governor = _governor_at([800])
+    assert governor.level() == 'soft'
+    assert governor.cap_chunk_size(4000) == 2000 and governor.should_flush(10)
+    assert not governor.should_flush(0)
+    governor = _governor_at([950])
+    assert governor.level() == 'hard' and governor.cap_chunk_size(4000) == 100
+    assert governor.stats()['chunk_caps'] == 1
+
+
+def test_collect_backs_off_when_useless():
+    governor = _governor_at([100])
+    assert governor.maybe_collect() == 0.0 and governor.collections == 0
+    # Under pressure, a collection that frees nothing doubles the cooldown
+    governor = _governor_at([800, 800, 800])
+    governor.maybe_collect()
+    assert governor.collections == 1 and governor.useful_collections == 0
+    governor.maybe_collect()
+    assert governor.collections == 1 and governor.skipped_collections == 1
+    # A useful collection (800 -> 700MB) is recorded as such
+    governor = _governor_at([800, 800, 700])
+    assert governor.maybe_collect() == 100.0 and governor.useful_collections == 1
+    assert governor.decisions[-1]['action'] == 'collect'
+
+
+def test_hard_pressure_never_pauses(tmp_path):
+    # RSS stuck above the hard line: collect / flush / shrink chunks, but no sleeping
+    governor = _governor_at([950])
+    assert not hasattr(governor, 'throttle') and 'throttles' not in governor.stats()
+
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(500):
+        wb.active.append([f'{j % 9},1', f'{j % 7},2'])
+    wb.save(path)
+    processor = LargeFileProcessor({'adaptive_chunks': False})
+    processor.max_memory_mb = processor.memory_governor.max_memory_mb = 1  # always 'hard'
+    start = time.time()
+    success, errors, _ = processor.process_large_excel_fast(
+        path, "Điểm", "Điểm", "Khoảng cách", "2", "2", str(tmp_path / "out.xlsx"))
+    assert (success, errors) == (500, 0) and time.time() - start < 10
+    assert processor.memory_governor.early_flushes > 0
+
+
+def test_sampler_thread_and_processor_stats(tmp_path):
+    with MemoryGovernor(100000, interval=0.01) as governor:
+        assert governor.running and governor.rss_mb > 0
+    assert not governor.running
+
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(300):
+        wb.active.append([f'{j % 9},1', f'{j % 7},2'])
+    wb.save(path)
+    processor = LargeFileProcessor({'fast_xml_reader': True})
+    success, errors, _ = processor.process_large_excel_fast(
+        path, "Điểm", "Điểm", "Khoảng cách", "2", "2", str(tmp_path / "out.xlsx"))
+    assert (success, errors) == (300, 0)
+    stats = processor.get_processing_statistics()['memory_governor']
+    assert stats['peak_rss_mb'] > 0 and stats['samples'] >= 1
+    assert not processor.memory_governor.running
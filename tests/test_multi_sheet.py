@@ -0,0 +1,59 @@
+"""Test multi-sheet mode - mỗi sheet (mỗi lớp) xử lý song song, ghi lại đúng sheet"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.excel.large_file_processor import LargeFileProcessor
+from services.polynomial.polynomial_excel_processor import PolynomialExcelProcessor
+
+
+def test_geometry_multi_sheet(tmp_path):
+    source = str(tmp_path / "classes.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.title = "Lop10A"
+    for title, rows in (("Lop10A", 4), ("Lop10B", 7)):
+        ws = wb[title] if title in wb.sheetnames else wb.create_sheet(title)
+        ws.append(['data_A', 'data_B', 'keylog'])
+        for j in range(rows):
+            ws.append([f'{j},1', f'{j},3', 'old'])
+    wb.create_sheet("Notes").append(['just', 'text'])
+    wb.save(source)
+
+    output = str(tmp_path / "out.xlsx")
+    result = LargeFileProcessor().process_large_excel_multi_sheet(
+        source, "Điểm", "Điểm", "Khoảng cách", "2", "2", output, max_workers=2)
+    stats = {s['sheet']: s for s in result['sheets']}
+    assert (stats['Lop10A']['rows'], stats['Lop10B']['rows']) == (4, 7)
+    assert stats['Notes']['skipped']
+    assert result['success'] == 11 and result['errors'] == 0
+    assert all('rows_per_sec' in s for s in result['sheets'])
+
+    out = openpyxl.load_workbook(output)
+    assert out.sheetnames == ["Lop10A", "Lop10B", "Notes"]
+    assert [c.value for c in out["Lop10B"][1]] == ['data_A', 'data_B', 'keylog']
+    assert all(out["Lop10B"].cell(row=r, column=3).value.startswith('wj112') for r in range(2, 9))
+    assert out["Notes"]['B1'].value == 'text'
+    assert not any(name.endswith('temp_results') for name in os.listdir(tmp_path))
+
+
+def test_polynomial_multi_sheet(tmp_path):
+    source = str(tmp_path / "poly.xlsx")
+    with pd.ExcelWriter(source, engine='openpyxl') as writer:
+        pd.DataFrame({'a': [1, 1], 'b': [-3, 0], 'c': [2, -4]}).to_excel(writer, sheet_name='Class1', index=False)
+        pd.DataFrame({'a': [1], 'b': [2], 'c': [1]}).to_excel(writer, sheet_name='Class2', index=False)
+        pd.DataFrame({'x': ['n/a']}).to_excel(writer, sheet_name='Instructions', index=False)
+
+    processor = PolynomialExcelProcessor(2)
+    sheets = processor.find_input_sheets(source)
+    assert sheets == ['Class1', 'Class2']
+    result = processor.process_workbook_sheets(source, sheets, max_workers=2)
+    assert list(result['sheets']) == ['Class1', 'Class2']
+    assert [s['rows'] for s in result['stats']] == [2, 1]
+    assert (result['sheets']['Class1']['status'] == 'ok').all()
+
+    output = processor.export_results_multi(result, str(tmp_path / "out.xlsx"))
+    assert openpyxl.load_workbook(output).sheetnames == ['Class1', 'Class2', 'Metadata', 'Sheet_Stats']
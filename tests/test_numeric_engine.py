@@ -0,0 +1,79 @@
+"""Test engine đáp số số học (NumPy): khoảng cách, tương giao, diện tích, thể tích trên cả cột"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+import openpyxl
+import pandas as pd
+from services.geometry.numeric_engine import compute_answers, answer_columns, parse_components
+from services.excel.large_file_processor import LargeFileProcessor
+from services.geometry.geometry_service import GeometryService
+
+PLANE_B = {'P2_a': ['0', '1', '2'], 'P2_b': ['0', '0', '0'], 'P2_c': ['1', '0', '0'], 'P2_d': ['-3', '2', '0']}
+
+
+def test_parse_components_pads_and_rejects():
+    values = parse_components(pd.Series(['1, 2', '', 'x,1,2', '1,2,3,4', None]), 3)
+    assert values[0].tolist() == [1.0, 2.0, 0.0] and values[3].tolist() == [1.0, 2.0, 3.0]
+    assert all(math.isnan(v) for v in values[1]) and math.isnan(values[2][0]) and math.isnan(values[4][0])
+
+
+def test_operations_match_hand_values():
+    frame = pd.DataFrame({'data_A': ['1,2,5', '1,2,5', ''], **PLANE_B})
+    assert compute_answers(frame, "Điểm", "Mặt phẳng", "Khoảng cách")['answer_distance'].tolist()[:2] == [2.0, 3.0]
+    assert math.isnan(compute_answers(frame, "Điểm", "Mặt phẳng", "Khoảng cách")['answer_distance'][2])
+
+    line = pd.DataFrame({'d_P_data_A': ['0,0,0', '0,0,0', '1,1,1'], 'd_V_data_A': ['1,1,1', '0,1,0', '1,0,0'], **PLANE_B})
+    hit = compute_answers(line, "Đường thẳng", "Mặt phẳng", "Tương giao")
+    assert hit.iloc[0].tolist() == [3.0, 3.0, 3.0] and hit.iloc[2].tolist() == [0.0, 1.0, 1.0]
+    assert hit.iloc[1].isna().all()  # line parallel to the plane
+
+    planes = pd.DataFrame({'P1_a': ['1', '1'], 'P1_b': ['0', '0'], 'P1_c': ['0', '0'], 'P1_d': ['-1', '-1'],
+                           'P2_a': ['0', '2'], 'P2_b': ['1', '0'], 'P2_c': ['0', '0'], 'P2_d': ['-2', '0']})
+    meet = compute_answers(planes, "Mặt phẳng", "Mặt phẳng", "Tương giao")
+    assert meet.iloc[0].tolist() == [1.0, 2.0, 0.0, 0.0, 0.0, 1.0] and meet.iloc[1].isna().all()
+
+    sphere = pd.DataFrame({'S_data_I1': ['0,0,0', '0,0,0', '0,0,0'], 'S_data_R1': ['5', '1', '2'], **PLANE_B})
+    circle = compute_answers(sphere, "Mặt cầu", "Mặt phẳng", "Tương giao")
+    assert circle.iloc[0].tolist() == [0.0, 0.0, 3.0, 4.0] and math.isnan(circle['answer_r'][1])
+    assert circle['answer_r'][2] == 2.0  # plane through the center
+    # Swapped order uses the same formula
+    swapped = sphere.rename(columns={'S_data_I1': 'S_data_I2', 'S_data_R1': 'S_data_R2',
+                                     'P2_a': 'P1_a', 'P2_b': 'P1_b', 'P2_c': 'P1_c', 'P2_d': 'P1_d'})
+    pd.testing.assert_frame_equal(compute_answers(swapped, "Mặt phẳng", "Mặt cầu", "Tương giao"), circle)
+
+    shapes = pd.DataFrame({'C_data_R1': ['2'], 'S_data_R1': ['3']})
+    assert compute_answers(shapes, "Đường tròn", None, "Diện tích")['answer_area'][0] == round(4 * math.pi, 10)
+    assert compute_answers(shapes, "Mặt cầu", None, "Thể tích")['answer_volume'][0] == round(36 * math.pi, 10)
+    assert answer_columns("Thể tích", "Điểm") == []
+    assert compute_answers(shapes, "Điểm", "Điểm", "Thể tích").columns.empty
+
+
+def test_batch_outputs_gain_answer_columns(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'keylog', 'P2_a', 'P2_b', 'P2_c', 'P2_d'])
+    for row in zip(['1,2,5', '1,2,5', '4,4,4'], *PLANE_B.values()):
+        wb.active.append([row[0], 'old'] + list(row[1:]))
+    wb.save(path)
+    settings = ("Điểm", "Mặt phẳng", "Khoảng cách", "3", "3")
+
+    service = GeometryService({'numeric_answers': True})
+    results, output, _, errors = service._process_excel_normal(path, *settings, str(tmp_path / "out.xlsx"))
+    written = pd.read_excel(output)
+    assert written['answer_distance'].tolist() == [2.0, 3.0, 4.0] and written['keylog'].tolist() == results
+
+    success, errors, output = LargeFileProcessor({'numeric_answers': True}).process_large_excel_fast(
+        path, *settings, str(tmp_path / "large.xlsx"))
+    rows = list(openpyxl.load_workbook(output, read_only=True).active.iter_rows(values_only=True))
+    assert list(rows[0]) == ['data_A', 'keylog', 'P2_a', 'P2_b', 'P2_c', 'P2_d', 'answer_distance']
+    assert [row[1] for row in rows[1:]] == results
+    assert [float(row[-1]) for row in rows[1:]] == [2.0, 3.0, 4.0]
+    assert not [name for name in os.listdir(tmp_path) if 'temp_results' in name]
+
+    # Off by default: no answer columns
+    _, output, _, _ = GeometryService()._process_excel_normal(path, *settings, str(tmp_path / "plain.xlsx"))
+    assert 'answer_distance' not in pd.read_excel(output).columns
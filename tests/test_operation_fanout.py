@@ -0,0 +1,63 @@
+"""Test fan-out nhiều phép toán: mã hóa giá trị một lần, mỗi phép toán một cột keylog"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.excel.large_file_processor import LargeFileProcessor
+from services.geometry.geometry_service import GeometryService
+
+OPERATIONS = ["Tương giao", "Khoảng cách", "Diện tích"]
+COLUMNS = ['keylog_Tương giao', 'keylog_Khoảng cách', 'keylog_Diện tích']
+ROWS = [{'data_A': f'{j % 5},1,2', 'data_B': f'3,{j % 4},1'} for j in range(30)]
+
+
+def _expected(frame):
+    return pd.DataFrame({f"keylog_{op}": GeometryService().process_records(
+        frame, "Điểm", "Điểm", op, "3", "3").tolist() for op in OPERATIONS}, index=frame.index)
+
+
+def test_fanout_matches_single_operation_runs():
+    frame = pd.DataFrame(ROWS, index=range(50, 80))
+    expected = _expected(frame)
+    service = GeometryService()
+    result = service.process_records_operations(frame, "Điểm", "Điểm", OPERATIONS, "3", "3")
+    assert list(result.columns) == COLUMNS and list(result.index) == list(frame.index)
+    pd.testing.assert_frame_equal(result, expected)
+    assert len(set(result.iloc[0])) == 3
+
+    rows = list(service.process_records_operations(iter(ROWS), "Điểm", "Điểm", OPERATIONS + [""], "3", "3"))
+    assert rows == expected.values.tolist()
+    try:
+        service.process_records_operations(frame, "Điểm", "Điểm", [], "3", "3")
+        assert False, "expected an error for no operations"
+    except Exception as e:
+        assert 'phép toán' in str(e)
+
+
+def test_fanout_file_normal_and_large_paths(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B', 'keylog'])
+    for row in ROWS:
+        wb.active.append([row['data_A'], row['data_B'], 'old'])
+    wb.save(path)
+    expected = _expected(pd.DataFrame(ROWS))
+
+    output, success, errors = GeometryService().process_excel_operations(
+        path, "Điểm", "Điểm", OPERATIONS, "3", "3", str(tmp_path / "out.xlsx"))
+    assert (success, errors) == (30, 0)
+    written = pd.read_excel(output, dtype=str)
+    assert written['keylog'].tolist() == ['old'] * 30
+    pd.testing.assert_frame_equal(written[COLUMNS], expected)
+
+    success, errors, output = LargeFileProcessor().process_large_excel_operations(
+        path, "Điểm", "Điểm", OPERATIONS, "3", "3", str(tmp_path / "large.xlsx"))
+    assert (success, errors) == (30, 0)
+    rows = list(openpyxl.load_workbook(output, read_only=True).active.iter_rows(values_only=True))
+    assert list(rows[0]) == ['data_A', 'data_B', 'keylog'] + COLUMNS
+    assert [list(row[3:]) for row in rows[1:]] == expected.values.tolist()
+    assert not [name for name in os.listdir(tmp_path) if 'temp_results' in name]
@@ -0,0 +1,58 @@
+"""Test output_styles - named style dùng chung cho keylog, độ rộng cột lấy mẫu khi ghi stream"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.excel.output_styles import ColumnWidthSampler, KEYLOG_STYLE
+from services.excel.spill_writer import SpillingXlsxWriter
+from services.excel.excel_processor import ExcelProcessor
+
+
+def test_sampler_uses_only_first_rows():
+    sampler = ColumnWidthSampler(['a', 'keylog'], sample_rows=2, cap=40)
+    assert sampler.observe(['x' * 15, None]) is True
+    assert sampler.observe([1, 'y' * 100]) is False
+    assert sampler.observe(['z' * 30, '']) is False  # after the sample: ignored
+    assert sampler.widths() == {0: 17, 1: 42}
+
+
+def test_spill_writer_styles_and_sampled_widths(tmp_path):
+    out = str(tmp_path / "out.xlsx")
+    writer = SpillingXlsxWriter(out, ['data_A', 'keylog'], keylog_col_index=1)
+    for j in range(500):
+        writer.append([f'{j},1,2,3,4,5,6,7', 'w' * (5 if j < 300 else 60)])
+    writer.close()
+    ws = openpyxl.load_workbook(out).active
+    assert ws.max_row == 501
+    assert ws['B2'].style == KEYLOG_STYLE and ws['B2'].font.name == "Flexio Fx799VN"
+    assert ws['A2'].style == 'Normal'
+    # Rows past the sample do not widen the column
+    assert ws.column_dimensions['B'].width == 10
+    assert ws.column_dimensions['A'].width == len('199,1,2,3,4,5,6,7') + 2
+
+
+def test_results_worksheet_column_formats(tmp_path):
+    out = str(tmp_path / "results.xlsx")
+    df = pd.DataFrame({'data_A': ['1,2'] * 5, 'Kết quả mã hóa': ['wj1=2=='] * 5, 'n': [1.5, None, 2, 3, 4]})
+    ExcelProcessor().export_results(df, ['wj1=2=='] * 5, out)
+    ws = openpyxl.load_workbook(out).active
+    assert ws['A1'].font.bold and ws['A1'].font.sz == 12 and ws['A1'].fill.fgColor.rgb.endswith('2E86AB')
+    assert ws['B2'].value == 'wj1=2==' and ws['B2'].font.bold and ws['B2'].font.color.rgb.endswith('2E7D32')
+    assert int(ws.column_dimensions['A'].width) == len('data_A') + 2  # xlsxwriter adds Excel's pixel padding
+    # Data cells take the Arial 10 column format as they are written (no restyle pass)
+    assert ws['A2'].font.name == 'Arial' and ws['A2'].font.sz == 10 and not ws['A2'].font.bold
+    assert ws['C2'].value == 1.5 and ws['C3'].value is None and ws.max_row == 6
+
+
+def test_results_data_style_keeps_number_formats(tmp_path):
+    out = str(tmp_path / "dates.xlsx")
+    df = pd.DataFrame({'when': pd.to_datetime(['2024-01-02', None]), 'keylog': ['x', 'y']})
+    ExcelProcessor().export_results(df, ['wj1=', 'wj2='], out)
+    ws = openpyxl.load_workbook(out).active
+    assert ws['A2'].font.name == 'Arial' and ws['A2'].is_date and ws['A2'].value.year == 2024
+    assert ws['A3'].value is None
+    assert ws['B2'].font.bold and ws['B2'].value == 'wj1='
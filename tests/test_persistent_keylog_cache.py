@@ -0,0 +1,61 @@
+"""Test PersistentKeylogCache - cache giữa các lần chạy, LRU giới hạn kích thước, đọc đồng thời"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.excel.persistent_keylog_cache import PersistentKeylogCache, mapping_files_fingerprint
+from services.excel.large_file_processor import LargeFileProcessor
+from services.equation.equation_batch_processor import EquationBatchProcessor
+
+
+def test_hits_across_instances_and_lru_bound(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    with PersistentKeylogCache(db, max_entries=3) as cache:
+        for i in range(5):
+            assert cache.get_or_compute('m', 'cfg', [i], lambda: {'k': i}) == {'k': i}
+        assert cache.hits == 0
+    with PersistentKeylogCache(db, max_entries=3) as cache:
+        # Oldest two were evicted on close
+        assert len(cache) == 3 and cache.get_or_compute('m', 'cfg', [4], lambda: None) == {'k': 4}
+        assert cache.get_or_compute('m', 'cfg', [0], lambda: 'recomputed') == 'recomputed'
+        # Another config hash is another key
+        assert cache.get_or_compute('m', 'other', [4], lambda: 'x') == 'x'
+        # A second connection (another worker) reads concurrently under WAL
+        reader = PersistentKeylogCache(db)
+        assert reader.get_or_compute('m', 'cfg', [3], lambda: None) == {'k': 3}
+        reader.close()
+        assert cache.stats()['hits'] == 1
+    assert len(mapping_files_fingerprint('geometry_mode')) == 32
+
+
+def test_geometry_second_run_hits(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(60):
+        wb.active.append([f'{j},1', '0,0'])
+    wb.save(path)
+    db = str(tmp_path / "keylogs.sqlite")
+    outputs = []
+    for run in range(2):
+        processor = LargeFileProcessor({'fast_xml_reader': True, 'keylog_cache_path': db})
+        out = str(tmp_path / f"out{run}.xlsx")
+        assert processor.process_large_excel_fast(path, "Điểm", "Điểm", "Khoảng cách", "2", "2", out)[:2] == (60, 0)
+        outputs.append(list(openpyxl.load_workbook(out).active.iter_rows(values_only=True)))
+        stats = processor.get_processing_statistics()['keylog_cache']
+        assert stats['lookups'] == 60 and stats['hits'] == (0 if run == 0 else 60)
+    assert outputs[0] == outputs[1]
+
+
+def test_equation_batch_uses_cache(tmp_path):
+    db = str(tmp_path / "keylogs.sqlite")
+    df = pd.DataFrame({'Phương trình 1': ['1,1,3', '2,1,4'], 'Phương trình 2': ['1,-1,1', '1,1,1']})
+    first = EquationBatchProcessor(keylog_cache_path=db).process_dataframe(df, 2, 'fx799')
+    processor = EquationBatchProcessor(keylog_cache_path=db)
+    second = processor.process_dataframe(df, 2, 'fx799')
+    assert processor.last_cache_stats['hit_rate'] == 1.0
+    assert first.equals(second)
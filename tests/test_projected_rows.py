@@ -0,0 +1,70 @@
+"""Test iter_projected_row_chunks - đọc tuple theo cột yêu cầu, các nhánh reader cho cùng kết quả"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from services.excel.large_file_processor import LargeFileProcessor
+
+HEADER = [' data_B ', 'note', 'data_A', None, 'keylog']
+ROWS = [
+    ['4,5,6', 'n1', '1,2,3', 'x', 'old'],
+    ['7,8', None, '9', None, None],   # blanks inside the row
+    ['0,0,1'],                        # short row: trailing cells absent
+    [None, None, 5, None, 'k'],       # numeric cell
+]
+COLUMNS = ['data_A', 'data_B', 'missing', 'keylog ']
+EXPECTED = [
+    ('1,2,3', '4,5,6', '', 'old'),
+    ('9', '7,8', '', ''),
+    ('', '0,0,1', '', ''),
+    ('5', '', '', 'k'),
+]
+
+
+def _workbook(path):
+    wb = openpyxl.Workbook()
+    wb.active.append(HEADER)
+    for row in ROWS:
+        wb.active.append(row)
+    wb.save(path)
+    return path
+
+
+def _read(processor, path, chunksize=3):
+    return [row for chunk in processor.iter_projected_row_chunks(path, COLUMNS, chunksize) for row in chunk]
+
+
+def test_header_positions_strip_and_mark_absent():
+    assert LargeFileProcessor._header_positions(HEADER, COLUMNS) == [2, 0, -1, 4]
+    assert LargeFileProcessor._header_positions([], ['data_A']) == [-1]
+
+
+def test_reader_branches_project_the_same_rows(tmp_path):
+    path = _workbook(str(tmp_path / "in.xlsx"))
+    csv_path = str(tmp_path / "in.csv")
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write(",".join(cell or "" for cell in HEADER) + "\n")
+        for row in ROWS:
+            f.write(",".join("" if cell is None else f'"{cell}"' for cell in row) + "\n")
+
+    openpyxl_rows = _read(LargeFileProcessor({'adaptive_chunks': False}), path)
+    assert openpyxl_rows == EXPECTED
+    assert _read(LargeFileProcessor({'fast_xml_reader': True, 'adaptive_chunks': False}), path) == EXPECTED
+    assert _read(LargeFileProcessor({'adaptive_chunks': False}), csv_path) == EXPECTED
+
+    # Arrow sidecar: first pass builds it, second reads it back
+    os.makedirs(tmp_path / "cache")
+    config = {'columnar_cache': True, 'columnar_cache_dir': str(tmp_path / "cache"), 'adaptive_chunks': False}
+    assert _read(LargeFileProcessor(config), path) == EXPECTED
+    assert _read(LargeFileProcessor(config), path) == EXPECTED
+
+
+def test_chunks_hold_plain_tuples(tmp_path):
+    path = _workbook(str(tmp_path / "in.xlsx"))
+    chunks = list(LargeFileProcessor({'fast_xml_reader': True, 'adaptive_chunks': False})
+                  .iter_projected_row_chunks(path, ['data_A'], 3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    assert all(type(row) is tuple and len(row) == 1 for chunk in chunks for row in chunk)
@@ -0,0 +1,48 @@
+"""Test ResultsStore - length-prefixed results với offset index"""
+import sys
+import os
+import threading
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.excel.results_store import ResultsStore
+
+
+def test_multiline_results_do_not_shift_rows(tmp_path):
+    store = ResultsStore(str(tmp_path / "out.xlsx.temp_results"))
+    store.append_many(["wj113=1=", "LỖI: dòng 1\ndòng 2\n", ""])
+    store.append("last")
+    assert len(store) == 4
+    assert store[1] == "LỖI: dòng 1\ndòng 2\n"
+    assert store[-1] == "last"
+    assert list(store.iter_range(1, 3)) == ["LỖI: dòng 1\ndòng 2\n", ""]
+    assert store.head(2) == ["wj113=1=", "LỖI: dòng 1\ndòng 2\n"]
+    # Appends after a read are picked up by the next access (re-mapping)
+    store.append_many(["more"])
+    assert list(store)[-2:] == ["last", "more"]
+    store.remove()
+    assert not os.path.exists(store.path) and not os.path.exists(store.index_path)
+
+
+def test_concurrent_batches_stay_contiguous(tmp_path):
+    path = str(tmp_path / "shared.temp_results")
+
+    def worker(worker_id):
+        writer = ResultsStore(path)
+        for batch in range(20):
+            writer.append_many([f"{worker_id}:{batch}:{i}" for i in range(50)])
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with ResultsStore(path) as store:
+        records = list(store)
+    assert len(records) == 4 * 20 * 50
+    # Every 50-record batch is written contiguously and in order
+    for start in range(0, len(records), 50):
+        worker_id, batch, _ = records[start].split(":")
+        assert records[start:start + 50] == [f"{worker_id}:{batch}:{i}" for i in range(50)]
@@ -0,0 +1,102 @@
+"""Test cột cấu hình theo dòng (shape_A / shape_B / operation / dim) - một file chứa nhiều dạng bài"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pandas as pd
+from services.excel.row_config import resolve_row_settings, row_config_columns
+from services.excel.large_file_processor import LargeFileProcessor
+from services.geometry.geometry_service import GeometryService
+
+DEFAULTS = ("Điểm", "Điểm", "Khoảng cách", "3", "3")
+COLUMNS = ['shape_A', 'shape_B', 'operation', 'dim', 'data_A', 'data_B', 'C_data_I1', 'C_data_R1']
+MIXED_ROWS = [
+    ['', '', '', '', '1,2,3', '4,5,6', '', ''],
+    ['Đường tròn', '', 'Diện tích', '2', '', '', '1,2', '5'],
+    ['', '', '', '2', '1,2', '3,4', '', ''],
+    ['', '', '', '', '1,2,3', '4,5,6', '', ''],
+]
+
+
+def _single(shape_a, shape_b, operation, dim, row):
+    frame = pd.DataFrame([row], columns=COLUMNS).drop(columns=['shape_A', 'shape_B', 'operation', 'dim'])
+    return GeometryService().process_records(frame, shape_a, shape_b, operation, dim, dim).iloc[0]
+
+
+def test_resolve_row_settings():
+    assert row_config_columns([' dim ', 'data_A', 'shape_A']) == ['shape_A', 'dim']
+    assert resolve_row_settings({}, DEFAULTS) == DEFAULTS
+    assert resolve_row_settings({'dim': '2.0'}, DEFAULTS) == ("Điểm", "Điểm", "Khoảng cách", "2", "2")
+    assert resolve_row_settings({'shape_A': "Mặt cầu", 'operation': "Thể tích"}, DEFAULTS) == \
+        ("Mặt cầu", None, "Thể tích", "3", "3")
+
+
+def test_mixed_frame_matches_single_config_runs():
+    expected = [
+        _single("Điểm", "Điểm", "Khoảng cách", "3", MIXED_ROWS[0]),
+        _single("Đường tròn", None, "Diện tích", "2", MIXED_ROWS[1]),
+        _single("Điểm", "Điểm", "Khoảng cách", "2", MIXED_ROWS[2]),
+    ]
+    expected.append(expected[0])
+    assert not any(result.startswith("LỖI") for result in expected)
+
+    frame = pd.DataFrame(MIXED_ROWS, columns=COLUMNS, index=[10, 11, 12, 13])
+    service = GeometryService()
+    series = service.process_records(frame, *DEFAULTS)
+    assert series.tolist() == expected and list(series.index) == [10, 11, 12, 13]
+    # Generator path: same settings resolution per record
+    records = [dict(zip(COLUMNS, row)) for row in MIXED_ROWS]
+    assert list(service.process_records(records, *DEFAULTS)) == expected
+
+
+def test_mixed_file_normal_and_large_paths(tmp_path):
+    path = str(tmp_path / "mixed.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(COLUMNS)
+    for row in MIXED_ROWS:
+        wb.active.append([cell or None for cell in row])
+    wb.save(path)
+    expected = GeometryService().process_records(pd.DataFrame(MIXED_ROWS, columns=COLUMNS), *DEFAULTS).tolist()
+
+    service = GeometryService()
+    results, _, success, errors = service._process_excel_normal(path, *DEFAULTS, str(tmp_path / "out.xlsx"))
+    # Same read as the batch path (pandas may turn numeric cells into floats)
+    assert results == service.process_records(service.excel_processor.read_excel_data(path), *DEFAULTS).tolist()
+    assert results[0] == expected[0] and (success, errors) == (4, 0)
+
+    output = str(tmp_path / "large_out.xlsx")
+    success, errors, final_output = LargeFileProcessor().process_large_excel_fast(path, *DEFAULTS, output)
+    assert (success, errors) == (4, 0)
+    ws = openpyxl.load_workbook(final_output, read_only=True).active
+    rows = list(ws.iter_rows(values_only=True))
+    keylog = [str(cell).strip() for cell in rows[0]].index('keylog')
+    assert [row[keylog] for row in rows[1:]] == expected
+
+
+def test_unknown_config_values_give_error_rows(tmp_path):
+    columns = ['shape_A', 'operation', 'dim', 'data_A', 'data_B']
+    rows = [['Diem', '', '', '1,2,3', '4,5,6'],
+            ['', 'Khoang cach', '', '1,2,3', '4,5,6'],
+            ['', '', '4', '1,2,3', '4,5,6'],
+            ['', '', '', '1,2,3', '4,5,6']]
+    frame = pd.DataFrame(rows, columns=columns)
+    service = GeometryService()
+    results = service.process_records(frame, *DEFAULTS).tolist()
+    assert [result.startswith("LỖI") for result in results] == [True, True, True, False]
+    assert "'Diem'" in results[0] and "'Khoang cach'" in results[1] and "'4'" in results[2]
+    assert list(service.process_records([dict(zip(columns, row)) for row in rows], *DEFAULTS)) == results
+
+    path = str(tmp_path / "typos.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(columns)
+    for row in rows:
+        wb.active.append([cell or None for cell in row])
+    wb.save(path)
+    success, errors, output = LargeFileProcessor().process_large_excel_fast(path, *DEFAULTS, str(tmp_path / "out.xlsx"))
+    assert (success, errors) == (1, 3)
+    written = list(openpyxl.load_workbook(output, read_only=True).active.iter_rows(values_only=True))
+    keylog = list(written[0]).index('keylog')
+    assert [row[keylog] for row in written[1:]] == results
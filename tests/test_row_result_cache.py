@@ -0,0 +1,65 @@
+"""Test RowResultCache - dòng trùng chỉ tính một lần, lỗi cũng được cache, thống kê tỷ lệ trùng"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+import pytest
+from services.excel.row_result_cache import RowResultCache
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def test_computes_each_key_once_and_caches_errors():
+    cache = RowResultCache()
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        if value < 0:
+            raise ValueError(f"bad {value}")
+        return value * 2
+
+    for value in [1, 2, 1, 1, -1, 2, -1]:
+        try:
+            assert cache.get_or_compute((value,), lambda: compute(value)) == value * 2
+        except ValueError as e:
+            assert str(e) == "bad -1"
+    assert calls == [1, 2, -1]
+    stats = cache.stats()
+    assert (stats['rows'], stats['computed'], stats['duplicates']) == (7, 3, 4)
+    assert stats['duplication_ratio'] == pytest.approx(4 / 7)
+
+
+def test_bounded_lru():
+    cache = RowResultCache(max_entries=2)
+    for key in ['a', 'b', 'a', 'c', 'b']:
+        cache.get_or_compute(key, lambda: key.upper())
+    # 'b' was evicted by 'c' ('a' was more recent), so it was computed twice
+    assert len(cache) == 2 and cache.evictions == 2 and cache.stats()['computed'] == 4
+
+
+def test_processor_dedups_rows_and_output_matches(tmp_path):
+    path = str(tmp_path / "in.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['data_A', 'data_B'])
+    for j in range(400):
+        wb.active.append([f'{j % 10},1', f'{j % 4},2'])
+    wb.save(path)
+
+    outputs = {}
+    for dedup in (True, False):
+        processor = LargeFileProcessor({'fast_xml_reader': True, 'row_dedup': dedup})
+        out = str(tmp_path / f"out_{dedup}.xlsx")
+        assert processor.process_large_excel_fast(
+            path, "Điểm", "Điểm", "Khoảng cách", "2", "2", out)[:2] == (400, 0)
+        outputs[dedup] = [row for row in openpyxl.load_workbook(out).active.iter_rows(values_only=True)]
+        stats = processor.get_processing_statistics()['row_dedup']
+        if dedup:
+            # lcm(10, 4) = 20 distinct input pairs
+            assert stats['rows'] == 400 and stats['computed'] == 20
+            assert stats['duplication_ratio'] == pytest.approx(0.95)
+        else:
+            assert stats == 'disabled'
+    assert outputs[True] == outputs[False]
@@ -0,0 +1,74 @@
+"""Test SpillingXlsxWriter + streaming rebuild - không còn giới hạn 250k dòng"""
+import sys
+import os
+import tracemalloc
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from services.excel.spill_writer import SpillingXlsxWriter
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def _create_input(path, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Data")
+    ws.append(['data_A', 'data_B'])
+    for j in range(rows):
+        ws.append([f'{j % 10},{(j + 1) % 10}', f'{(j + 2) % 10},{(j + 3) % 10}'])
+    wb.save(path)
+    return path
+
+
+def test_spill_to_sheets_and_files(tmp_path):
+    output = str(tmp_path / "out.xlsx")
+    with SpillingXlsxWriter(output, ['a', 'keylog'], rows_per_sheet=3, keylog_col_index=1) as writer:
+        for j in range(7):
+            writer.append([str(j), f'k{j}'])
+    assert writer.output_files == [output]
+    wb = openpyxl.load_workbook(output)
+    assert wb.sheetnames == ['Results', 'Results_2', 'Results_3']
+    assert [c.value for c in wb['Results_3']['A']] == ['a', '6']
+    assert wb['Results_2']['B2'].font.name == 'Flexio Fx799VN'
+
+    with SpillingXlsxWriter(output, ['a'], spill_mode='files', rows_per_sheet=4) as writer:
+        for j in range(5):
+            writer.append([str(j)])
+    assert [os.path.basename(f) for f in writer.output_files] == ['out.xlsx', 'out_2.xlsx']
+    assert openpyxl.load_workbook(writer.output_files[1])['Results']['A2'].value == '4'
+
+
+def test_processor_spills_without_row_cap(tmp_path):
+    source = _create_input(str(tmp_path / "in.xlsx"), 25)
+    output = str(tmp_path / "out.xlsx")
+    processor = LargeFileProcessor({'rows_per_sheet': 10})
+    assert processor.max_rows_allowed is None
+    success, errors, final = processor.process_large_excel_fast(
+        source, "Điểm", "Điểm", "Khoảng cách", "2", "2", output)
+    assert (success, errors, final) == (25, 0, output)
+    wb = openpyxl.load_workbook(output)
+    assert wb.sheetnames == ['Results', 'Results_2', 'Results_3']
+    assert wb['Results_3'].max_row == 6
+    assert wb['Results']['C1'].value == 'keylog' and wb['Results']['C2'].value.startswith('wj112')
+
+
+def _peak_finalize_bytes(tmp_path, rows):
+    source = _create_input(str(tmp_path / f"in_{rows}.xlsx"), rows)
+    processor = LargeFileProcessor({'rows_per_sheet': 4000})
+    temp_results = str(tmp_path / f"res_{rows}")
+    processor._write_results_buffer_fast(temp_results, [f"wj112={j % 10}=" for j in range(rows)])
+    tracemalloc.start()
+    processor._create_excel_streaming_rebuild(source, temp_results, str(tmp_path / f"out_{rows}.xlsx"),
+                                              False, 'keylog', -1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert processor.last_output_files == [str(tmp_path / f"out_{rows}.xlsx")]
+    return peak
+
+
+def test_rebuild_peak_memory_independent_of_rows(tmp_path):
+    small = _peak_finalize_bytes(tmp_path, 1_000)
+    large = _peak_finalize_bytes(tmp_path, 8_000)
+    print(f"📊 Peak finalize memory: {small / 1024:.0f}KB (1k rows) vs {large / 1024:.0f}KB (8k rows)")
+    assert large < small * 1.5
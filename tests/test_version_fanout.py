@@ -0,0 +1,79 @@
+"""Test fan-out nhiều phiên bản máy: mã hóa hệ số một lần, mỗi phiên bản một cột keylog"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from services.equation.equation_batch_processor import EquationBatchProcessor
+from services.polynomial.polynomial_excel_processor import PolynomialExcelProcessor
+from services.geometry.geometry_service import GeometryService
+from services.vector.vector_service import VectorService
+
+VERSIONS = ["fx799", "fx880", "fx801"]
+
+
+def test_equation_version_fanout_matches_single_runs(tmp_path):
+    df = pd.DataFrame({'Phương trình 1': ['2,3,7', '1,1,2', '2,3,7'],
+                       'Phương trình 2': ['1,-1,1', '1,-1,0', '1,-1,1']})
+    fanout = EquationBatchProcessor().process_dataframe(df, 2, "fx799", VERSIONS + ["fx880"])
+    assert 'keylog' not in fanout.columns
+    for version in VERSIONS:
+        single = EquationBatchProcessor().process_dataframe(df, 2, version)
+        assert fanout[f"keylog_{version}"].tolist() == single['keylog'].tolist()
+    assert fanout['keylog_fx799'][0] != fanout['keylog_fx880'][0]
+
+    path = str(tmp_path / "eq.csv")
+    df.to_csv(path, index=False)
+    output = EquationBatchProcessor().process_file_chunked(path, 2, "fx799", str(tmp_path / "eq_out.csv"),
+                                                           versions=VERSIONS)
+    written = pd.read_csv(output, dtype=str)
+    assert written['keylog_fx880'].tolist() == fanout['keylog_fx880'].tolist()
+
+
+def test_polynomial_version_fanout_matches_single_runs():
+    df = pd.DataFrame({'a': ['1', '1'], 'b': ['-3', '0'], 'c': ['2', '-4']})
+    versions = ["fx799", "fx991"]
+    fanout = PolynomialExcelProcessor(2, versions=versions).process_dataframe(df)
+    assert 'keylog' not in fanout.columns
+    for version in versions:
+        single = PolynomialExcelProcessor(2, default_version=version).process_dataframe(df)
+        assert fanout[f"keylog_{version}"].tolist() == single['keylog'].tolist()
+
+
+def test_geometry_version_fanout_swaps_prefix():
+    service = GeometryService()
+    frame = pd.DataFrame({'data_A': ['1,2,3', '4,5,6'], 'data_B': ['0,0,1', '1,1,1']})
+    keylogs = service.process_records_operations(frame, "Điểm", "Điểm", ["Khoảng cách"], "3", "3",
+                                                 versions=VERSIONS)
+    assert list(keylogs.columns) == ['keylog_fx799', 'keylog_fx880', 'keylog_fx801']
+    single = service.process_records(frame, "Điểm", "Điểm", "Khoảng cách", "3", "3")
+    prefix = service.current_version_config.get("prefix", "wj")
+    for version in VERSIONS:
+        expected = [service.get_version_prefix(version) + keylog[len(prefix):] for keylog in single]
+        assert keylogs[f"keylog_{version}"].tolist() == expected
+    both = service.process_records_operations(frame, "Điểm", "Điểm", ["Tương giao", "Khoảng cách"], "3", "3",
+                                              versions=["fx799", "fx880"])
+    assert list(both.columns)[-1] == 'keylog_Khoảng cách_fx880'
+
+
+def test_vector_version_keylogs_swap_only_the_prefix():
+    service = VectorService()
+    service.set_calculation_type("vector_vector")
+    service.set_dimension(3)
+    service.set_operation("dot_product")
+    assert service.process_vector_A("1,2,3") and service.process_vector_B("4,5,6")
+    versions = ["fx799", "fx991", "fx570"]
+    keylogs = service.generate_final_keylogs(versions)
+    for version in versions:
+        service.set_version(version)
+        assert keylogs[version] == service.generate_final_keylog()
+        assert keylogs[version].startswith(service.get_vector_prefix(version))
+    assert keylogs["fx799"][len("wv"):] == keylogs["fx991"][len("VEC"):]
+
+    # Keylog that failed to build (ERROR: ...) is returned unchanged for every version
+    service.encoded_vector_B = None
+    failed = service.generate_final_keylogs(versions)
+    assert set(failed) == set(versions) and len(set(failed.values())) == 1
+    assert failed["fx991"].startswith("ERROR:")
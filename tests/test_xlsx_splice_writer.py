@@ -0,0 +1,82 @@
+"""Test XlsxKeylogSplicer - chỉ cột keylog thay đổi, phần còn lại giữ nguyên"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from openpyxl.styles import Font
+from services.excel.xlsx_splice_writer import XlsxKeylogSplicer
+from services.excel.large_file_processor import LargeFileProcessor
+
+
+def _create_input(path, with_keylog):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    header = ['data_A', 'data_B'] + (['keylog', 'note'] if with_keylog else [])
+    ws.append(header)
+    for j in range(5):
+        row = [f'{j},{j + 1}', f'{j + 2},{j + 3}'] + (['stale', f'n{j}'] if with_keylog else [])
+        ws.append(row)
+    ws['A2'].font = Font(italic=True)
+    wb.create_sheet("Summary").append(['keep', 'me'])
+    wb.save(path)
+    return path
+
+
+def test_splice_appends_new_keylog_column(tmp_path):
+    source = _create_input(str(tmp_path / "in.xlsx"), with_keylog=False)
+    output = str(tmp_path / "out.xlsx")
+    results = [f'wj113={j}=' for j in range(5)]
+    stats = XlsxKeylogSplicer(source).write(output, results)
+    assert stats['rows_written'] == 5
+    assert stats['keylog_column'] == 'C'
+
+    wb = openpyxl.load_workbook(output)
+    ws = wb["Data"]
+    assert ws['C1'].value == 'keylog'
+    assert [ws.cell(row=r, column=3).value for r in range(2, 7)] == results
+    assert ws['C2'].font.name == 'Flexio Fx799VN' and ws['C2'].font.bold
+    assert ws['A2'].font.italic and ws['B6'].value == '6,7'
+    assert wb["Summary"]['B1'].value == 'me'
+    wb.close()
+
+
+def test_splice_replaces_existing_keylog_cells(tmp_path):
+    source = _create_input(str(tmp_path / "in.xlsx"), with_keylog=True)
+    output = str(tmp_path / "out.xlsx")
+    XlsxKeylogSplicer(source).write(output, ['k0', '', 'k<2>&', 'k3', 'k4'], keylog_col_index=2)
+
+    ws = openpyxl.load_workbook(output)["Data"]
+    assert [ws.cell(row=r, column=3).value for r in range(1, 7)] == ['keylog', 'k0', None, 'k<2>&', 'k3', 'k4']
+    assert [ws.cell(row=r, column=4).value for r in range(2, 7)] == [f'n{j}' for j in range(5)]
+
+
+def test_failed_splice_leaves_no_temp_file(tmp_path):
+    source = _create_input(str(tmp_path / "in.xlsx"), with_keylog=False)
+    output = str(tmp_path / "out.xlsx")
+
+    def results():
+        yield 'k0'
+        raise RuntimeError("encoder failed")
+
+    try:
+        XlsxKeylogSplicer(source).write(output, results())
+        assert False, "expected the encoder error"
+    except RuntimeError as e:
+        assert str(e) == "encoder failed"
+    assert sorted(os.listdir(tmp_path)) == ["in.xlsx"]
+
+
+def test_large_processor_splice_mode(tmp_path):
+    source = _create_input(str(tmp_path / "in.xlsx"), with_keylog=True)
+    output = str(tmp_path / "out.xlsx")
+    processor = LargeFileProcessor({'output_mode': 'splice'})
+    success, errors, final = processor.process_large_excel_fast(
+        source, "Điểm", "Điểm", "Khoảng cách", "2", "2", output)
+    assert (success, errors, final) == (5, 0, output)
+    wb = openpyxl.load_workbook(output)
+    assert wb.sheetnames == ["Data", "Summary"]
+    assert wb["Data"]['C2'].value.startswith('wj112')
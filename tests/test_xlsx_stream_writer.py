@@ -0,0 +1,83 @@
+"""Test StreamingXlsxWriter - XML ghi thẳng vào zip, inline string, style keylog cố định"""
+import sys
+import os
+
+# Thêm path để import được services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from services.excel.xlsx_stream_writer import StreamingXlsxWriter
+from services.excel.spill_writer import SpillingXlsxWriter
+from services.excel.output_styles import KEYLOG_STYLE
+from services.excel.compact_frames import compact_string_columns
+from services.equation.equation_batch_processor import EquationBatchProcessor
+from services.polynomial.polynomial_excel_processor import PolynomialExcelProcessor
+
+
+def test_round_trip_values_styles_and_widths(tmp_path):
+    out = str(tmp_path / "out.xlsx")
+    with StreamingXlsxWriter(out, compression_level=1) as writer:
+        sheet = writer.create_sheet('Results', column_widths={0: 12, 1: 30}, styled_columns=[1])
+        sheet.append(['data_A', 'keylog'])
+        sheet.append(['x & <y>', ' wj1=2 ', 5, np.int64(7), np.float64(1.5), float('nan'), None, '3.25'])
+        writer.create_sheet('Metadata').append(['degree', 2])
+    wb = openpyxl.load_workbook(out)
+    assert wb.sheetnames == ['Results', 'Metadata']
+    ws = wb['Results']
+    assert list(ws.iter_rows(min_row=2, values_only=True))[0] == (
+        'x & <y>', ' wj1=2 ', 5, 7, 1.5, None, None, '3.25')
+    assert ws['B2'].style == KEYLOG_STYLE and ws['B2'].font.name == "Flexio Fx799VN" and ws['A2'].style == 'Normal'
+    assert ws.column_dimensions['B'].width == 30
+    assert pd.read_excel(out, sheet_name='Metadata').columns.tolist() == ['degree', 2]
+
+
+def test_spill_writer_engines_write_same_cells(tmp_path):
+    rows = [[f'{j},1', f'wj{j}='] for j in range(25)]
+    outputs = {}
+    for engine in ('stream', 'openpyxl'):
+        out = str(tmp_path / f"{engine}.xlsx")
+        writer = SpillingXlsxWriter(out, ['data_A', 'keylog'], rows_per_sheet=10, keylog_col_index=1, engine=engine)
+        for values in rows:
+            writer.append(values)
+        writer.close()
+        wb = openpyxl.load_workbook(out)
+        outputs[engine] = {name: list(wb[name].iter_rows(values_only=True)) for name in wb.sheetnames}
+        assert wb['Results_3']['B2'].style == KEYLOG_STYLE
+    assert outputs['stream'] == outputs['openpyxl']
+    assert list(outputs['stream']) == ['Results', 'Results_2', 'Results_3']
+
+
+def test_equation_chunked_output_strings_to_numbers(tmp_path):
+    src = str(tmp_path / "eq.xlsx")
+    pd.DataFrame({'Phương trình 1': ['1,1,3', '2,1,4'], 'Phương trình 2': ['1,-1,1', '1,1,1']}).to_excel(src, index=False)
+    processor = EquationBatchProcessor()
+    processor.chunk_size = 1
+    out = processor.process_file_chunked(src, 2, 'fx799', str(tmp_path / "eq_out.xlsx"))
+    chunked = pd.read_excel(out)
+    standard = pd.read_excel(processor.process_file(src, 2, 'fx799', str(tmp_path / "eq_std.xlsx")))
+    assert chunked['keylog'].tolist() == standard['keylog'].tolist()
+    assert len(chunked) == 2
+
+
+def test_missing_scalars_of_compacted_frames_stay_blank(tmp_path):
+    df = pd.DataFrame({'a': ['1', None, '1'], 'b': ['x', 'y', None]})
+    compact_string_columns(df, max_unique_ratio=0)  # Arrow strings: missing cells are pd.NA
+    assert df['a'].iloc[1] is pd.NA
+    out = str(tmp_path / "na.xlsx")
+    with StreamingXlsxWriter(out) as writer:
+        sheet = writer.create_sheet('Results', styled_columns=[1])
+        for values in df.itertuples(index=False, name=None):
+            sheet.append(values)
+        sheet.append([pd.NA, pd.NaT, np.datetime64('NaT')])
+    rows = list(openpyxl.load_workbook(out).active.iter_rows(values_only=True))
+    assert rows == [('1', 'x'), (None, 'y'), ('1', None), (None, None)]
+
+    # Polynomial export: a blank coefficient stays an empty cell (was '<NA>')
+    path = str(tmp_path / "poly.xlsx")
+    pd.DataFrame({'a': ['1', '1'], 'b': ['-3', None], 'c': ['2', '-4']}).to_excel(path, index=False)
+    processor = PolynomialExcelProcessor(2)
+    output = processor.export_results(processor.process_batch(path), str(tmp_path / "poly_out.xlsx"))
+    cells = [cell for row in openpyxl.load_workbook(output)['Input'].iter_rows(values_only=True) for cell in row]
+    assert '<NA>' not in cells
@@ -7,6 +7,7 @@ import threading
 
 from services.equation.equation_template_generator import EquationTemplateGenerator
 from services.equation.equation_batch_processor import EquationBatchProcessor
+from services.excel.file_preview import preview_summary
 from services.equation.equation_service import EquationService
 
 class EquationView:
@@ -436,7 +437,7 @@ class EquationView:
             messagebox.showerror("Lỗi", f"Không thể tạo template: {e}")
 
     def _on_import_excel(self):
-        path = filedialog.askopenfilename(filetypes=[("Excel","*.xlsx *.xls")])
+        path = filedialog.askopenfilename(filetypes=[("Excel","*.xlsx *.xls"), ("CSV/TSV","*.csv *.tsv")])
         if not path:
             return
         try:
@@ -455,10 +456,20 @@ class EquationView:
         self.has_manual_data = False
         self._update_button_visibility()
         size_info = f" ({size_mb:.1f}MB)" if size_mb else ""
-        messagebox.showinfo("Import", f"Đã chọn file:\n{self.imported_file_name}{size_info}\nSẵn sàng xử lý.")
+        messagebox.showinfo("Import", f"Đã chọn file:\n{self.imported_file_name}{size_info}\n{self._preview_text(path)}Sẵn sàng xử lý.")
         if hasattr(self, 'excel_status_label'):
             self.excel_status_label.config(text=f"Excel: 📁 {self.imported_file_name[:15]}...")
 
+    def _preview_text(self, path):
+        """Xem trước nhanh (chỉ vài dòng đầu); lỗi xem trước không chặn import"""
+        try:
+            preview = EquationBatchProcessor().preview_file(path)
+        except Exception as e:
+            return f"⚠️ Không xem trước được: {e}\n"
+        variables = preview['detected_mapping']['variables']
+        detected = f"🔎 Nhận diện: {variables} cột 'Phương trình'" if variables else "⚠️ Không thấy cột 'Phương trình 1'"
+        return f"{preview_summary(preview)}\n{detected}\n"
+
     def _on_process_excel(self):
         if not self.imported_file_path:
             messagebox.showwarning("Thiếu file", "Hãy import file Excel trước.")
@@ -469,7 +480,7 @@ class EquationView:
             original = os.path.splitext(self.imported_file_name)[0]
             suffix = "_large" if self.imported_file_size_mb > 100 else ""
             default_name = f"{original}{suffix}_equation_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            output = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel","*.xlsx")], initialfile=default_name)
+            output = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel","*.xlsx"), ("CSV","*.csv"), ("TSV","*.tsv")], initialfile=default_name)
             if not output:
                 return
             progress = self._create_progress_window("Đang xử lý file Excel...")
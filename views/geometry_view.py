@@ -801,7 +801,7 @@ class GeometryView:
         try:
             file_path = filedialog.askopenfilename(
                 title="Chọn file Excel",
-                filetypes=[("Excel files", "*.xlsx *.xls")]
+                filetypes=[("Excel files", "*.xlsx *.xls"), ("CSV/TSV files", "*.csv *.tsv")]
             )
             
             if not file_path:
@@ -809,8 +809,8 @@ class GeometryView:
             
             # Kiểm tra extension
             file_ext = os.path.splitext(file_path)[1].lower()
-            if file_ext not in ['.xlsx', '.xls']:
-                messagebox.showerror("Lỗi", "Chỉ hỗ trợ file Excel (.xlsx, .xls)!")
+            if file_ext not in ['.xlsx', '.xls', '.csv', '.tsv']:
+                messagebox.showerror("Lỗi", "Chỉ hỗ trợ file Excel (.xlsx, .xls) hoặc CSV/TSV (.csv, .tsv)!")
                 return
             
             # Kiểm tra file tồn tại
@@ -834,11 +834,11 @@ class GeometryView:
             # Ẩn nút copy vì đang ở import mode
             self._hide_copy_button()
             
-            # Cập nhật status đơn giản (chỉ tên file)
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            # Cập nhật status: tên file + xem trước (chỉ đọc vài dòng đầu, nhanh với mọi kích thước file)
             status_message = (
                 f"📁 Đã import file: {self.imported_file_name}\n"
             )
+            status_message += self._preview_status(file_path)
             
             self.excel_status_label.config(text=f"Excel: 📁 {self.imported_file_name[:15]}...")
             self._update_result_display(status_message)
@@ -846,6 +846,20 @@ class GeometryView:
         except Exception as e:
             messagebox.showerror("Lỗi Import", f"Lỗi import Excel: {str(e)}")
 
+    def _preview_status(self, file_path):
+        """Dòng xem trước cho status; lỗi xem trước không chặn import"""
+        if not self.geometry_service:
+            return ""
+        try:
+            from services.excel.file_preview import preview_summary
+            preview = self.geometry_service.preview_excel_file(file_path)
+        except Exception as e:
+            return f"⚠️ Không xem trước được: {str(e)}\n"
+        detected = preview['detected_mapping']
+        return (f"{preview_summary(preview)}\n"
+                f"🔎 Nhóm A: {', '.join(detected['A']) or 'không nhận diện'} | "
+                f"Nhóm B: {', '.join(detected['B']) or 'không nhận diện'}\n")
+
     def _process_excel_batch(self):
         """Đọc và xử lý file Excel (chỉ đọc ở bước này)"""
         try:
@@ -868,7 +882,7 @@ class GeometryView:
             output_path = filedialog.asksaveasfilename(
                 title="Chọn nơi lưu kết quả",
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("TSV files", "*.tsv")],
                 initialfile=default_output
             )
             if not output_path:
@@ -1041,7 +1055,7 @@ class GeometryView:
             messagebox.showinfo("Tạo template thành công", 
                 f"Template Excel đã tạo tại:\n{template_file}\n\n"
                 f"Bạn có thể điền dữ liệu vào template này rồi import lại.\n\n"
-                f"💡 Tip: Template hỗ trợ đến 250,000 dòng với anti-crash system!")
+                f"💡 Tip: File lớn được xử lý streaming, kết quả > 1,048,576 dòng tự chuyển sang Results_2, Results_3...")
             
         except Exception as e:
             messagebox.showerror("Lỗi", f"Lỗi tạo template: {str(e)}")
@@ -1147,7 +1161,7 @@ class GeometryView:
 
         # Nút Import Excel
         self.btn_import_excel = tk.Button(
-            self.frame_tong, text="📁 Import Excel (Fast Select - 250k limit!)",
+            self.frame_tong, text="📁 Import Excel (Fast Select - streaming)",
             command=self._import_excel,
             bg="#FF9800", fg="white", font=("Arial", 9, "bold")
         )
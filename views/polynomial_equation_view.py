@@ -6,6 +6,7 @@ import os
 from services.polynomial.polynomial_service import PolynomialService
 from services.polynomial.polynomial_template_generator import PolynomialTemplateGenerator
 from services.polynomial.polynomial_excel_processor import PolynomialExcelProcessor
+from services.excel.file_preview import preview_summary
 
 class PolynomialEquationView:
     """Full Polynomial Mode View: manual input, separated Excel import/process, export, and keylog display"""
@@ -307,25 +308,40 @@ class PolynomialEquationView:
             messagebox.showerror("Lỗi", f"Không thể tạo template: {e}")
 
     def _on_import_excel(self):
-        path = filedialog.askopenfilename(filetypes=[("Excel","*.xlsx *.xls")], title="Chọn file Excel (sheet 'Input')")
+        path = filedialog.askopenfilename(filetypes=[("Excel","*.xlsx *.xls"), ("CSV/TSV","*.csv *.tsv")], title="Chọn file Excel (sheet 'Input')")
         if not path: return
         self.imported_file_path = path
         self.is_imported_mode = True
         self._update_button_visibility()
         self.final_result_text.config(state='normal'); self.final_result_text.delete("1.0", tk.END); self.final_result_text.insert("1.0", f"Excel: {os.path.basename(path)}"); self.final_result_text.config(state='disabled')
-        self.status_label.config(text=f"📁 Đã import: {os.path.basename(path)}. Nhấn '🔥 Xử lý File Excel' để chạy.")
+        self.status_label.config(text=f"📁 Đã import: {os.path.basename(path)}. {self._preview_text(path)}Nhấn '🔥 Xử lý File Excel' để chạy.")
+
+    def _preview_text(self, path):
+        """Xem trước nhanh (chỉ vài dòng đầu); lỗi xem trước không chặn import"""
+        try:
+            preview = PolynomialExcelProcessor(int(self.bac_phuong_trinh_var.get()), self.phien_ban_var.get()).preview_file(path)
+        except Exception as e:
+            return f"⚠️ Không xem trước được: {e}. "
+        missing = preview['detected_mapping']['missing_columns']
+        return f"{preview_summary(preview)}. " + (f"⚠️ Thiếu cột: {', '.join(missing)}. " if missing else "")
 
     def _on_process_excel(self):
         if not self.imported_file_path:
             messagebox.showwarning("Thiếu file", "Hãy import Excel trước."); return
         default_name = f"polynomial_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        out_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel","*.xlsx")], initialfile=default_name, title="Lưu file kết quả")
+        out_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel","*.xlsx"), ("CSV","*.csv"), ("TSV","*.tsv")], initialfile=default_name, title="Lưu file kết quả")
         if not out_path: return
         try:
             degree = int(self.bac_phuong_trinh_var.get()); version = self.phien_ban_var.get()
             processor = PolynomialExcelProcessor(degree, default_version=version)
-            results_df = processor.process_batch(self.imported_file_path)
-            processor.export_results(results_df, out_path, meta={"Source_File": os.path.basename(self.imported_file_path)})
+            input_sheets = processor.find_input_sheets(self.imported_file_path)
+            if len(input_sheets) > 1 and messagebox.askyesno(
+                    "Nhiều sheet", f"File có {len(input_sheets)} sheet dữ liệu:\n{', '.join(input_sheets)}\n\nXử lý song song tất cả các sheet?"):
+                sheet_results = processor.process_workbook_sheets(self.imported_file_path, input_sheets)
+                processor.export_results_multi(sheet_results, out_path, meta={"Source_File": os.path.basename(self.imported_file_path)})
+            else:
+                results_df = processor.process_batch(self.imported_file_path)
+                processor.export_results(results_df, out_path, meta={"Source_File": os.path.basename(self.imported_file_path)})
             self.status_label.config(text="✅ Đã xử lý xong và lưu kết quả", fg="#2E7D32")
             messagebox.showinfo("Hoàn tất", f"Đã xuất kết quả:\n{out_path}")
         except Exception as e:
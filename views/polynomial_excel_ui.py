@@ -17,7 +17,7 @@ class PolynomialExcelUI:
             # Ask input file
             file_path = filedialog.askopenfilename(
                 title="Chọn file Excel Input (sheet 'Input')",
-                filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+                filetypes=[("Excel files", "*.xlsx *.xls"), ("CSV/TSV files", "*.csv *.tsv"), ("All files", "*.*")]
             )
             if not file_path:
                 return
@@ -29,7 +29,7 @@ class PolynomialExcelUI:
             default_name = f"polynomial_results_deg{degree}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             out_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("TSV files", "*.tsv")],
                 initialfile=default_name,
                 title="Lưu kết quả batch"
             )